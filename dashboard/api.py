@@ -0,0 +1,568 @@
+import argparse
+import asyncio
+import base64
+import inspect
+import json
+import math
+import os
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import tornado.web
+
+import aqi
+import correlation
+import cube
+import density
+import rolling
+import timeseries
+from store import (
+    MANIFEST_PATH, MEASUREMENT_COLS, METEOROLOGY_COLS, QC_LEVELS, STORE_PATH,
+    data_version, generation_path, load_store, select_rows, station_index,
+)
+
+
+# layanan HTTP asyncio yang memuat data sekali dan melayani agregat terfilter sebagai JSON ringkas
+# atau Arrow IPC; dashboard Streamlit hanya menjadi klien (lewat HTTP atau di proses yang sama)
+HOST = '127.0.0.1'
+PORT = 8600
+ENV_VAR = 'AIRQ_API_URL'
+PREFIX = '/api/'
+CACHE_MAX_ENTRIES = 256
+WORKERS = 4
+TIMEOUT = 120
+# jeda minimum antar-pemeriksaan manifest dalam detik
+MANIFEST_CHECK = 1.0
+
+FORMATS = {'json': 'application/json', 'arrow': 'application/vnd.apache.arrow.stream'}
+POLLUTANTS = ['PM2.5', 'PM10']
+CATEGORY_POLLUTANTS = {'air_category_pm2_5': 'PM2.5', 'air_category_pm10': 'PM10'}
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class Snapshot:
+    # satu versi data (manifest) yang tidak pernah diubah: setiap direktori dibaca dari generasi versi itu,
+    # yang tidak diubah lagi oleh ingest/stream; versi baru dimuat sebagai snapshot baru
+    def __init__(self, version: int, store_path: str, cube_path: str, corr_path: str,
+                 max_entries: int = CACHE_MAX_ENTRIES):
+        self.version = version
+        self.max_entries = max_entries
+        store_path, cube_path, corr_path = (generation_path(p, version) for p in (store_path, cube_path, corr_path))
+        self.df = load_store(store_path)
+        self.index = station_index(self.df)
+        self.cube = cube.load_cube(cube_path) if os.path.isdir(cube_path) else cube.build_cube(self.df)
+        self.stats = (correlation.load_stats(corr_path) if os.path.isdir(corr_path)
+                      else correlation.build_stats(self.df))
+        self._lock = threading.Lock()
+        self._aqi = {}
+        # tabel episode per (ambang, jam, tingkat QC) dibatasi seperti cache respons, yang terlama dibuang
+        self._episodes = OrderedDict()
+
+    def cells(self, start=None, end=None, stations=None, quality=None):
+        cells = cube.select_cells(self.cube, start, end, stations, quality)
+        return cells, int(cells['rows'].sum())
+
+    def rows(self, frame: pd.DataFrame, start=None, end=None, stations=None, quality=None):
+        # frame sejajar dengan self.df (dataset atau hasil aqi)
+        return select_rows(frame, start, end, stations, self.index, quality)
+
+    def aqi(self, standard: str) -> pd.DataFrame:
+        # barisnya sejajar dengan self.df sehingga self.index berlaku juga di sini
+        with self._lock:
+            if standard not in self._aqi:
+                self._aqi[standard] = aqi.compute(self.df, standard)
+            return self._aqi[standard]
+
+    def episodes(self, threshold: float, hours: int, quality=None) -> pd.DataFrame:
+        with self._lock:
+            key = (threshold, hours, quality)
+            if key in self._episodes:
+                self._episodes.move_to_end(key)
+                return self._episodes[key]
+            # definisi bawaan sudah dipelihara di kubus oleh ingest/stream
+            if key == (rolling.EPISODE_THRESHOLD, 1, None) and 'episodes' in self.cube:
+                table = self.cube['episodes']
+            else:
+                table = rolling.episodes(self._episode_frame(quality), rolling.EPISODE_POLLUTANTS, threshold, hours)
+            self._episodes[key] = table
+            while len(self._episodes) > self.max_entries:
+                self._episodes.popitem(last=False)
+            return table
+
+    def _episode_frame(self, quality) -> pd.DataFrame:
+        # jam dengan tingkat QC yang tidak dipilih dianggap hilang, sehingga memutus episode
+        frame = self.df[['station', *rolling.EPISODE_POLLUTANTS]]
+        if quality is None:
+            return frame
+        keep = self.df['qc_flag'].isin(quality).to_numpy()
+        return frame.assign(**{col: frame[col].where(keep) for col in rolling.EPISODE_POLLUTANTS})
+
+
+# setiap endpoint mengembalikan (hasil, jumlah baris yang diproses)
+
+def _version(data: Snapshot):
+    return data.version, 0
+
+
+def _stations(data: Snapshot):
+    return data.df['station'].cat.categories.tolist(), 0
+
+
+def _bounds(data: Snapshot):
+    # baris pertama/terakhir setiap stasiun sudah merupakan batas waktunya
+    offsets, times = data.index['offsets'], data.index['times']
+    present = offsets[1:] > offsets[:-1]
+    first, last = times[offsets[:-1][present]], times[offsets[1:][present] - 1]
+    return [pd.Timestamp(first.min()), pd.Timestamp(last.max())], 0
+
+
+def _metrics(data: Snapshot, start=None, end=None, stations=None, quality=None):
+    cells, rows = data.cells(start, end, stations, quality)
+    total_station, avg_pm10, avg_pm25 = cube.metrics(cells)
+    return {'total_station': int(total_station), 'avg_pm10': float(avg_pm10), 'avg_pm25': float(avg_pm25)}, rows
+
+
+def _yearly(data: Snapshot, start=None, end=None, stations=None, quality=None):
+    cells, rows = data.cells(start, end, stations, quality)
+    return cube.yearly_means(cells, ['PM10', 'PM2.5']), rows
+
+
+def _monthly(data: Snapshot, start=None, end=None, stations=None, quality=None):
+    cells, rows = data.cells(start, end, stations, quality)
+    return cube.monthly_means(cells, POLLUTANTS), rows
+
+
+def _correlation(data: Snapshot, start=None, end=None, stations=None, quality=None):
+    # dirakit dari statistik cukup per stasiun per hari, bukan memindai baris per jam
+    total = correlation.select_stats(data.stats, start, end, stations, quality)
+    return correlation.correlation_matrix(total), int(total['n'].diagonal().max())
+
+
+def _categories(data: Snapshot, column='air_category_pm2_5', standard=None, start=None, end=None, stations=None,
+                quality=None):
+    if column not in CATEGORY_POLLUTANTS:
+        raise ApiError(400, f'kolom kategori tidak dikenal: {column}')
+    if standard is None:
+        cells, rows = data.cells(start, end, stations, quality)
+        return cube.category_counts(cells, column), rows
+    frame = data.rows(data.aqi(standard), start, end, stations, quality)
+    return aqi.category_counts(frame, CATEGORY_POLLUTANTS[column]), len(frame)
+
+
+def _severe(data: Snapshot, columns=('air_category_pm2_5',), standard=None, start=None, end=None, stations=None,
+            quality=None):
+    unknown = [c for c in columns if c not in CATEGORY_POLLUTANTS]
+    if unknown:
+        raise ApiError(400, f'kolom kategori tidak dikenal: {", ".join(unknown)}')
+    if standard is None:
+        cells, rows = data.cells(start, end, stations, quality)
+        return cube.severe_counts(cells, tuple(columns)), rows
+    frame = data.rows(data.aqi(standard), start, end, stations, quality)
+    return aqi.severe_counts(frame, [CATEGORY_POLLUTANTS[c] for c in columns], standard), len(frame)
+
+
+def _exceedance(data: Snapshot, start=None, end=None, stations=None, quality=None):
+    cells, rows = data.cells(start, end, stations, quality)
+    return cube.exceedance_counts(cells), rows
+
+
+def _episodes(data: Snapshot, threshold=rolling.EPISODE_THRESHOLD, hours=1, start=None, end=None, stations=None,
+              quality=None):
+    table = rolling.select_episodes(data.episodes(threshold, hours, quality), start, end, stations)
+    return table.reset_index(drop=True), len(table)
+
+
+def _durations(data: Snapshot, threshold=rolling.EPISODE_THRESHOLD, hours=1, start=None, end=None, stations=None,
+               quality=None):
+    table = rolling.select_episodes(data.episodes(threshold, hours, quality), start, end, stations)
+    return rolling.duration_histogram(table), len(table)
+
+
+def _density(data: Snapshot, bins=density.DEFAULT_BINS, start=None, end=None, stations=None, quality=None):
+    # histogram 2D atas semua baris terpilih, bukan sampel acak
+    if bins not in density.RESOLUTIONS:
+        raise ApiError(400, f'bins harus salah satu dari {density.RESOLUTIONS}')
+    df = data.rows(data.df, start, end, stations, quality)
+    return density.density_grid(df, METEOROLOGY_COLS, POLLUTANTS, bins), len(df)
+
+
+def _span(data: Snapshot, start=None, end=None):
+    # rentang yang benar-benar diminta (tanggal akhir inklusif sampai jam terakhirnya) untuk memilih tingkat
+    first, last = _bounds(data)[0]
+    if start is not None:
+        first = max(first, pd.Timestamp(start))
+    if end is not None:
+        last = min(last, pd.Timestamp(end).normalize() + pd.Timedelta(days=1) - pd.Timedelta(hours=1))
+    return first, max(first, last)
+
+
+def _series_column(column: str):
+    if column not in MEASUREMENT_COLS:
+        raise ApiError(400, f'kolom pengukuran tidak dikenal: {column}')
+
+
+def _overview(data: Snapshot, column='PM2.5', start=None, end=None, stations=None, quality=None):
+    # tampilan kasar dari sel kubus harian, tanpa memindai baris per jam
+    _series_column(column)
+    cells = cube.select_daily(data.cube, start, end, stations, quality)
+    return timeseries.from_cells(cells, column, *_span(data, start, end)), int(cells['rows'].sum())
+
+
+def _timeseries(data: Snapshot, column='PM2.5', budget=timeseries.PIXEL_BUDGET, level=None, start=None, end=None,
+                stations=None, quality=None):
+    _series_column(column)
+    if not timeseries.MIN_BUDGET <= budget <= timeseries.MAX_BUDGET:
+        raise ApiError(400, f'budget harus antara {timeseries.MIN_BUDGET} dan {timeseries.MAX_BUDGET}')
+    df = data.rows(data.df, start, end, stations, quality)
+    values = df[column].to_numpy(dtype='float64')
+    return timeseries.downsample(df.index.to_numpy(), values, *_span(data, start, end), budget, level), len(df)
+
+
+# nama endpoint -> (jenis hasil, fungsi); 'object' hanya tersedia sebagai JSON
+ENDPOINTS = {
+    'version': ('object', _version),
+    'stations': ('object', _stations),
+    'bounds': ('object', _bounds),
+    'metrics': ('object', _metrics),
+    'yearly': ('frame', _yearly),
+    'monthly': ('frame', _monthly),
+    'correlation': ('frame', _correlation),
+    'categories': ('series', _categories),
+    'severe': ('series', _severe),
+    'exceedance': ('series', _exceedance),
+    'episodes': ('frame', _episodes),
+    'durations': ('series', _durations),
+    'density': ('object', _density),
+    'overview': ('object', _overview),
+    'timeseries': ('object', _timeseries),
+}
+
+
+def _names(value: str) -> tuple:
+    return tuple(v for v in value.split(',') if v)
+
+
+def _standard(value: str):
+    if value not in aqi.STANDARDS:
+        raise ApiError(400, f'standar tidak dikenal: {value}')
+    return value
+
+
+def _quality(value: str):
+    levels = _names(value)
+    unknown = [level for level in levels if level not in QC_LEVELS]
+    if unknown:
+        raise ApiError(400, f'tingkat QC tidak dikenal: {", ".join(unknown)}')
+    return levels
+
+
+def _level(value: str):
+    if value not in timeseries.LEVELS:
+        raise ApiError(400, f'tingkat agregasi tidak dikenal: {value}')
+    return value
+
+
+PARAMS = {
+    'start': pd.Timestamp, 'end': pd.Timestamp, 'stations': _names, 'column': str, 'columns': _names,
+    'standard': _standard, 'threshold': float, 'hours': int, 'bins': int, 'quality': _quality,
+    'budget': int, 'level': _level,
+}
+
+
+def encode_params(params: dict) -> dict:
+    # None berarti tidak difilter dan tidak dikirim; stations=() tetap dikirim sebagai string kosong
+    encoded = {}
+    for name, value in params.items():
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple)):
+            value = ','.join(map(str, value))
+        elif isinstance(value, pd.Timestamp):
+            value = value.isoformat()
+        encoded[name] = str(value)
+    return encoded
+
+
+def parse_params(fn, raw: dict) -> dict:
+    params = {}
+    for name, value in raw.items():
+        if name not in PARAMS:
+            raise ApiError(400, f'parameter tidak dikenal: {name}')
+        try:
+            params[name] = PARAMS[name](value)
+        except (TypeError, ValueError) as e:
+            raise ApiError(400, f'nilai {name} tidak valid: {value}') from e
+    try:
+        inspect.signature(fn).bind(None, **params)
+    except TypeError as e:
+        raise ApiError(400, str(e)) from e
+    return params
+
+
+def normalize_params(params: dict) -> dict:
+    # penulisan yang berbeda untuk filter yang sama (urutan/duplikat stasiun dan tingkat QC, format tanggal,
+    # jam pada tanggal awal/akhir) menjadi satu bentuk, sehingga memakai entri cache yang sama; start dan end
+    # adalah tanggal, karena endpoint berbasis sel kubus harian tidak bisa memotong di tengah hari dan endpoint
+    # berbasis baris harus memberi hasil yang sama untuk filter yang sama
+    normalized = dict(params)
+    for name in ('stations', 'quality'):
+        if name in normalized:
+            normalized[name] = tuple(sorted(set(normalized[name])))
+    for name in ('start', 'end'):
+        if name in normalized:
+            normalized[name] = normalized[name].normalize()
+    return normalized
+
+
+def _jsonable(value):
+    # JSON ringkas: array numpy dikirim sebagai bytes base64, dict berkunci non-string sebagai daftar pasangan
+    if isinstance(value, np.ndarray):
+        data = np.ascontiguousarray(value)
+        return {'__ndarray__': base64.b64encode(data.tobytes()).decode(), 'dtype': data.dtype.str,
+                'shape': list(data.shape)}
+    if isinstance(value, dict):
+        if all(isinstance(k, str) for k in value):
+            return {k: _jsonable(v) for k, v in value.items()}
+        return {'__items__': [[_jsonable(k), _jsonable(v)] for k, v in value.items()]}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def _from_jsonable(value):
+    if isinstance(value, dict):
+        if '__ndarray__' in value:
+            data = np.frombuffer(base64.b64decode(value['__ndarray__']), dtype=value['dtype'])
+            return data.reshape(value['shape'])
+        if '__items__' in value:
+            return {_key(k): _from_jsonable(v) for k, v in value['__items__']}
+        return {k: _from_jsonable(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_from_jsonable(v) for v in value]
+    return value
+
+
+def _key(value):
+    return tuple(value) if isinstance(value, list) else value
+
+
+def encode(result, kind: str, fmt: str) -> bytes:
+    if kind == 'object':
+        return json.dumps(_jsonable(result), separators=(',', ':'), allow_nan=False).encode()
+    frame = result.to_frame() if kind == 'series' else result
+    if fmt == 'json':
+        return frame.to_json(orient='split', date_format='iso').encode()
+    table = pa.Table.from_pandas(frame)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def decode(body: bytes, kind: str):
+    # hanya untuk balasan yang diminta oleh Client: objek sebagai JSON, tabel sebagai Arrow
+    if kind == 'object':
+        return _from_jsonable(json.loads(body))
+    frame = pa.ipc.open_stream(body).read_all().to_pandas()
+    return frame.iloc[:, 0] if kind == 'series' else frame
+
+
+class Reply:
+    __slots__ = ('body', 'content_type', 'rows', 'version')
+
+    def __init__(self, body: bytes, content_type: str, rows: int, version: int):
+        self.body, self.content_type, self.rows, self.version = body, content_type, rows, version
+
+
+class Service:
+    def __init__(self, store_path=STORE_PATH, cube_path=cube.CUBE_PATH, corr_path=correlation.CORR_PATH,
+                 manifest_path=MANIFEST_PATH, cache_entries=CACHE_MAX_ENTRIES, workers=WORKERS,
+                 manifest_check=MANIFEST_CHECK):
+        self.paths = (store_path, cube_path, corr_path)
+        self.manifest_path = manifest_path
+        self.manifest_check = manifest_check
+        self._manifest = (None, None)
+        self._checked = float('-inf')
+        self.cache_entries = cache_entries
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='airq-api')
+        self.data = None
+        self.cache = OrderedDict()
+        self.inflight = {}
+        self._reload = asyncio.Lock()
+
+    async def current(self) -> Snapshot:
+        # manifest dinaikkan versinya oleh ingest/stream; snapshot baru dimuat sekali untuk semua permintaan
+        version = self.version()
+        if self.data is None or self.data.version != version:
+            async with self._reload:
+                if self.data is None or self.data.version != version:
+                    loop = asyncio.get_running_loop()
+                    self.data = await loop.run_in_executor(self.executor, Snapshot, version, *self.paths,
+                                                           self.cache_entries)
+                    self.cache.clear()
+        return self.data
+
+    def version(self) -> int:
+        # manifest di-stat paling sering sekali per manifest_check detik dan baru dibaca ulang bila file-nya
+        # berganti (write_manifest menggantinya secara atomik), bukan dibaca di setiap permintaan
+        now = time.monotonic()
+        if self._manifest[1] is not None and now - self._checked < self.manifest_check:
+            return self._manifest[1]
+        self._checked = now
+        try:
+            stat = os.stat(self.manifest_path)
+            stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            stamp = None
+        if self._manifest[1] is None or stamp != self._manifest[0]:
+            self._manifest = (stamp, data_version(self.manifest_path))
+        return self._manifest[1]
+
+    async def query(self, endpoint: str, raw: dict, fmt: str = 'json') -> Reply:
+        if endpoint not in ENDPOINTS:
+            raise ApiError(404, f'endpoint tidak dikenal: {endpoint}')
+        if fmt not in FORMATS:
+            raise ApiError(400, f'format harus salah satu dari {", ".join(FORMATS)}')
+        kind, fn = ENDPOINTS[endpoint]
+        if kind == 'object' and fmt != 'json':
+            raise ApiError(400, f'{endpoint} hanya tersedia sebagai JSON')
+        params = normalize_params(parse_params(fn, raw))
+        data = await self.current()
+
+        key = (data.version, endpoint, tuple(sorted(params.items())), fmt)
+        reply = self.cache.get(key)
+        if reply is not None:
+            self.cache.move_to_end(key)
+            return Reply(reply.body, reply.content_type, 0, reply.version)
+
+        # permintaan identik yang datang bersamaan menunggu satu perhitungan yang sama
+        task = self.inflight.get(key)
+        if task is None:
+            loop = asyncio.get_running_loop()
+            task = asyncio.ensure_future(loop.run_in_executor(self.executor, self._compute, data, kind, fn, params, fmt))
+            self.inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _compute(self, data: Snapshot, kind: str, fn, params: dict, fmt: str) -> Reply:
+        result, rows = fn(data, **params)
+        return Reply(encode(result, kind, fmt), FORMATS[fmt], rows, data.version)
+
+    def _finish(self, key, task):
+        self.inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        self.cache[key] = task.result()
+        while len(self.cache) > self.cache_entries:
+            self.cache.popitem(last=False)
+
+
+class _LocalTransport:
+    # layanan dijalankan di event loop thread latar belakang proses ini; dipakai dashboard tanpa server
+    # dan sebagai klien uji di proses yang sama
+    def __init__(self, service: Service):
+        self.service = service
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, name='airq-api-loop', daemon=True).start()
+
+    def fetch(self, endpoint: str, params: dict, fmt: str) -> Reply:
+        future = asyncio.run_coroutine_threadsafe(self.service.query(endpoint, params, fmt), self.loop)
+        return future.result()
+
+
+class _HttpTransport:
+    def __init__(self, url: str, timeout: float):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+
+    def fetch(self, endpoint: str, params: dict, fmt: str) -> Reply:
+        query = urllib.parse.urlencode({**params, 'format': fmt})
+        try:
+            with urllib.request.urlopen(f'{self.url}{PREFIX}{endpoint}?{query}', timeout=self.timeout) as response:
+                return Reply(response.read(), response.headers.get('Content-Type'),
+                             int(response.headers.get('X-Airq-Rows', 0)), int(response.headers.get('X-Airq-Version', 0)))
+        except urllib.error.HTTPError as e:
+            raise ApiError(e.code, e.read().decode(errors='replace')) from e
+
+
+class Client:
+    def __init__(self, url: str = None, service: Service = None, timeout: float = TIMEOUT):
+        self.transport = _HttpTransport(url, timeout) if url else _LocalTransport(service or Service())
+
+    def get(self, endpoint: str, **params):
+        # tabel selalu diminta sebagai Arrow agar tipe (kategori, waktu, indeks) tetap utuh
+        kind = ENDPOINTS[endpoint][0]
+        fmt = 'json' if kind == 'object' else 'arrow'
+        reply = self.transport.fetch(endpoint, encode_params(params), fmt)
+        return decode(reply.body, kind), reply.rows
+
+
+class QueryHandler(tornado.web.RequestHandler):
+    def initialize(self, service: Service):
+        self.service = service
+
+    async def get(self, endpoint: str):
+        raw = {name: self.get_query_argument(name) for name in self.request.query_arguments}
+        fmt = raw.pop('format', 'json')
+        try:
+            reply = await self.service.query(endpoint, raw, fmt)
+        except ApiError as e:
+            self.set_status(e.status)
+            self.finish({'error': str(e)})
+            return
+        self.set_header('Content-Type', reply.content_type)
+        self.set_header('X-Airq-Rows', str(reply.rows))
+        self.set_header('X-Airq-Version', str(reply.version))
+        self.finish(reply.body)
+
+
+def make_app(service: Service) -> tornado.web.Application:
+    return tornado.web.Application([(rf'{PREFIX}([a-z]+)', QueryHandler, {'service': service})],
+                                   compress_response=True)
+
+
+async def serve(host: str, port: int, service: Service):
+    app = make_app(service)
+    app.listen(port, host)
+    # data dimuat sebelum permintaan pertama datang
+    await service.current()
+    print(f'API data kualitas udara siap di http://{host}:{port}{PREFIX}', flush=True)
+    await asyncio.Event().wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Layanan HTTP agregat data kualitas udara untuk dashboard.')
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--store', default=STORE_PATH, help='store dataset (Parquet, .npy, atau .feather)')
+    parser.add_argument('--cube', default=cube.CUBE_PATH, help='direktori kubus agregat')
+    parser.add_argument('--manifest', default=MANIFEST_PATH, help='lokasi manifest versi data')
+    parser.add_argument('--workers', type=int, default=WORKERS, help='jumlah thread perhitungan')
+    args = parser.parse_args(argv)
+
+    service = Service(args.store, args.cube, os.path.join(args.cube, os.path.basename(correlation.CORR_PATH)),
+                      args.manifest, workers=args.workers)
+    asyncio.run(serve(args.host, args.port, service))
+
+
+if __name__ == '__main__':
+    main()
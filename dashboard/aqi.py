@@ -0,0 +1,182 @@
+import numpy as np
+import pandas as pd
+
+import rolling
+from store import POLLUTANT_COLS
+
+
+# kategori bawaan kolom air_category_pm2_5/air_category_pm10 yang dibuat ingest: ambang PM2.5 US EPA 2012
+# (12 / 35,4 / 55,4 / 150,4 / 250,4 µg/m³) diterapkan langsung ke konsentrasi per jam PM2.5 maupun PM10
+HOURLY_BINS = [-np.inf, 12.0, 35.4, 55.4, 150.4, 250.4, np.inf]
+HOURLY_LABELS = [
+    'Baik', 'Sedang', 'Tidak Sehat bagi Kelompok Sensitif',
+    'Tidak Sehat', 'Sangat Tidak Sehat', 'Berbahaya',
+]
+HOURLY_SEVERE = ['Sangat Tidak Sehat', 'Berbahaya']
+
+# konversi µg/m³ ke ppm/ppb pada 25 °C, 1 atm: ppb = µg/m³ * 24,45 / berat molekul
+MOLAR_VOLUME = 24.45
+MOLECULAR_WEIGHT = {'SO2': 64.066, 'NO2': 46.0055, 'CO': 28.010, 'O3': 47.997}
+
+
+def _ppb(pollutant: str) -> float:
+    return MOLAR_VOLUME / MOLECULAR_WEIGHT[pollutant]
+
+
+def _segments(concentrations, indices) -> np.ndarray:
+    # breakpoint bersambung: segmen ke-k dari konsentrasi[k]..konsentrasi[k+1] ke indeks[k]..indeks[k+1]
+    return np.column_stack([concentrations[:-1], concentrations[1:], indices[:-1], indices[1:]]).astype('float64')
+
+
+def _spec(hours: int, segments, scale: float = 1.0, decimals=None) -> dict:
+    return {'hours': hours, 'segments': np.asarray(segments, dtype='float64'), 'scale': scale, 'decimals': decimals}
+
+
+EPA_INDEX = [(0, 50), (51, 100), (101, 150), (151, 200), (201, 300), (301, 500)]
+
+
+def _epa(ranges, index=EPA_INDEX) -> np.ndarray:
+    return np.array([(lo, hi, i_lo, i_hi) for (lo, hi), (i_lo, i_hi) in zip(ranges, index)], dtype='float64')
+
+
+ISPU_INDEX = [0, 50, 100, 200, 300, 500]
+CHINA_INDEX = [0, 50, 100, 150, 200, 300, 400, 500]
+
+STANDARDS = {
+    # PermenLHK P.14/MENLHK/SETJEN/KUM.1/7/2020, semua konsentrasi µg/m³
+    'ISPU': {
+        'name': 'ISPU (Indonesia)',
+        'levels': [50, 100, 200, 300],
+        'labels': ['Baik', 'Sedang', 'Tidak Sehat', 'Sangat Tidak Sehat', 'Berbahaya'],
+        'severe': ['Sangat Tidak Sehat', 'Berbahaya'],
+        'pollutants': {
+            'PM10': [_spec(24, _segments([0, 50, 150, 350, 420, 500], ISPU_INDEX))],
+            'PM2.5': [_spec(24, _segments([0, 15.5, 55.4, 150.4, 250.4, 500], ISPU_INDEX))],
+            'SO2': [_spec(24, _segments([0, 52, 180, 400, 800, 1200], ISPU_INDEX))],
+            'CO': [_spec(24, _segments([0, 4000, 8000, 15000, 30000, 45000], ISPU_INDEX))],
+            'O3': [_spec(1, _segments([0, 120, 235, 400, 800, 1000], ISPU_INDEX))],
+            'NO2': [_spec(24, _segments([0, 80, 200, 1130, 2260, 3000], ISPU_INDEX))],
+        },
+    },
+    # tabel AQI US EPA (PM2.5 revisi 2024); O3/CO dalam ppm, SO2/NO2 dalam ppb, dipotong sesuai aturan EPA
+    'US EPA': {
+        'name': 'AQI US EPA',
+        'levels': [50, 100, 150, 200, 300],
+        'labels': HOURLY_LABELS,
+        'severe': ['Sangat Tidak Sehat', 'Berbahaya'],
+        'pollutants': {
+            'PM2.5': [_spec(24, _epa([(0.0, 9.0), (9.1, 35.4), (35.5, 55.4), (55.5, 125.4), (125.5, 225.4),
+                                      (225.5, 325.4)]), decimals=1)],
+            'PM10': [_spec(24, _epa([(0, 54), (55, 154), (155, 254), (255, 354), (355, 424), (425, 604)]),
+                           decimals=0)],
+            # O3 8 jam hanya sampai 0,200 ppm; indeks 101+ juga dihitung dari O3 1 jam, diambil yang terbesar
+            'O3': [
+                _spec(8, _epa([(0.000, 0.054), (0.055, 0.070), (0.071, 0.085), (0.086, 0.105), (0.106, 0.200)]),
+                      _ppb('O3') / 1000, decimals=3),
+                _spec(1, _epa([(0.125, 0.164), (0.165, 0.204), (0.205, 0.404), (0.405, 0.604)], EPA_INDEX[2:]),
+                      _ppb('O3') / 1000, decimals=3),
+            ],
+            'CO': [_spec(8, _epa([(0.0, 4.4), (4.5, 9.4), (9.5, 12.4), (12.5, 15.4), (15.5, 30.4), (30.5, 50.4)]),
+                         _ppb('CO') / 1000, decimals=1)],
+            # SO2 1 jam hanya sampai indeks 200, di atasnya memakai rata-rata 24 jam
+            'SO2': [
+                _spec(1, _epa([(0, 35), (36, 75), (76, 185), (186, 304)]), _ppb('SO2'), decimals=0),
+                _spec(24, _epa([(305, 604), (605, 1004)], EPA_INDEX[4:]), _ppb('SO2'), decimals=0),
+            ],
+            'NO2': [_spec(1, _epa([(0, 53), (54, 100), (101, 360), (361, 649), (650, 1249), (1250, 2049)]),
+                          _ppb('NO2'), decimals=0)],
+        },
+    },
+    # HJ 633-2012 (IAQI harian), µg/m³ kecuali CO dalam mg/m³
+    'China HJ 633': {
+        'name': 'AQI China (HJ 633-2012)',
+        'levels': [50, 100, 150, 200, 300],
+        'labels': ['Baik', 'Sedang', 'Tercemar Ringan', 'Tercemar Sedang', 'Tercemar Berat', 'Tercemar Parah'],
+        'severe': ['Tercemar Berat', 'Tercemar Parah'],
+        'pollutants': {
+            'SO2': [_spec(24, _segments([0, 50, 150, 475, 800, 1600, 2100, 2620], CHINA_INDEX))],
+            'NO2': [_spec(24, _segments([0, 40, 80, 180, 280, 565, 750, 940], CHINA_INDEX))],
+            'PM10': [_spec(24, _segments([0, 50, 150, 250, 350, 420, 500, 600], CHINA_INDEX))],
+            'CO': [_spec(24, _segments([0, 2, 4, 14, 24, 36, 48, 60], CHINA_INDEX), 1 / 1000)],
+            # O3 8 jam sampai 800 µg/m³ (IAQI 300), di atasnya IAQI dari O3 1 jam
+            'O3': [
+                _spec(8, _segments([0, 100, 160, 215, 265, 800], CHINA_INDEX[:6])),
+                _spec(1, _segments([800, 1000, 1200], CHINA_INDEX[5:])),
+            ],
+            'PM2.5': [_spec(24, _segments([0, 35, 75, 115, 150, 250, 350, 500], CHINA_INDEX))],
+        },
+    },
+}
+
+
+def sub_index(concentration: np.ndarray, segments: np.ndarray) -> np.ndarray:
+    # interpolasi linear per segmen: I = I_lo + (I_hi - I_lo) / (C_hi - C_lo) * (C - C_lo)
+    c_lo, c_hi, i_lo, i_hi = segments.T
+    segment = np.searchsorted(c_hi, concentration, side='left')
+    # di atas breakpoint tertinggi indeks dibatasi nilai maksimumnya
+    above = segment >= len(c_hi)
+    segment = np.minimum(segment, len(c_hi) - 1)
+    with np.errstate(invalid='ignore'):
+        inside = concentration >= c_lo[segment]
+        slope = (i_hi - i_lo)[segment] / (c_hi - c_lo)[segment]
+        index = i_lo[segment] + slope * (concentration - c_lo[segment])
+    index = np.where(above & ~np.isnan(concentration), i_hi[-1], index)
+    return np.where(inside | above, index, np.nan)
+
+
+def categorize(index: np.ndarray, standard: str) -> pd.Categorical:
+    spec = STANDARDS[standard]
+    codes = np.searchsorted(spec['levels'], index, side='left')
+    codes = np.where(np.isnan(index), -1, codes)
+    return pd.Categorical.from_codes(codes, spec['labels'], ordered=True)
+
+
+def compute(df: pd.DataFrame, standard: str = 'ISPU') -> pd.DataFrame:
+    # sub-indeks per polutan dan AQI keseluruhan (maksimum sub-indeks) untuk setiap baris per jam
+    spec = STANDARDS[standard]
+    key = rolling.hour_key(df)
+    values = df[POLLUTANT_COLS].to_numpy(dtype='float64')
+    hours = {s['hours'] for specs in spec['pollutants'].values() for s in specs}
+    averages = {h: values if h == 1 else rolling.rolling_mean(values, key, h, rolling.min_hours(h)) for h in hours}
+
+    result = {'station': df['station'].to_numpy()}
+    indices = []
+    for j, pollutant in enumerate(POLLUTANT_COLS):
+        index = np.full(len(df), np.nan)
+        for s in spec['pollutants'][pollutant]:
+            concentration = averages[s['hours']][:, j] * s['scale']
+            if s['decimals'] is not None:
+                step = 10.0 ** s['decimals']
+                concentration = np.floor(concentration * step + 1e-9) / step
+            index = np.fmax(index, sub_index(concentration, s['segments']))
+        indices.append(index)
+        result[f'aqi:{pollutant}'] = index.astype('float32')
+        result[f'category:{pollutant}'] = categorize(index, standard)
+
+    stacked = np.stack(indices, axis=1)
+    overall = np.fmax.reduce(stacked, axis=1)
+    dominant = np.argmax(np.where(np.isnan(stacked), -np.inf, stacked), axis=1)
+    result['aqi'] = overall.astype('float32')
+    result['category'] = categorize(overall, standard)
+    result['dominant'] = pd.Categorical.from_codes(np.where(np.isnan(overall), -1, dominant), POLLUTANT_COLS)
+    # tingkat QC ikut dibawa agar hasil bisa disaring seperti dataset (store.select_rows)
+    if 'qc_flag' in df.columns:
+        result['qc_flag'] = df['qc_flag'].array
+    return pd.DataFrame(result, index=df.index)
+
+
+def category_counts(frame: pd.DataFrame, pollutant: str) -> pd.Series:
+    column = f'category:{pollutant}'
+    counts = frame[column].value_counts(sort=False)
+    counts = counts[counts > 0].sort_values(ascending=False, kind='stable')
+    return counts.astype('int64').rename_axis(column).rename('count')
+
+
+def severe_counts(frame: pd.DataFrame, pollutants, standard: str) -> pd.Series:
+    severe = STANDARDS[standard]['severe']
+    flags = np.zeros(len(frame), dtype=bool)
+    for pollutant in pollutants:
+        flags |= frame[f'category:{pollutant}'].isin(severe).to_numpy()
+    counts = pd.Series(flags, index=frame['station'].to_numpy()).groupby(level=0, observed=True).sum()
+    counts = counts[counts > 0].sort_values(ascending=False, kind='stable')
+    return counts.astype('int64').rename_axis('station').rename('count')
@@ -0,0 +1,323 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+import aqi
+import charts
+import correlation
+import cube
+import density
+import qc
+import render
+import rolling
+import timeseries
+from ingest import add_categories
+from profiling import current_rss_mb
+from store import (
+    MEASUREMENT_COLS, METEOROLOGY_COLS, append_store, load_store, select_rows, station_index,
+    to_store_frame, write_manifest, write_store,
+)
+
+
+# skala 1x = ukuran dataset PRSA asli: 12 stasiun x 4 tahun data per jam (~420 ribu baris)
+BASE_STATIONS = 12
+PERIOD = ('2013-03-01 00:00', '2017-02-28 23:00')
+SCALES = [1, 10, 100]
+DATA_DIR = os.path.join(tempfile.gettempdir(), 'airq-benchmark')
+OUTPUT_PATH = 'benchmark.json'
+WIND_DIRECTIONS = ['N', 'NNE', 'NE', 'ENE', 'E', 'ESE', 'SE', 'SSE', 'S', 'SSW', 'SW', 'WSW', 'W', 'WNW', 'NW', 'NNW']
+
+# pilihan yang ditiru dari dashboard interaktif: satu tahun, separuh stasiun
+SELECTION_START = '2015-01-01'
+SELECTION_END = '2015-12-31'
+
+
+def synthetic_station(station: str, seed: int) -> pd.DataFrame:
+    # nilai acak berskema CSV PRSA dengan pola musiman/harian kasar dan ekor lognormal
+    index = pd.date_range(*PERIOD, freq='h')
+    n = len(index)
+    rng = np.random.default_rng(seed)
+    season = np.cos(2 * np.pi * (index.dayofyear.to_numpy() - 15) / 365.25)
+    diurnal = np.sin(2 * np.pi * (index.hour.to_numpy() - 9) / 24)
+
+    temp = 13 - 15 * season + 4 * diurnal + rng.normal(0, 3, n)
+    wspm = rng.gamma(2.0, 0.9, n)
+    pm25 = np.clip(rng.lognormal(4.0 + 0.3 * season - 0.15 * wspm, 0.9), 2, 999)
+    df = pd.DataFrame({
+        'year': index.year, 'month': index.month, 'day': index.day, 'hour': index.hour,
+        'PM2.5': pm25,
+        'PM10': np.clip(pm25 * (1 + rng.lognormal(-0.5, 0.4, n)), 2, 999),
+        'SO2': rng.lognormal(2.3, 1.0, n),
+        'NO2': rng.lognormal(3.7, 0.5, n),
+        'CO': rng.lognormal(7.0, 0.7, n),
+        'O3': rng.lognormal(3.6, 0.9, n),
+        'TEMP': temp,
+        'PRES': 1012 + 12 * season + rng.normal(0, 5, n),
+        'DEWP': temp - 8 - np.abs(rng.normal(0, 6, n)),
+        'RAIN': np.where(rng.random(n) < 0.04, rng.exponential(2.0, n), 0.0),
+        'wd': rng.choice(WIND_DIRECTIONS, n),
+        'WSPM': wspm,
+        'station': station,
+        # data sintetis tidak berlubang, semua baris bernilai asli
+        'qc_flag': 'asli',
+    }, index=index)
+    return add_categories(df)
+
+
+def generate(path: str, stations: int, seed: int = 0, csv: bool = False):
+    # ditulis per stasiun agar skala 100x tidak perlu dibangun utuh di memori
+    store_path = os.path.join(path, 'main.parquet')
+    csv_path = os.path.join(path, 'main.csv')
+    for i in range(stations):
+        df = to_store_frame(synthetic_station(f'S{i:04d}', seed + i))
+        append_store(df, store_path)
+        if csv:
+            df.to_csv(csv_path, mode='a', header=i == 0)
+    write_manifest({'version': 1, 'rows': stations * len(pd.date_range(*PERIOD, freq='h')), 'last': {}},
+                   os.path.join(path, 'manifest.json'))
+
+
+def dataset_path(data_dir: str, stations: int, seed: int, csv: bool) -> str:
+    path = os.path.join(data_dir, f'stations-{stations}-seed-{seed}')
+    manifest = os.path.join(path, 'manifest.json')
+    if not os.path.exists(manifest) or (csv and not os.path.exists(os.path.join(path, 'main.csv'))):
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        os.makedirs(path, exist_ok=True)
+        generate(path, stations, seed, csv)
+    return path
+
+
+def store_path(path: str, backend: str) -> str:
+    if backend == 'parquet':
+        return os.path.join(path, 'main.parquet')
+    # backend npy dibangun sekali dari store Parquet hasil generate
+    npy_path = os.path.join(path, 'main.npy')
+    if not os.path.exists(npy_path):
+        write_store(load_store(os.path.join(path, 'main.parquet')).rename_axis('datetime'), npy_path)
+    return npy_path
+
+
+def reset_peak_rss():
+    # Linux: menulis 5 ke clear_refs mereset VmHWM sehingga puncak terukur per tahap
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def peak_rss_mb() -> float:
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss dalam KB di Linux dan byte di macOS; ini puncak sejak proses mulai
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2**20
+
+
+def measure(records: list, stage: str, fn, *args, repeat: int = 1, rows: int | None = None):
+    result = None
+    times = []
+    rss_before = current_rss_mb()
+    reset_peak_rss()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        times.append(time.perf_counter() - start)
+    records.append({
+        'stage': stage,
+        'seconds': statistics.median(times),
+        'min_seconds': min(times),
+        'repeat': repeat,
+        'rows': rows,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'rss_delta_mb': round(current_rss_mb() - rss_before, 1),
+    })
+    return result
+
+
+def _render_all(grid, corr_matrix, mask, yearly, monthly, categories, severe, exceedance):
+    # cache render dikosongkan agar yang terukur adalah biaya gambar sebenarnya
+    render._memory.clear()
+    images = [
+        render.render(charts.density_grid, grid, METEOROLOGY_COLS, ['PM2.5', 'PM10']),
+        render.render(charts.heatmap, corr_matrix, mask),
+        render.render(charts.yearly_trend, yearly),
+        render.render(charts.monthly_bars, monthly, 'PM2.5', 'PM2.5'),
+        render.render(charts.monthly_bars, monthly, 'PM10', 'PM10'),
+        render.render(charts.station_bars, severe, 'Frekuensi', None, 90),
+        render.render(charts.donut, exceedance, 'Greens'),
+    ]
+    images += [render.render(charts.donut, counts, 'Reds') for counts in categories]
+    return images
+
+
+def _category_counts(cells):
+    categories = [cube.category_counts(cells, column) for column in ['air_category_pm2_5', 'air_category_pm10']]
+    return categories, cube.severe_counts(cells, ('air_category_pm2_5',)), cube.exceedance_counts(cells)
+
+
+def _resample(cells):
+    return cube.yearly_means(cells, ['PM10', 'PM2.5']), cube.monthly_means(cells, ['PM2.5', 'PM10'])
+
+
+def _timeseries(df):
+    # seluruh rentang dengan tingkat bawaan dan anggaran piksel dashboard
+    times = df.index.to_numpy()
+    return timeseries.downsample(times, df['PM2.5'].to_numpy(dtype='float64'), times.min(), times.max())
+
+
+def _corr_query(stats, selection):
+    total = correlation.select_stats(stats, **selection)
+    return correlation.correlation_matrix(total)
+
+
+def run_scale(scale: int, stations: int, data_dir: str, seed: int, repeat: int, csv: bool,
+              backend: str = 'parquet') -> dict:
+    generate_start = time.perf_counter()
+    path = dataset_path(data_dir, stations, seed, csv)
+    source = store_path(path, backend)
+    generate_seconds = time.perf_counter() - generate_start
+    records = []
+
+    if csv:
+        # jalur lama: dashboard membaca main.csv utuh
+        frame = measure(records, 'load_csv', pd.read_csv, os.path.join(path, 'main.csv'), repeat=repeat)
+        records[-1]['rows'] = len(frame)
+        del frame
+
+    # backend npy hanya memetakan file; biaya membaca halaman muncul di tahap-tahap berikutnya
+    df = measure(records, 'load_store', load_store, source, repeat=repeat)
+    records[-1]['rows'] = len(df)
+    names = df['station'].cat.categories.tolist()
+    selection = dict(start=SELECTION_START, end=SELECTION_END, stations=tuple(names[:max(1, len(names) // 2)]))
+
+    index = measure(records, 'index_build', station_index, df, repeat=repeat, rows=len(df))
+    selected = measure(records, 'filter', select_rows, df, *selection.values(), index, repeat=repeat)
+    records[-1]['rows'] = len(selected)
+
+    cells_all = measure(records, 'cube_build', cube.build_cube, df, rows=len(df))
+    stats = measure(records, 'corr_build', correlation.build_stats, df, rows=len(df))
+    corr_matrix = measure(records, 'corr_query', _corr_query, stats, selection, repeat=repeat,
+                          rows=len(selected))
+    measure(records, 'corr_raw', lambda frame: frame[MEASUREMENT_COLS].corr(), selected, repeat=repeat, rows=len(selected))
+
+    cells = cube.select_cells(cells_all, **selection)
+    yearly, monthly = measure(records, 'resample', _resample, cells, repeat=repeat, rows=len(selected))
+    categories, severe, exceedance = measure(records, 'category_counts', _category_counts, cells, repeat=repeat,
+                                             rows=len(selected))
+    measure(records, 'qc', qc.apply_qc, df, repeat=repeat, rows=len(df))
+    measure(records, 'aqi', aqi.compute, df, 'US EPA', repeat=repeat, rows=len(df))
+    measure(records, 'episodes', rolling.episodes, df, rolling.EPISODE_POLLUTANTS, rolling.EPISODE_THRESHOLD, 24,
+            repeat=repeat, rows=len(df))
+    measure(records, 'timeseries', _timeseries, df, repeat=repeat, rows=len(df))
+    grid = measure(records, 'density', density.density_grid, selected, METEOROLOGY_COLS, ['PM2.5', 'PM10'],
+                   repeat=repeat, rows=len(selected))
+    mask = np.triu(np.ones_like(corr_matrix, dtype=bool))
+    measure(records, 'render', _render_all, grid, corr_matrix, mask, yearly, monthly, categories, severe, exceedance,
+            repeat=repeat)
+
+    for record in records:
+        record.update(scale=scale, stations=stations, total_rows=len(df), backend=backend)
+    return {'scale': scale, 'stations': stations, 'backend': backend, 'rows': len(df),
+            'generate_seconds': generate_seconds, 'stages': records}
+
+
+def environment() -> dict:
+    return {
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def print_table(runs: list):
+    print(f'{"skala":>6} {"tahap":<16} {"baris":>12} {"detik":>9} {"puncak RSS MB":>14} {"delta RSS MB":>13}')
+    for run in runs:
+        if 'error' in run:
+            print(f'{run["scale"]:>5}x gagal: {run["error"]}')
+            continue
+        for r in run['stages']:
+            rows = '' if r['rows'] is None else f'{r["rows"]:,}'
+            print(f'{run["scale"]:>5}x {r["stage"]:<16} {rows:>12} {r["seconds"]:>9.3f} '
+                  f'{r["peak_rss_mb"]:>14.1f} {r["rss_delta_mb"]:>13.1f}')
+
+
+def compare(baseline_path: str, runs: list):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    old = {(r['scale'], r['stage']): r for run in baseline['runs'] for r in run.get('stages', [])}
+    print(f'\nperbandingan dengan {baseline_path} ({baseline.get("label")}):')
+    print(f'{"skala":>6} {"tahap":<16} {"lama (s)":>9} {"baru (s)":>9} {"percepatan":>11}')
+    for run in runs:
+        for r in run.get('stages', []):
+            before = old.get((r['scale'], r['stage']))
+            if before is None:
+                continue
+            speedup = before['seconds'] / r['seconds'] if r['seconds'] > 0 else float('inf')
+            print(f'{r["scale"]:>5}x {r["stage"]:<16} {before["seconds"]:>9.3f} {r["seconds"]:>9.3f} {speedup:>10.2f}x')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark tahap muat, filter, agregasi, dan render dashboard.')
+    parser.add_argument('--scales', type=int, nargs='+', default=SCALES, help='kelipatan ukuran dataset asli')
+    parser.add_argument('--stations', type=int, default=None,
+                        help='jumlah stasiun tetap (bawaan: 12 x skala, baris bertambah lewat jumlah stasiun)')
+    parser.add_argument('--repeat', type=int, default=3, help='pengulangan tahap query; median yang dilaporkan')
+    parser.add_argument('--data-dir', default=DATA_DIR, help='direktori data sintetis (dipakai ulang antar-run)')
+    parser.add_argument('--backend', choices=['parquet', 'npy'], default='parquet', help='format store yang diukur')
+    parser.add_argument('--csv', action='store_true', help='juga ukur pemuatan main.csv seperti dashboard lama')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--label', default=None, help='nama run, mis. "sebelum" atau hash commit')
+    parser.add_argument('--output', default=OUTPUT_PATH, help='file hasil JSON')
+    parser.add_argument('--compare', metavar='JSON', help='hasil run sebelumnya untuk dibandingkan')
+    args = parser.parse_args(argv)
+
+    runs = []
+    for scale in args.scales:
+        stations = args.stations or BASE_STATIONS * scale
+        # satu proses baru per skala agar puncak RSS tidak terbawa dari skala sebelumnya
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(run_scale, scale, stations, args.data_dir, args.seed, args.repeat, args.csv,
+                                     args.backend)
+            try:
+                runs.append(future.result())
+            except Exception as e:
+                runs.append({'scale': scale, 'stations': stations, 'error': f'{type(e).__name__}: {e}'})
+        print_table(runs[-1:])
+
+    result = {
+        'label': args.label,
+        'created': datetime.now(timezone.utc).isoformat(),
+        'environment': environment(),
+        'selection': {'start': SELECTION_START, 'end': SELECTION_END, 'stations': 'separuh pertama'},
+        'runs': runs,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(f'hasil ditulis ke {args.output}')
+    if args.compare:
+        compare(args.compare, runs)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+import seaborn as sns
+from matplotlib.colors import LogNorm
+from matplotlib.figure import Figure
+from matplotlib.patches import Circle
+
+
+# setiap fungsi membangun Figure sendiri (bukan pyplot), sehingga tidak ada state global
+# yang tertinggal antar-rerun dan hasilnya bisa di-cache oleh render.py
+
+MONTH_LABELS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+
+def density_grid(grid: dict, meteorology_vars, pollutants, outliers=True) -> Figure:
+    # histogram 2D dari semua baris; warna skala log agar bin yang jarang tetap terlihat
+    fig = Figure(figsize=(15, 8))
+    axes = fig.subplots(nrows=len(pollutants), ncols=len(meteorology_vars), sharey='row', squeeze=False)
+    vmax = max([1] + [int(counts.max()) for counts in grid['counts'].values()])
+    norm = LogNorm(vmin=1, vmax=max(vmax, 2))
+    mesh = None
+    for i, pol in enumerate(pollutants):
+        for j, met in enumerate(meteorology_vars):
+            ax = axes[i, j]
+            counts = np.ma.masked_equal(grid['counts'][(pol, met)], 0)
+            mesh = ax.pcolormesh(grid['edges'][met], grid['edges'][pol], counts.T, norm=norm, cmap='viridis')
+            if outliers:
+                points = grid['outliers'][(pol, met)]
+                ax.scatter(points[:, 0], points[:, 1], s=3, color='crimson', alpha=0.8, linewidths=0)
+            ax.set_xlabel("")
+            ax.set_ylabel(pol if j == 0 else "")
+            ax.set_title(met)
+    fig.suptitle('Hubungan Linear Antara PM2.5 & PM10 vs Faktor Meteorologis', fontsize=14)
+    fig.tight_layout(rect=(0, 0, 0.92, 0.97))
+    fig.colorbar(mesh, cax=fig.add_axes((0.93, 0.15, 0.012, 0.7)), label='Jumlah jam')
+    return fig
+
+
+def heatmap(corr_matrix: pd.DataFrame, mask: np.ndarray) -> Figure:
+    fig = Figure(figsize=(12, 8))
+    ax = fig.subplots()
+    sns.heatmap(corr_matrix, annot=True, cmap='coolwarm', mask=mask, ax=ax)
+    return fig
+
+
+def yearly_trend(yearly_avg: pd.DataFrame) -> Figure:
+    fig = Figure(figsize=(9, 6))
+    ax = fig.subplots()
+    # plot garis untuk PM10
+    sns.lineplot(x=yearly_avg.index, y=yearly_avg['PM10'], marker='o', color='royalblue', linewidth=2, label='PM10', ax=ax)
+    # plot garis untuk PM2.5
+    sns.lineplot(x=yearly_avg.index, y=yearly_avg['PM2.5'], marker='s', color='crimson', linewidth=2, label='PM2.5', ax=ax)
+    ax.set_xlabel('')
+    ax.set_ylabel('')
+    ax.legend(title='Polutan', loc='upper right')
+    ax.set_ylim(0, None)
+    ax.grid(True, linestyle='--', alpha=0.7)
+    return fig
+
+
+def monthly_bars(monthly_df: pd.DataFrame, pollutant: str, title: str) -> Figure:
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    colors = sns.color_palette("ch:start=.2,rot=-.3", as_cmap=True)
+    sns.barplot(data=monthly_df, x='month', y=pollutant, hue='year', palette=colors, dodge=True, ax=ax)
+    months = sorted(monthly_df['month'].unique())
+    ax.set_xticks(range(len(months)), [MONTH_LABELS[m - 1] for m in months])
+    ax.set_xlabel('')
+    ax.set_ylabel('')
+    ax.set_title(title)
+    ax.legend(loc='upper center', ncol=5, fontsize='small', columnspacing=1.0, handletextpad=0.5)
+    ax.grid(axis='y', linestyle='--', alpha=0.7)
+    return fig
+
+
+def donut(counts: pd.Series, palette: str, title=None, radius=0.40, figsize=(5, 5), fontsize=8) -> Figure:
+    fig = Figure(figsize=figsize)
+    ax = fig.subplots()
+    colors = sns.color_palette(palette, len(counts))
+    ax.pie(
+        counts, labels=counts.index, autopct='%1.1f%%', textprops={'fontsize': fontsize} if fontsize else None,
+        startangle=90, colors=colors, wedgeprops={'edgecolor': 'white', 'linewidth': 1}
+    )
+    # lingkaran putih di tengah untuk efek donut
+    ax.add_artist(Circle((0, 0), radius, fc='white'))
+    if title:
+        ax.set_title(title)
+    return fig
+
+
+def station_bars(station_count: pd.Series, ylabel='Count', title=None, rotation=45) -> Figure:
+    fig = Figure(figsize=(10, 5))
+    ax = fig.subplots()
+    ax.bar(station_count.index.astype(str), station_count.to_numpy(), color='skyblue')
+    ax.set_xlabel('')
+    ax.set_ylabel(ylabel, fontsize=12)
+    if title:
+        ax.set_title(title)
+    ax.tick_params(axis='x', labelrotation=rotation)
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment('right' if rotation < 90 else 'center')
+    return fig
+
+
+def time_series(series: dict, column: str, title=None) -> Figure:
+    # garis rata-rata hasil LTTB dan pita min/maks semua stasiun terpilih; tampilan kasar tidak punya pita
+    fig = Figure(figsize=(14, 4.5))
+    ax = fig.subplots()
+    if len(series['band_times']):
+        ax.fill_between(series['band_times'], series['low'], series['high'], step='post', color='crimson',
+                        alpha=0.15, linewidth=0, label='Min–maks')
+    ax.plot(series['times'], series['mean'], color='crimson', linewidth=1, label='Rata-rata')
+    ax.set_xlabel('')
+    ax.set_ylabel(column)
+    ax.set_ylim(0, None)
+    if title:
+        ax.set_title(title)
+    ax.legend(loc='upper right')
+    ax.grid(True, linestyle='--', alpha=0.7)
+    return fig
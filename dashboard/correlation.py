@@ -0,0 +1,327 @@
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+
+from cube import CELL_KEYS, CUBE_PATH, month_starts, period_range, period_spans, with_stations
+from store import MEASUREMENT_COLS, QC_DTYPE, atomic_write, generation_path
+
+
+CORR_PATH = os.path.join(CUBE_PATH, 'corr')
+CORR_COLS = MEASUREMENT_COLS
+STAT_NAMES = ['n', 'sx', 'sxx', 'sxy']
+GAP_NAMES = ['gap_sx', 'gap_sxx']
+LEVELS = ['daily', 'monthly']
+CHUNK_ROWS = 1 << 15
+VARIANCE_EPS = 1e-9
+
+
+# statistik cukup per sel untuk setiap pasangan kolom (i, j), hanya baris yang i dan j-nya valid:
+#   n[i, j]   jumlah baris
+#   sx[i, j]  jumlah x_i
+#   sxx[i, j] jumlah x_i^2
+#   sxy[i, j] jumlah x_i * x_j
+# semua nilai digeser dengan `shift` agar jumlah kuadrat tidak kehilangan presisi.
+# n dan sxy simetris, jadi per sel hanya segitiga atasnya (np.triu_indices) yang disimpan; n berupa cacah bulat
+# sehingga float32 tetap eksak (sel bulanan paling banyak 744 baris), penjumlahan antarsel memakai float64.
+# sx dan sxx per sel hanya disimpan per kolom (jumlah atas baris yang kolom itu valid); sel yang memuat nilai
+# hilang juga menyimpan koreksi pasangannya, gap_sx[i, j] = jumlah x_i pada baris yang i valid tetapi j hilang
+# (gap_sxx untuk x_i^2), dengan gap_rows = nomor selnya (terurut). setelah QC hampir semua sel lengkap, jadi sel
+# harian untuk seluruh riwayat tetap kecil.
+# di disk setiap tingkat dipecah per bulan (daily/2017-01.npz) seperti kubus, sehingga stream.py cukup menulis
+# bulan yang tersentuh
+
+
+def _group_starts(codes: np.ndarray) -> np.ndarray:
+    if not len(codes):
+        return np.array([], dtype='int64')
+    return np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+
+
+def _no_gaps(k: int) -> dict:
+    gaps = {name: np.zeros((0, k, k)) for name in GAP_NAMES}
+    gaps['gap_rows'] = np.array([], dtype='int64')
+    return gaps
+
+
+def _row_stats(values: np.ndarray, codes: np.ndarray, n_cells: int) -> dict:
+    order = np.argsort(codes, kind='stable')
+    values, codes = values[order], codes[order]
+    valid = ~np.isnan(values)
+    x = np.where(valid, values, 0.0)
+    v = valid.astype('float64')
+
+    k = values.shape[1]
+    upper = np.triu_indices(k)
+    stats = {
+        'n': np.zeros((n_cells, len(upper[0])), dtype='float32'), 'sx': np.zeros((n_cells, k)),
+        'sxx': np.zeros((n_cells, k)), 'sxy': np.zeros((n_cells, len(upper[0]))),
+    }
+    starts = _group_starts(codes)
+    if not len(starts):
+        return {**stats, **_no_gaps(k)}
+    incomplete = np.add.reduceat((~valid).any(axis=1), starts) > 0
+    gaps = {name: np.zeros((incomplete.sum(), k, k)) for name in GAP_NAMES}
+    gaps['gap_rows'] = codes[starts[incomplete]].astype('int64')
+    # potong per CHUNK_ROWS baris, selalu di awal grup agar reduceat tidak memecah sel
+    bounds = np.unique(starts[np.searchsorted(starts, np.arange(0, len(codes), CHUNK_ROWS))])
+    bounds = np.r_[bounds, len(codes)]
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        chunk = (starts >= lo) & (starts < hi)
+        local = starts[chunk]
+        cells = codes[local]
+        xs, vs = x[lo:hi], v[lo:hi]
+        stats['n'][cells] = np.add.reduceat(vs[:, :, None] * vs[:, None, :], local - lo)[:, upper[0], upper[1]]
+        stats['sx'][cells] = np.add.reduceat(xs, local - lo)
+        stats['sxx'][cells] = np.add.reduceat(xs * xs, local - lo)
+        stats['sxy'][cells] = np.add.reduceat(xs[:, :, None] * xs[:, None, :], local - lo)[:, upper[0], upper[1]]
+        if incomplete[chunk].any():
+            rows = np.searchsorted(gaps['gap_rows'], cells[incomplete[chunk]])
+            missing = (1.0 - vs)[:, None, :]
+            gaps['gap_sx'][rows] = np.add.reduceat(xs[:, :, None] * missing, local - lo)[incomplete[chunk]]
+            gaps['gap_sxx'][rows] = np.add.reduceat((xs * xs)[:, :, None] * missing, local - lo)[incomplete[chunk]]
+    return {**stats, **gaps}
+
+
+def _square(packed: np.ndarray, k: int) -> np.ndarray:
+    full = np.zeros((k, k))
+    upper = np.triu_indices(k)
+    full[upper] = packed
+    full.T[upper] = packed
+    return full
+
+
+def _group_keys(keys: pd.DataFrame):
+    grouped = keys.groupby(CELL_KEYS, observed=True, sort=True)
+    cells = grouped.size().index.to_frame(index=False)[['station', 'period', 'qc_flag']]
+    return grouped.ngroup().to_numpy(), cells
+
+
+def _reduce_gaps(level: dict, codes: np.ndarray) -> dict:
+    rows = codes[level['gap_rows']]
+    if not len(rows):
+        return _no_gaps(level['gap_sx'].shape[1])
+    order = np.argsort(rows, kind='stable')
+    starts = _group_starts(rows[order])
+    gaps = {name: np.add.reduceat(np.asarray(level[name])[order], starts, axis=0) for name in GAP_NAMES}
+    gaps['gap_rows'] = rows[order][starts].astype('int64')
+    return gaps
+
+
+def _reduce(level: dict, keys: pd.DataFrame) -> dict:
+    codes, cells = _group_keys(keys)
+    order = np.argsort(codes, kind='stable')
+    starts = _group_starts(codes[order])
+    reduced = {name: np.add.reduceat(np.asarray(level[name])[order], starts, axis=0) for name in STAT_NAMES}
+    reduced.update(_reduce_gaps(level, codes))
+    reduced['keys'] = cells
+    return reduced
+
+
+def _monthly(daily: dict) -> dict:
+    keys = daily['keys'].assign(period=daily['keys']['period'].dt.to_period('M').dt.start_time)
+    return _reduce(daily, keys)
+
+
+def _daily(df: pd.DataFrame, shift: np.ndarray) -> dict:
+    keys = pd.DataFrame({
+        'station': df['station'].to_numpy(), 'period': df.index.normalize(), 'qc_flag': df['qc_flag'].array,
+    })
+    codes, cells = _group_keys(keys)
+    values = df[CORR_COLS].to_numpy(dtype='float64') - shift
+    daily = _row_stats(values, codes, len(cells))
+    daily['keys'] = cells
+    return daily
+
+
+def build_stats(df: pd.DataFrame) -> dict:
+    shift = np.nan_to_num(df[CORR_COLS].mean().to_numpy(dtype='float64'))
+    daily = _daily(df, shift)
+    return {'shift': shift, 'daily': daily, 'monthly': _monthly(daily)}
+
+
+def _combine(old: dict, new: dict) -> dict:
+    # sama seperti kubus, hanya sel dari periode baru paling awal (mulai baris a) yang dijumlah ulang
+    n = len(old['keys'])
+    a = np.searchsorted(old['keys']['period'].to_numpy(), new['keys']['period'].min().to_datetime64())
+    keys = pd.concat([old['keys'].iloc[a:], new['keys']], ignore_index=True).astype({'station': str})
+    # koreksi pasangan memakai nomor sel relatif terhadap tabel yang digabung
+    g = np.searchsorted(old['gap_rows'], a)
+    joined = {name: np.concatenate([old[name][a:n], new[name]]) for name in STAT_NAMES}
+    joined.update({name: np.concatenate([old[name][g:], new[name]]) for name in GAP_NAMES})
+    joined['gap_rows'] = np.concatenate([old['gap_rows'][g:] - a, new['gap_rows'] + (n - a)])
+    tail = _reduce(joined, keys)
+    combined = {name: np.concatenate([old[name][:a], tail[name]]) for name in STAT_NAMES}
+    for name in GAP_NAMES:
+        combined[name] = np.concatenate([old[name][:g], tail[name]])
+    combined['gap_rows'] = np.concatenate([old['gap_rows'][:g], tail['gap_rows'] + a])
+    head = old['keys'].iloc[:a]
+    stations = pd.Index(old['keys']['station'].unique()).astype(str).union(tail['keys']['station'].unique())
+    stations = pd.CategoricalDtype(stations)
+    combined['keys'] = pd.concat([with_stations(head, stations), with_stations(tail['keys'], stations)],
+                                 ignore_index=True)
+    return combined
+
+
+def update_stats(stats: dict, df: pd.DataFrame) -> dict:
+    # baris baru hanya menambah sel harian/bulanan yang tersentuh, tanpa memindai riwayat; stats cukup berisi
+    # sel sejak bulan batch (load_stats(since=...)), stats lama tidak diubah
+    daily = _daily(df, stats['shift'])
+    return {
+        'shift': stats['shift'],
+        'daily': _combine(stats['daily'], daily),
+        'monthly': _combine(stats['monthly'], _monthly(daily)),
+    }
+
+
+def select_stats(stats: dict, start=None, end=None, stations=None, quality=None) -> dict:
+    # jumlah sel harian di tepi rentang dan sel bulanan di tengahnya, tanpa membaca baris store
+    periods = {level: stats[level]['keys']['period'].to_numpy() for level in LEVELS}
+    k = len(stats['shift'])
+    total = {name: np.zeros(stats['daily'][name].shape[1:]) for name in STAT_NAMES}
+    total.update({name: np.zeros((k, k)) for name in GAP_NAMES})
+    for level, lo, hi in period_spans(periods['daily'], periods['monthly'], start, end):
+        level_stats = stats[level]
+        a, b = period_range(periods[level], lo, hi) if lo < hi else (0, 0)
+        gap_rows = level_stats['gap_rows']
+        ga, gb = np.searchsorted(gap_rows, [a, b])
+        rows, gaps = slice(a, b), slice(ga, gb)
+        if stations is not None or quality is not None:
+            keys = level_stats['keys'].iloc[a:b]
+            keep = np.ones(len(keys), dtype=bool)
+            if stations is not None:
+                keep &= keys['station'].isin(stations).to_numpy()
+            if quality is not None:
+                keep &= keys['qc_flag'].isin(quality).to_numpy()
+            rows = a + np.flatnonzero(keep)
+            gaps = ga + np.flatnonzero(keep[gap_rows[ga:gb] - a])
+        for name in STAT_NAMES:
+            total[name] += level_stats[name][rows].sum(axis=0, dtype='float64')
+        for name in GAP_NAMES:
+            total[name] += level_stats[name][gaps].sum(axis=0)
+    return {
+        'n': _square(total['n'], k),
+        'sx': total['sx'][:, None] - total['gap_sx'],
+        'sxx': total['sxx'][:, None] - total['gap_sxx'],
+        'sxy': _square(total['sxy'], k),
+    }
+
+
+def correlation_matrix(total: dict, columns=CORR_COLS) -> pd.DataFrame:
+    n, sx, sxx, sxy = (total[name] for name in STAT_NAMES)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov = n * sxy - sx * sx.T
+        var = n * sxx - sx * sx
+        # kolom konstan (mis. RAIN 0 sepanjang rentang) menyisakan galat pembulatan, bukan varians
+        var = np.where(var > VARIANCE_EPS * n * sxx, var, np.nan)
+        corr = cov / np.sqrt(var * var.T)
+    corr = np.clip(corr, -1.0, 1.0)
+    diagonal = np.diag_indices_from(corr)
+    corr[diagonal] = np.where(np.isnan(corr[diagonal]), np.nan, 1.0)
+    return pd.DataFrame(corr, index=columns, columns=columns)
+
+
+def _slice(level: dict, a: int, b: int) -> dict:
+    # sel baris a:b, nomor sel koreksi pasangan ikut digeser
+    ga, gb = np.searchsorted(level['gap_rows'], [a, b])
+    part = {name: level[name][a:b] for name in STAT_NAMES}
+    part.update({name: level[name][ga:gb] for name in GAP_NAMES})
+    part['gap_rows'] = level['gap_rows'][ga:gb] - a
+    part['keys'] = level['keys'].iloc[a:b].reset_index(drop=True)
+    return part
+
+
+def stats_since(stats: dict, since) -> dict:
+    # hanya sel sejak bulan `since`, seperti yang disimpan stream.py di memori
+    first = pd.Timestamp(since).to_period('M').start_time.to_datetime64()
+    trimmed = {'shift': stats['shift']}
+    for level in LEVELS:
+        level_stats = stats[level]
+        a = np.searchsorted(level_stats['keys']['period'].to_numpy(), first)
+        trimmed[level] = _slice(level_stats, a, len(level_stats['keys']))
+    return trimmed
+
+
+def _save(path: str, values: np.ndarray):
+    with atomic_write(path) as tmp:
+        with open(tmp, 'wb') as f:
+            np.save(f, values)
+
+
+def _write_shard(path: str, level: dict):
+    keys = level['keys']
+    arrays = {name: np.asarray(level[name]) for name in STAT_NAMES + GAP_NAMES + ['gap_rows']}
+    arrays['station'] = keys['station'].astype(str).to_numpy(dtype='U')
+    arrays['period'] = keys['period'].to_numpy(dtype='datetime64[ns]')
+    arrays['qc_flag'] = keys['qc_flag'].astype(str).to_numpy(dtype='U')
+    with atomic_write(path) as tmp:
+        with open(tmp, 'wb') as f:
+            np.savez(f, **arrays)
+
+
+def write_stats(stats: dict, path: str = CORR_PATH, since=None):
+    # satu file .npz per bulan per tingkat; since: hanya bulan sejak `since` yang ditulis ulang (stream.py, di
+    # generasi baru), tanpa since semua bulan ditulis dan file bulan yang tidak ada lagi dihapus
+    os.makedirs(path, exist_ok=True)
+    if since is None:
+        _save(os.path.join(path, 'shift.npy'), stats['shift'])
+    first = None if since is None else pd.Timestamp(since).to_period('M').start_time.to_datetime64()
+    for level in LEVELS:
+        directory = os.path.join(path, level)
+        os.makedirs(directory, exist_ok=True)
+        level_stats = stats[level]
+        periods = level_stats['keys']['period'].to_numpy()
+        a = 0 if first is None else np.searchsorted(periods, first)
+        bounds = np.r_[a + month_starts(periods[a:]), len(periods)] if a < len(periods) else []
+        written = set()
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            name = f'{pd.Timestamp(periods[lo]):%Y-%m}.npz'
+            _write_shard(os.path.join(directory, name), _slice(level_stats, lo, hi))
+            written.add(name)
+        if since is None:
+            for stale in set(os.listdir(directory)) - written:
+                os.remove(os.path.join(directory, stale))
+
+
+def _read_shards(files: list, k: int) -> dict:
+    shards = []
+    for f in files:
+        with np.load(f) as shard:
+            shards.append({name: shard[name] for name in shard.files})
+    upper = k * (k + 1) // 2
+    empty = {'n': np.zeros((0, upper), dtype='float32'), 'sx': np.zeros((0, k)), 'sxx': np.zeros((0, k)),
+             'sxy': np.zeros((0, upper)), 'gap_rows': np.array([], dtype='int64'),
+             'station': np.array([], dtype='U'), 'period': np.array([], dtype='datetime64[ns]'),
+             'qc_flag': np.array([], dtype='U'), **{name: np.zeros((0, k, k)) for name in GAP_NAMES}}
+    if not shards:
+        merged = empty
+    else:
+        # nomor sel koreksi pasangan relatif terhadap awal bulannya
+        offsets = np.cumsum([0] + [len(shard['n']) for shard in shards[:-1]])
+        for shard, offset in zip(shards, offsets):
+            shard['gap_rows'] = shard['gap_rows'] + offset
+        merged = {name: np.concatenate([shard[name] for shard in shards]) for name in empty}
+    level = {name: merged[name] for name in STAT_NAMES + GAP_NAMES + ['gap_rows']}
+    level['keys'] = pd.DataFrame({
+        'station': pd.Categorical(merged['station']), 'period': merged['period'],
+        'qc_flag': pd.Categorical(merged['qc_flag'], dtype=QC_DTYPE),
+    })
+    return level
+
+
+def load_stats(path: str = CORR_PATH, since=None) -> dict:
+    # since: hanya bulan sejak `since` (ekor yang diperbarui stream.py)
+    path = generation_path(path)
+    stats = {'shift': np.load(os.path.join(path, 'shift.npy'))}
+    k = len(stats['shift'])
+    for level in LEVELS:
+        directory = os.path.join(path, level)
+        if not os.path.isdir(directory):
+            raise ValueError(f'statistik korelasi di {path} dibuat versi sebelumnya, jalankan ulang ingest.py')
+        files = sorted(glob.glob(os.path.join(directory, '*.npz')))
+        if since is not None:
+            first = pd.Timestamp(since).to_period('M').start_time
+            files = [f for f in files if os.path.basename(f) >= f'{first:%Y-%m}']
+        stats[level] = _read_shards(files, k)
+    return stats
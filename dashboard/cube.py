@@ -0,0 +1,266 @@
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+
+import rolling
+from aqi import HOURLY_SEVERE
+from store import CATEGORY_COLS, MEASUREMENT_COLS, QC_DTYPE, atomic_write, generation_path
+
+
+CUBE_PATH = 'dashboard/cube'
+CELL_LEVELS = ['daily', 'monthly']
+# sel dipisah per tingkat QC agar dashboard bisa menyaring baris isian tanpa memindai dataset
+CELL_KEYS = ['period', 'station', 'qc_flag']
+
+SEVERE_CATEGORIES = HOURLY_SEVERE
+SEVERE_KEYS = [('air_category_pm2_5',), ('air_category_pm10',), ('air_category_pm2_5', 'air_category_pm10')]
+EXCEEDANCE_THRESHOLD = 35
+
+
+def severe_column(columns) -> str:
+    return 'severe:' + '|'.join(columns)
+
+
+def build_daily(df: pd.DataFrame) -> pd.DataFrame:
+    # satu sel per stasiun per hari per tingkat QC: jumlah, cacah, dan histogram kategori
+    # semua kolom sel berupa jumlah per baris, jadi cukup satu groupby atas tabel lebar (batch kecil stream.py
+    # didominasi biaya tetap groupby)
+    keys = [df['station'].rename('station'), df.index.normalize().rename('period'), df['qc_flag']]
+    measurements = df[MEASUREMENT_COLS].astype('float64')
+    parts = [
+        measurements.add_prefix('sum:'),
+        measurements.notna().astype('int64').add_prefix('count:'),
+        pd.Series(1, index=df.index, name='rows'),
+    ]
+
+    for col in CATEGORY_COLS:
+        parts.append(pd.get_dummies(df[col], prefix=col, prefix_sep=':', dtype='int32'))
+
+    flags = pd.DataFrame(index=df.index)
+    for columns in SEVERE_KEYS:
+        flags[severe_column(columns)] = df[list(columns)].isin(SEVERE_CATEGORIES).any(axis=1)
+    exceed = (df['PM2.5'] > EXCEEDANCE_THRESHOLD) & (df['PM10'] > EXCEEDANCE_THRESHOLD)
+    for label in df['time_category'].cat.categories:
+        flags[f'exceed:{label}'] = exceed & (df['time_category'] == label)
+    parts.append(flags.astype('int32'))
+
+    daily = pd.concat(parts, axis=1).groupby(keys, observed=True).sum().reset_index()
+    return daily.sort_values(CELL_KEYS, kind='stable').reset_index(drop=True)
+
+
+def build_monthly(daily: pd.DataFrame) -> pd.DataFrame:
+    month = daily['period'].dt.to_period('M').dt.start_time.rename('period')
+    values = daily.drop(columns=CELL_KEYS)
+    monthly = values.groupby([daily['station'], month, daily['qc_flag']], observed=True).sum().reset_index()
+    return monthly.sort_values(CELL_KEYS, kind='stable').reset_index(drop=True)
+
+
+def build_cube(df: pd.DataFrame) -> dict:
+    daily = build_daily(df)
+    # episode bawaan (PM2.5 & PM10 > 35 per jam) ikut disimpan dan diperpanjang oleh stream.py
+    return {'daily': daily, 'monthly': build_monthly(daily), 'episodes': rolling.episodes(df)}
+
+
+def _combine(old: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+    # sel baru hampir selalu di ujung, hanya ekor yang periodenya tersentuh dijumlah ulang
+    a = np.searchsorted(old['period'].to_numpy(), new['period'].min().to_datetime64())
+    stations = pd.CategoricalDtype(old['station'].cat.categories.union(new['station'].unique()))
+    # astype per kolom mahal untuk tabel lebar, kolom stasiun hanya diganti bila kategorinya berbeda
+    parts = [with_stations(part, stations) for part in (old.iloc[:a], old.iloc[a:], new)]
+    tail = pd.concat([p for p in parts[1:] if len(p)], ignore_index=True)
+    tail = tail.groupby(CELL_KEYS, observed=True, sort=True).sum().reset_index()
+    return pd.concat([parts[0], tail[old.columns]], ignore_index=True)
+
+
+def with_stations(cells: pd.DataFrame, stations: pd.CategoricalDtype) -> pd.DataFrame:
+    if cells['station'].dtype == stations:
+        return cells
+    return cells.assign(station=cells['station'].astype(str).astype(stations))
+
+
+def update_cube(cube: dict, df: pd.DataFrame) -> dict:
+    daily = build_daily(df)
+    updated = {
+        'daily': _combine(cube['daily'], daily),
+        'monthly': _combine(cube['monthly'], build_monthly(daily)),
+    }
+    if 'episodes' in cube:
+        # episode terakhir tiap stasiun disambung bila batch baru melanjutkannya
+        updated['episodes'] = rolling.extend_episodes(cube['episodes'], df)
+    return updated
+
+
+def month_starts(periods: np.ndarray) -> np.ndarray:
+    months = periods.astype('datetime64[M]')
+    return np.flatnonzero(np.r_[True, months[1:] != months[:-1]])
+
+
+def _write_months(cells: pd.DataFrame, directory: str, first=None) -> set:
+    periods = cells['period'].to_numpy()
+    a = 0 if first is None else np.searchsorted(periods, first.to_datetime64())
+    bounds = np.r_[a + month_starts(periods[a:]), len(cells)] if a < len(cells) else []
+    written = set()
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        name = f'{pd.Timestamp(periods[lo]):%Y-%m}.parquet'
+        with atomic_write(os.path.join(directory, name)) as tmp:
+            cells.iloc[lo:hi].to_parquet(tmp, index=False)
+        written.add(name)
+    return written
+
+
+def write_cube(cube: dict, path: str = CUBE_PATH, since=None):
+    # satu file per bulan per tingkat (daily/2017-01.parquet), sehingga stream.py cukup menulis ulang bulan yang
+    # tersentuh (since); tanpa since semua bulan ditulis dan file bulan yang tidak ada lagi dihapus
+    os.makedirs(path, exist_ok=True)
+    first = None if since is None else pd.Timestamp(since).to_period('M').start_time
+    for level in CELL_LEVELS:
+        directory = os.path.join(path, level)
+        legacy = os.path.join(path, f'{level}.parquet')
+        # kubus versi lama berupa satu file per tingkat, dipecah per bulan sekali
+        if first is not None and os.path.exists(legacy) and not os.path.isdir(directory):
+            os.makedirs(directory)
+            _write_months(pd.read_parquet(legacy), directory)
+        os.makedirs(directory, exist_ok=True)
+        written = _write_months(cube[level], directory, first)
+        if first is None:
+            for stale in set(os.listdir(directory)) - written:
+                os.remove(os.path.join(directory, stale))
+        if os.path.exists(legacy):
+            os.remove(legacy)
+    if 'episodes' in cube:
+        with atomic_write(os.path.join(path, 'episodes.parquet')) as tmp:
+            cube['episodes'].to_parquet(tmp, index=False)
+
+
+def _read_level(path: str, level: str, since=None) -> pd.DataFrame:
+    directory = os.path.join(path, level)
+    if not os.path.isdir(directory):
+        return pd.read_parquet(os.path.join(path, f'{level}.parquet'))
+    files = sorted(glob.glob(os.path.join(directory, '*.parquet')))
+    if since is not None:
+        first = pd.Timestamp(since).to_period('M').start_time
+        # bulan terakhir tetap dibaca agar kolomnya diketahui walaupun belum ada sel sejak `since`
+        files = [f for f in files if os.path.basename(f) >= f'{first:%Y-%m}'] or files[-1:]
+    cells = pd.concat([pd.read_parquet(f) for f in files], ignore_index=True)
+    cells = cells.astype({'station': 'category'})
+    if since is not None:
+        cells = cells[cells['period'] >= first].reset_index(drop=True)
+    return cells
+
+
+def load_cube(path: str = CUBE_PATH, since=None) -> dict:
+    # since: hanya sel sejak bulan itu (ekor yang diperbarui stream.py), episode selalu dibaca utuh
+    path = generation_path(path)
+    cube = {level: _read_level(path, level, since) for level in CELL_LEVELS}
+    if any('qc_flag' not in cells.columns for cells in cube.values()):
+        raise ValueError(f'kubus di {path} dibuat sebelum tahap QC, jalankan ulang ingest.py')
+    for cells in cube.values():
+        cells['qc_flag'] = cells['qc_flag'].astype(QC_DTYPE)
+    episodes = os.path.join(path, 'episodes.parquet')
+    # kubus dari versi sebelumnya belum punya tabel episode; api.py lalu menghitungnya dari dataset
+    if os.path.exists(episodes):
+        cube['episodes'] = pd.read_parquet(episodes)
+    return cube
+
+
+def period_range(periods: np.ndarray, lo, hi):
+    # sel terurut berdasarkan period, cukup cari batas potongannya
+    a, b = np.searchsorted(periods, [np.datetime64(lo), np.datetime64(hi)])
+    return a, b
+
+
+def period_spans(daily_periods: np.ndarray, monthly_periods: np.ndarray, start=None, end=None) -> list:
+    # tingkat harian boleh lebih pendek dari bulanan (statistik korelasi), rentang bawaan mengikuti keduanya
+    earliest = np.concatenate([daily_periods[:1], monthly_periods[:1]]).min()
+    first = pd.Timestamp(start).normalize() if start is not None else pd.Timestamp(earliest)
+    stop = pd.Timestamp(end).normalize() if end is not None else pd.Timestamp(daily_periods[-1])
+    stop += pd.Timedelta(days=1)
+
+    # bulan penuh diambil dari tingkat bulanan, sisa hari di tepi dari tingkat harian
+    first_month = first if first.day == 1 else first + pd.offsets.MonthBegin(1)
+    last_month = stop if stop.day == 1 else stop - pd.offsets.MonthBegin(1)
+    if first_month < last_month:
+        return [('daily', first, first_month), ('monthly', first_month, last_month), ('daily', last_month, stop)]
+    return [('daily', first, stop)]
+
+
+def cell_ranges(daily_periods: np.ndarray, monthly_periods: np.ndarray, start=None, end=None) -> list:
+    periods = {'daily': daily_periods, 'monthly': monthly_periods}
+    return [(level, *period_range(periods[level], lo, hi))
+            for level, lo, hi in period_spans(daily_periods, monthly_periods, start, end)]
+
+
+def _filter_cells(cells: pd.DataFrame, stations=None, quality=None) -> pd.DataFrame:
+    if stations is not None:
+        cells = cells[cells['station'].isin(stations)]
+    if quality is not None:
+        cells = cells[cells['qc_flag'].isin(quality)]
+    return cells
+
+
+def select_cells(cube: dict, start=None, end=None, stations=None, quality=None) -> pd.DataFrame:
+    periods = {level: cube[level]['period'].to_numpy() for level in CELL_LEVELS}
+    ranges = cell_ranges(periods['daily'], periods['monthly'], start, end)
+    cells = pd.concat([cube[level].iloc[a:b] for level, a, b in ranges], ignore_index=True)
+    return _filter_cells(cells, stations, quality)
+
+
+def select_daily(cube: dict, start=None, end=None, stations=None, quality=None) -> pd.DataFrame:
+    # hanya tingkat harian, untuk deret waktu yang butuh titik per hari di seluruh rentang
+    periods = cube['daily']['period'].to_numpy()
+    first = pd.Timestamp(start).normalize() if start is not None else pd.Timestamp(periods[0])
+    stop = (pd.Timestamp(end).normalize() if end is not None else pd.Timestamp(periods[-1])) + pd.Timedelta(days=1)
+    a, b = period_range(periods, first, stop)
+    return _filter_cells(cube['daily'].iloc[a:b], stations, quality)
+
+
+def _divide(sums, counts) -> np.ndarray:
+    # seleksi kosong (atau kolom tanpa nilai valid) memberi NaN tanpa RuntimeWarning pembagian nol
+    sums, counts = np.asarray(sums, dtype='float64'), np.asarray(counts, dtype='float64')
+    return np.divide(sums, counts, out=np.full(np.broadcast(sums, counts).shape, np.nan), where=counts > 0)
+
+
+def metrics(cells: pd.DataFrame):
+    total_station = cells.loc[cells['rows'] > 0, 'station'].nunique()
+    total = cells[['sum:PM10', 'count:PM10', 'sum:PM2.5', 'count:PM2.5']].sum()
+    means = _divide(total[['sum:PM10', 'sum:PM2.5']], total[['count:PM10', 'count:PM2.5']])
+    return total_station, means[0], means[1]
+
+
+def _means(grouped, columns) -> pd.DataFrame:
+    sums = grouped[[f'sum:{c}' for c in columns]].sum()
+    counts = grouped[[f'count:{c}' for c in columns]].sum()
+    return pd.DataFrame(_divide(sums, counts), index=sums.index, columns=columns)
+
+
+def yearly_means(cells: pd.DataFrame, columns) -> pd.DataFrame:
+    return _means(cells.groupby(cells['period'].dt.year.rename(None)), columns)
+
+
+def monthly_means(cells: pd.DataFrame, columns) -> pd.DataFrame:
+    keys = [cells['period'].dt.year.rename('year'), cells['period'].dt.month.rename('month')]
+    return _means(cells.groupby(keys), columns).reset_index()
+
+
+def _counts(cells: pd.DataFrame, prefix: str) -> pd.Series:
+    columns = [c for c in cells.columns if c.startswith(prefix)]
+    counts = cells[columns].sum()
+    counts.index = [c[len(prefix):] for c in columns]
+    counts = counts[counts > 0].sort_values(ascending=False, kind='stable')
+    return counts.astype('int64')
+
+
+def category_counts(cells: pd.DataFrame, column: str) -> pd.Series:
+    return _counts(cells, f'{column}:').rename_axis(column).rename('count')
+
+
+def exceedance_counts(cells: pd.DataFrame) -> pd.Series:
+    return _counts(cells, 'exceed:').rename_axis('time_category').rename('count')
+
+
+def severe_counts(cells: pd.DataFrame, columns) -> pd.Series:
+    counts = cells.groupby('station', observed=True)[severe_column(columns)].sum()
+    counts = counts[counts > 0].sort_values(ascending=False, kind='stable')
+    return counts.astype('int64').rename('count')
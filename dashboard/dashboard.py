@@ -1,68 +1,47 @@
-import pandas as pd
-import matplotlib.pyplot as plt
 import seaborn as sns
-import numpy as np
 import streamlit as st
 
+import charts
+import profiling
+from data import (
+    AQI_STANDARDS, category_counts, create_heatmap, create_metrics, create_monthly_trend,
+    create_scatter_plot, create_yearly_trend, episode_durations, exceedance_time_counts, longest_episodes,
+    severe_counts, standard_label, watch_updates,
+)
+from render import show
+from rolling import EPISODE_WINDOWS
+
 
+profile = profiling.start('dashboard')
 sns.set(style='dark')
-df = pd.read_csv('dashboard/main.csv', index_col=0, parse_dates=True)
-df.index = pd.to_datetime(df.index)
-
-def create_heatmap(df: pd.DataFrame, numeric_cols):
-    corr_matrix = df[numeric_cols[4:]].corr()
-    mask = np.triu(np.ones_like(corr_matrix, dtype=bool))
-    return corr_matrix, mask
-
-def create_scatter_plot(df: pd.DataFrame):
-    selected_features = ['PM2.5', 'PM10', 'TEMP', 'PRES', 'DEWP', 'RAIN', 'WSPM']
-    sampled_df = df[selected_features].sample(n=10000, random_state=42)
-    meteorology_vars = ['TEMP', 'PRES', 'DEWP', 'RAIN', 'WSPM']
-    pollutants = ['PM2.5', 'PM10']
-    return sampled_df, meteorology_vars, pollutants
-
-def create_yearly_trend(df):
-    df_resampled1 = df[['PM10', 'PM2.5']].resample('Y').mean()
-    df_yearly_avg = df_resampled1.groupby(df_resampled1.index.year).mean()
-    return df_yearly_avg
-
-def create_monthly_trend(df):
-    df_resampled2 = df[['PM10', 'PM2.5']].resample('M').mean()
-    return df_resampled2
-    
+watch_updates()
+standard = st.sidebar.selectbox('Standar Kategori Kualitas Udara', AQI_STANDARDS, format_func=standard_label)
+# tanpa centang semua baris dipakai, termasuk nilai yang diisi atau diganti oleh tahap QC
+original_only = st.sidebar.checkbox('Hanya data asli (tanpa nilai isian QC)')
+quality = ('asli',) if original_only else None
 
+
+profile.section('Metrik')
 st.header('Analisis Kualitas Udara: Konsentrasi PM2.5 dan PM10 dalam Kurun Waktu 5 Tahun')
 st.subheader('Mengeksplor Faktor Meteorologis, Kategori Kualitas Udara, dan Pola Waktu')
 col1, col2, col3 = st.columns(3)
+total_station, avg_pm10, avg_pm25 = create_metrics(quality=quality)
 
 with col1:
-    total_station = df['station'].nunique()
     st.metric('**Total Stasiun**', value=f'{total_station} stasiun')
 
 with col2:
-    avg_pm25 = df['PM10'].mean()
-    st.metric('**Rata-Rata PM10**', value=f'{avg_pm25:.2f} µg/m³')
+    st.metric('**Rata-Rata PM10**', value=f'{avg_pm10:.2f} µg/m³')
 
 with col3:
-    avg_pm25 = df['PM2.5'].mean()
     st.metric('**Rata-Rata PM2.5**', value=f'{avg_pm25:.2f} µg/m³')
 
 
 # membuat scatter plot
-sampled_df, meteorology_var, air_pollutant = create_scatter_plot(df)
-
-fig, axes = plt.subplots(nrows=2, ncols=len(meteorology_var), figsize=(15, 8), sharey='row')
-for i, pol in enumerate(air_pollutant):
-    for j, met in enumerate(meteorology_var):
-        ax = axes[i, j]
-        sns.scatterplot(data=sampled_df, x=met, y=pol, alpha=0.3, ax=ax)
-        ax.set_xlabel("")
-        ax.set_ylabel(pol if j == 0 else "")
-        ax.set_title(met)
-
-plt.suptitle('Hubungan Linear Antara PM2.5 & PM10 vs Faktor Meteorologis', fontsize=14, y=1.05)
-plt.tight_layout()
-st.pyplot(plt)
+profile.section('Scatter plot')
+density_grid, meteorology_var, air_pollutant = create_scatter_plot(quality=quality)
+
+show(charts.density_grid, density_grid, meteorology_var, air_pollutant)
 st.markdown("""
         PM2.5 dan PM10 menunjukkan kecenderungan korelasi linear positif dengan DEWP, di mana peningkatan titik embun berhubungan dengan meningkatnya konsentrasi partikel polutan. Scatter plot menunjukkan pola linear ini, meskipun sebagian besar nilai terkonsentrasi di bawah 400 µg/m³. Peningkatan titik embun dapat memengaruhi proses kondensasi dan adsorpsi partikel polutan di udara, sehingga berkontribusi pada konsentrasi polutan yang lebih tinggi.  
 
@@ -71,13 +50,11 @@ st.markdown("""
 
 
 # membuat heatmap 
+profile.section('Heatmap korelasi')
 st.subheader('Korelasi Antara Polutan dan Faktor Meteorologis')
-numeric_cols = df.select_dtypes(exclude='object').columns
-correlation_matrix, mask = create_heatmap(df, numeric_cols)
+correlation_matrix, mask = create_heatmap(quality=quality)
 
-plt.figure(figsize=(12, 8))
-sns.heatmap(correlation_matrix, annot=True, cmap='coolwarm', mask=mask) 
-st.pyplot(plt)
+show(charts.heatmap, correlation_matrix, mask)
 st.markdown("""
     Polutan memiliki keterkaitan yang cukup kuat satu sama lain, terutama CO yang berkorelasi tinggi dengan PM2.5 (0.77), PM10 (0.69), SO2 (0.52), dan NO2 (0.69), menunjukkan bahwa peningkatan CO berhubungan dengan peningkatan partikel polutan lainnya. Selain itu, NO2 memiliki korelasi signifikan dengan PM2.5 (0.66), PM10 (0.65), dan SO2 (0.49), mengindikasikan perannya dalam meningkatkan konsentrasi polutan. Hubungan erat juga terlihat antara PM2.5 dan PM10 (0.88), menegaskan keterkaitan tinggi antara kedua partikel tersebut.  
 
@@ -88,78 +65,27 @@ st.markdown("""
 
 
 # membuat trend rata-rata tahunan
+profile.section('Tren tahunan')
 st.subheader('Rata-Rata Tahunan Konsentrasi PM2.5 dan PM10')
-yearly_avg = create_yearly_trend(df)
-
-plt.figure(figsize=(9, 6))
-# plot garis untuk PM10
-sns.lineplot(
-    x=yearly_avg.index, 
-    y=yearly_avg['PM10'], 
-    marker='o', 
-    color='royalblue', 
-    linewidth=2,
-    label='PM10'
-)
+yearly_avg = create_yearly_trend(quality=quality)
 
-# plot garis untuk PM2.5
-sns.lineplot(
-    x=yearly_avg.index, 
-    y=yearly_avg['PM2.5'], 
-    marker='s', 
-    color='crimson', 
-    linewidth=2,
-    label='PM2.5'
-)
-plt.xlabel('')
-plt.ylabel('')
-plt.legend(title='Polutan', loc='upper right')
-plt.ylim(0, None)
-plt.grid(True, linestyle='--', alpha=0.7)
-st.pyplot(plt)
+show(charts.yearly_trend, yearly_avg)
 st.markdown("""
         Partikel polutan PM2.5 dan PM10 mengalami fluktuasi signifikan dari tahun ke tahun. Terlihat lonjakan rata-rata konsentrasi kedua polutan pada tahun 2014 dibandingkan dengan 2013, yang kemudian diikuti oleh tren penurunan hingga mencapai titik terendah pada 2016. Namun, pada 2017, terjadi peningkatan kembali dalam konsentrasi PM2.5 dan PM10, meskipun pencatatan data di tahun tersebut baru mencakup hingga bulan Februari. Hal ini dapat mengindikasikan adanya faktor musiman atau perubahan aktivitas industri dan lingkungan yang memengaruhi kadar polutan di udara.
 """)
 
 
 # membuat trend rata-rata bulanan
+profile.section('Tren bulanan')
 st.subheader('Rata-Rata Bulanan Konsentrasi PM2.5 dan PM10')
-monthly_df = create_monthly_trend(df)
+monthly_df = create_monthly_trend(quality=quality)
 col1, col2 = st.columns(2)
 # PM2.5
 with col1:
-    colors = sns.color_palette("ch:start=.2,rot=-.3", as_cmap=True)
-    plt.figure(figsize=(10, 6))
-    sns.barplot(
-        data=monthly_df[['PM2.5']], 
-        x=monthly_df.index.month, y='PM2.5', hue=monthly_df.index.year, 
-        palette=colors,  
-        dodge=True  
-    )
-    plt.xticks(ticks=range(0, 12), labels=['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'])
-    plt.xlabel('')
-    plt.ylabel('')
-    plt.title('Rata-Rata Bulanan PM2.5 (2013-2017)')
-    plt.legend(loc='upper center', ncol=5, fontsize='small', columnspacing=1.0, handletextpad=0.5)
-    plt.grid(axis='y', linestyle='--', alpha=0.7)
-    st.pyplot(plt)
+    show(charts.monthly_bars, monthly_df, 'PM2.5', 'Rata-Rata Bulanan PM2.5 (2013-2017)')
 # PM10
 with col2:
-    colors = sns.color_palette("ch:start=.2,rot=-.3", as_cmap=True)
-    plt.figure(figsize=(10, 6))
-    sns.barplot(
-        data=monthly_df[['PM10']], 
-        x=monthly_df.index.month, y='PM10', hue=monthly_df.index.year, 
-        palette=colors,  
-        dodge=True  
-    )
-    plt.xticks(ticks=range(0, 12), labels=['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'])
-    plt.xlabel('')
-    plt.ylabel('')
-    plt.title('Rata-Rata Bulanan PM10 (2013-2017)')
-    plt.legend(loc='upper center', ncol=5, fontsize='small', columnspacing=1.0, handletextpad=0.5)
-    plt.grid(axis='y', linestyle='--', alpha=0.7)
-    st.pyplot(plt)
+    show(charts.monthly_bars, monthly_df, 'PM10', 'Rata-Rata Bulanan PM10 (2013-2017)')
 
 st.markdown("""
         Rata-rata konsentrasi PM2.5 dan PM10 dalam rentang tahun 2013–2017 menunjukkan pola musiman yang serupa. Konsentrasi cenderung meningkat pada Februari hingga Maret, lalu menurun bertahap hingga Agustus. Setelah itu, terjadi peningkatan kembali mulai Oktober, dengan puncak tertinggi pada Desember. Pola ini menunjukkan adanya faktor musiman yang memengaruhi fluktuasi polusi udara, seperti perubahan cuaca, curah hujan, serta aktivitas manusia.  
@@ -168,37 +94,19 @@ st.markdown("""
 """)
 
 
+profile.section('Kategori kualitas udara')
 st.subheader('Kategori Kualitas Udara Berdasarkan PM2.5 dan PM10')
+st.caption(f'Standar: {standard_label(standard)}')
 col1, col2 = st.columns(2)
 # kategori udara berdasarkan PM2.5
 with col1:
-    air_category_counts = df['air_category_pm2_5'].value_counts()
-    colors = sns.color_palette('Reds', len(air_category_counts))
-    
-    plt.figure(figsize=(5, 5))
-    plt.pie(
-        air_category_counts, labels=air_category_counts.index, autopct='%1.1f%%', textprops={'fontsize': 8} , 
-        startangle=90, colors=colors, wedgeprops={'edgecolor': 'white', 'linewidth': 1}
-    )
-    centre_circle = plt.Circle((0, 0), 0.40, fc='white')
-    plt.gca().add_artist(centre_circle)
-    plt.title('Kategori Kualitas Udara Berdasarkan PM2.5')
-    st.pyplot(plt)
+    air_category_counts = category_counts('air_category_pm2_5', standard=standard, quality=quality)
+    show(charts.donut, air_category_counts, 'Reds', 'Kategori Kualitas Udara Berdasarkan PM2.5')
 
 # kategori udara berdasarkan PM10
 with col2:
-    air_category_counts = df['air_category_pm10'].value_counts()
-    colors = sns.color_palette('Blues', len(air_category_counts))
-    
-    plt.figure(figsize=(5, 5))
-    plt.pie(
-        air_category_counts, labels=air_category_counts.index, autopct='%1.1f%%', textprops={'fontsize': 8} ,
-        startangle=90, colors=colors, wedgeprops={'edgecolor': 'white', 'linewidth': 1}
-    )
-    centre_circle = plt.Circle((0, 0), 0.40, fc='white')
-    plt.gca().add_artist(centre_circle)
-    plt.title('Kategori Kualitas Udara Berdasarkan PM10')
-    st.pyplot(plt)
+    air_category_counts = category_counts('air_category_pm10', standard=standard, quality=quality)
+    show(charts.donut, air_category_counts, 'Blues', 'Kategori Kualitas Udara Berdasarkan PM10')
 
 st.markdown("""
         Berdasarkan hasil pencatatan selama lima tahun (2013–2017) di 12 stasiun pengukuran, kualitas udara sering kali berada pada tingkat yang tidak sehat untuk dihirup langsung, baik akibat konsentrasi PM2.5 maupun PM10.
@@ -212,16 +120,10 @@ st.markdown("""
 
 
 
-# menampilkan stasiun dengan kualitas udara terburuk
-kategori_buruk = ['Sangat Tidak Sehat', 'Berbahaya'] 
-
-filtered_df = df[
-    (df['air_category_pm2_5'].isin(kategori_buruk)) | 
-    (df['air_category_pm10'].isin(kategori_buruk))
-]
-# group by setelah filtering
-station_count = filtered_df.groupby('station').size().reset_index(name='count')
-station_count = station_count.sort_values(by='count', ascending=False).reset_index(drop=True)
+profile.section('Stasiun terburuk')
+# menampilkan stasiun dengan kualitas udara terburuk (PM2.5 atau PM10 sangat tidak sehat/berbahaya)
+station_count = severe_counts(('air_category_pm2_5', 'air_category_pm10'), standard=standard, quality=quality)
+station_count = station_count.rename_axis('station').reset_index(name='count')
 st.subheader('Frekuensi Kualitas Udara Buruk (Sangat Tidak Sehat & Berbahaya) per Stasiun')
 
 # buat layout dua kolom dengan ukuran proporsional
@@ -235,15 +137,7 @@ with col1:
 # tampilkan barchart di kolom kedua
 with col2:
     st.write('Frekuensi Kualitas Udara Sangat Tidak Sehat dan Berbahaya per Stasiun')
-    fig, ax = plt.subplots(figsize=(10, 5))
-    ax.bar(station_count['station'], station_count['count'], color='skyblue')
-    
-    # tambahkan label
-    ax.set_xlabel('')
-    ax.set_ylabel('Count', fontsize=12)
-    #ax.set_title('Jumlah Kategori Buruk per Stasiun', fontsize=14, fontweight='bold')
-    ax.set_xticklabels(station_count['station'], rotation=45, ha='right')
-    st.pyplot(fig)
+    show(charts.station_bars, station_count.set_index('station')['count'])
 
 st.markdown("""
         Stasiun yang sering mencatat kategori "sangat tidak sehat" dan "berbahaya" adalah Gucheng, Wanliu, Wanshouxigong, Aotizhongxin, dan Dongsi. Faktor geografis dan aktivitas manusia di sekitar stasiun dapat mempengaruhi tingkat polusi udara yang tercatat. Konsentrasi PM2.5 dan PM10 di stasiun-stasiun ini sering kali melebihi ambang batas kesehatan. Penyebab utama dapat berasal dari transportasi, aktivitas industri, dan kondisi atmosfer yang memperburuk penyebaran polutan.
@@ -252,24 +146,13 @@ st.markdown("""
 
 
 # waktu kualitas udara memburuk
+profile.section('Waktu memburuk')
 st.subheader('Waktu Ketika Kualitas Udara Melebihi Tidak Sehat (PM2.5 & PM10 > 35)')
-filtered_df = df[(df['PM2.5'] > 35) & (df['PM10'] > 35)]
-
 # hitung jumlah kategori waktu
-time_category_counts = filtered_df['time_category'].value_counts()
+time_category_counts = exceedance_time_counts(quality=quality)
 
-colors = sns.color_palette('Greens', len(time_category_counts))
-plt.figure(figsize=(7, 7))
 # buat pie chart dengan tengah kosong untuk efek donut
-plt.pie(
-    time_category_counts, labels=time_category_counts.index, autopct='%1.1f%%',
-    startangle=90, colors=colors, wedgeprops={'edgecolor': 'white', 'linewidth': 1}
-)
-
-# menambahkan lingkaran putih di tengah untuk membuat efek donut
-centre_circle = plt.Circle((0, 0), 0.45, fc='white')
-plt.gca().add_artist(centre_circle)
-st.pyplot(plt)
+show(charts.donut, time_category_counts, 'Greens', radius=0.45, figsize=(7, 7), fontsize=None)
 st.markdown("""
         Kualitas udara yang mulai tidak baik bagi kelompok sensitif hingga mencapai kategori berbahaya lebih sering terjadi pada malam hari, diikuti oleh pagi dan siang hari. Berdasarkan output dari multivariate analysis dengan heatmap maka: 
         - Pada malam hari, kondisi atmosfer cenderung stabil dengan suhu yang lebih rendah dan kecepatan angin yang lebih lemah. Hal ini menyebabkan polutan seperti PM2.5, PM10, CO, dan NO2 terperangkap di lapisan udara yang lebih dekat ke permukaan tanah, sehingga akan meningkatkan konsentrasinya dan mempengaruhi kualitas udara.  
@@ -279,6 +162,21 @@ st.markdown("""
 
 
 
+# episode polusi: jam-jam berurutan yang melebihi ambang dihitung sebagai satu kejadian
+profile.section('Episode polusi')
+st.subheader('Episode Polusi per Stasiun (PM2.5 & PM10 > 35)')
+episode_hours = st.radio('Rata-rata bergerak', EPISODE_WINDOWS, format_func=lambda h: f'{h} jam', horizontal=True)
+episodes = longest_episodes(hours=episode_hours, quality=quality)
+col1, col2 = st.columns([1, 2])
+with col1:
+    st.metric('**Jumlah Episode**', value=f'{len(episodes):,}')
+    st.metric('**Episode Terpanjang**', value=f'{episodes["Durasi (jam)"].max() if len(episodes) else 0} jam')
+with col2:
+    show(charts.station_bars, episode_durations(hours=episode_hours, quality=quality), 'Jumlah episode', 'Sebaran Durasi Episode (jam)', 0)
+st.dataframe(episodes, hide_index=True, use_container_width=True)
+
+
+
 # kesimpulan
 st.markdown("""
         ### **Kesimpulan**
@@ -286,3 +184,4 @@ st.markdown("""
         Faktor meteorologis memiliki pengaruh signifikan terhadap polusi udara, dengan CO dan NO2 menunjukkan korelasi kuat terhadap PM2.5, PM10, dan SO2. Tekanan udara, titik embun, serta kecepatan dan arah angin juga berperan dalam penyebaran polutan. Konsentrasi PM2.5 dan PM10 mengalami fluktuasi tahunan dengan lonjakan pada 2014 dan tren menurun hingga 2016, sebelum meningkat kembali pada 2017. Secara musiman, konsentrasi polutan cenderung lebih tinggi di awal dan akhir tahun, dipengaruhi oleh curah hujan, kelembaban, dan aktivitas manusia. Kualitas udara sering kali berada dalam kategori "tidak sehat," dengan beberapa stasiun seperti Gucheng dan Wanliu mencatat tingkat polusi tertinggi akibat faktor geografis dan aktivitas industri. Polusi udara cenderung lebih buruk pada malam hari karena atmosfer lebih stabil, suhu lebih rendah, dan angin lebih lemah, menyebabkan polutan terperangkap di lapisan bawah.
 """)
 
+profile.report()
@@ -0,0 +1,168 @@
+import os
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import api
+import aqi
+import density
+import profiling
+import rolling
+import timeseries
+
+
+# batas cache agregat per fungsi; entri terlama dibuang lebih dulu
+CACHE_MAX_ENTRIES = 128
+CACHE_TTL = 60 * 60
+# seberapa sering sesi yang terbuka memeriksa data baru dari stream.py (detik)
+UPDATE_INTERVAL = 30
+# alamat layanan api.py, mis. http://127.0.0.1:8600; tanpa ini layanan yang sama dijalankan di proses ini
+API_URL = os.environ.get(api.ENV_VAR)
+
+METEOROLOGY_VARS = ['TEMP', 'PRES', 'DEWP', 'RAIN', 'WSPM']
+POLLUTANTS = ['PM2.5', 'PM10']
+# None = kategori per jam bawaan dari kubus; selain itu nama standar di aqi.STANDARDS
+AQI_STANDARDS = [None, *aqi.STANDARDS]
+# tingkat QC yang bisa dipilih; semua tingkat terpilih dikirim sebagai None (tanpa filter)
+QC_LEVELS = api.QC_LEVELS
+
+cached = st.cache_data(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL, show_spinner=False)
+
+
+@st.cache_resource(show_spinner=False)
+def client() -> api.Client:
+    return api.Client(API_URL) if API_URL else api.Client()
+
+
+def fetch(endpoint: str, **params):
+    # semua agregat dihitung (dan di-cache) oleh layanan; dashboard hanya mengambil hasilnya
+    result, rows = client().get(endpoint, **params)
+    # baris hanya tercatat saat agregat benar-benar dihitung, bukan saat diambil dari cache
+    profiling.add('rows', rows)
+    return result
+
+
+def quality_filter(levels):
+    levels = tuple(levels)
+    return None if set(levels) == set(QC_LEVELS) else levels
+
+
+def standard_label(standard) -> str:
+    return 'Kategori per jam (bawaan)' if standard is None else aqi.STANDARDS[standard]['name']
+
+
+_loaded = {'version': None}
+
+
+def refresh_if_updated() -> bool:
+    # layanan memuat ulang data sendiri saat manifest berubah, di sini cukup buang cache hasil lama
+    version = fetch('version')
+    if _loaded['version'] not in (None, version):
+        st.cache_data.clear()
+    _loaded['version'] = version
+
+    changed = st.session_state.get('data_version', version) != version
+    st.session_state['data_version'] = version
+    return changed
+
+
+@st.fragment(run_every=UPDATE_INTERVAL)
+def watch_updates():
+    if refresh_if_updated():
+        st.rerun()
+
+
+@cached
+def station_names() -> list:
+    return fetch('stations')
+
+
+@cached
+def date_bounds():
+    first, last = fetch('bounds')
+    return pd.Timestamp(first), pd.Timestamp(last)
+
+
+@cached
+def create_metrics(start=None, end=None, stations=None, quality=None):
+    metrics = fetch('metrics', start=start, end=end, stations=stations, quality=quality)
+    # rata-rata tanpa data dikirim sebagai null
+    return tuple(np.nan if metrics[k] is None else metrics[k] for k in ('total_station', 'avg_pm10', 'avg_pm25'))
+
+
+@cached
+def create_scatter_plot(bins=density.DEFAULT_BINS, start=None, end=None, stations=None, quality=None):
+    grid = fetch('density', bins=bins, start=start, end=end, stations=stations, quality=quality)
+    return grid, METEOROLOGY_VARS, POLLUTANTS
+
+
+@cached
+def create_heatmap(start=None, end=None, stations=None, quality=None):
+    corr_matrix = fetch('correlation', start=start, end=end, stations=stations, quality=quality)
+    mask = np.triu(np.ones_like(corr_matrix, dtype=bool))
+    return corr_matrix, mask
+
+
+@cached
+def create_yearly_trend(start=None, end=None, stations=None, quality=None):
+    return fetch('yearly', start=start, end=end, stations=stations, quality=quality)
+
+
+@cached
+def create_monthly_trend(start=None, end=None, stations=None, quality=None):
+    return fetch('monthly', start=start, end=end, stations=stations, quality=quality)
+
+
+@cached
+def category_counts(column, start=None, end=None, stations=None, standard=None, quality=None):
+    return fetch('categories', column=column, standard=standard, start=start, end=end, stations=stations,
+                 quality=quality)
+
+
+@cached
+def severe_counts(columns=('air_category_pm2_5',), start=None, end=None, stations=None, standard=None,
+                  quality=None):
+    return fetch('severe', columns=columns, standard=standard, start=start, end=end, stations=stations,
+                 quality=quality)
+
+
+@cached
+def exceedance_time_counts(start=None, end=None, stations=None, quality=None):
+    return fetch('exceedance', start=start, end=end, stations=stations, quality=quality)
+
+
+@cached
+def episode_table(threshold=rolling.EPISODE_THRESHOLD, hours=1, start=None, end=None, stations=None, quality=None):
+    return fetch('episodes', threshold=threshold, hours=hours, start=start, end=end, stations=stations,
+                 quality=quality)
+
+
+@cached
+def episode_durations(threshold=rolling.EPISODE_THRESHOLD, hours=1, start=None, end=None, stations=None,
+                      quality=None):
+    return fetch('durations', threshold=threshold, hours=hours, start=start, end=end, stations=stations,
+                 quality=quality)
+
+
+@cached
+def longest_episodes(threshold=rolling.EPISODE_THRESHOLD, hours=1, start=None, end=None, stations=None,
+                     quality=None):
+    table = episode_table(threshold, hours, start, end, stations, quality)
+    table = table.sort_values(['hours', 'peak:PM2.5'], ascending=False, kind='stable')
+    columns = {'station': 'Stasiun', 'start': 'Mulai', 'end': 'Selesai', 'hours': 'Durasi (jam)'}
+    for col in rolling.EPISODE_POLLUTANTS:
+        columns[f'peak:{col}'] = f'Puncak {col}'
+        columns[f'mean:{col}'] = f'Rata-Rata {col}'
+    return table[list(columns)].rename(columns=columns).reset_index(drop=True).round(1)
+
+
+@cached
+def time_series_overview(column='PM2.5', start=None, end=None, stations=None, quality=None):
+    return fetch('overview', column=column, start=start, end=end, stations=stations, quality=quality)
+
+
+@cached
+def time_series(column='PM2.5', budget=timeseries.PIXEL_BUDGET, start=None, end=None, stations=None, quality=None):
+    return fetch('timeseries', column=column, budget=budget, start=start, end=end, stations=stations,
+                 quality=quality)
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+
+# resolusi grid (jumlah bin per sumbu) yang bisa dipilih di dashboard
+RESOLUTIONS = [50, 100, 200]
+DEFAULT_BINS = 100
+# baris di bin yang isinya paling banyak sekian digambar sebagai titik (ekor distribusi),
+# jumlah titiknya dibatasi bins^2 * OUTLIER_MAX_COUNT berapa pun banyaknya baris
+OUTLIER_MAX_COUNT = 1
+
+
+def bin_edges(values: np.ndarray, bins: int) -> np.ndarray:
+    finite = values[np.isfinite(values)]
+    if finite.size == 0:
+        return np.linspace(0.0, 1.0, bins + 1)
+    lo, hi = finite.min(), finite.max()
+    if lo == hi:
+        hi = lo + 1.0
+    return np.linspace(lo, hi, bins + 1)
+
+
+def bin_index(values: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    # bin selebar sama, cukup diskalakan lalu dibulatkan ke bawah; NaN diberi -1
+    bins = len(edges) - 1
+    with np.errstate(invalid='ignore'):
+        scaled = (values - edges[0]) / (edges[-1] - edges[0]) * bins
+    index = np.clip(np.nan_to_num(scaled, nan=-1.0), -1, bins - 1).astype('int64')
+    return np.where(np.isnan(values), -1, index)
+
+
+def density_grid(df: pd.DataFrame, xs, ys, bins: int = DEFAULT_BINS) -> dict:
+    # histogram 2D setiap pasangan (y, x) dari semua baris; indeks bin per kolom dihitung sekali
+    columns = list(dict.fromkeys(list(xs) + list(ys)))
+    values = {c: df[c].to_numpy(dtype='float64') for c in columns}
+    edges = {c: bin_edges(values[c], bins) for c in columns}
+    index = {c: bin_index(values[c], edges[c]) for c in columns}
+
+    grid = {'bins': bins, 'edges': edges, 'counts': {}, 'outliers': {}}
+    for y in ys:
+        for x in xs:
+            valid = (index[x] >= 0) & (index[y] >= 0)
+            cell = index[x][valid] * bins + index[y][valid]
+            counts = np.bincount(cell, minlength=bins * bins)
+            sparse = counts[cell] <= OUTLIER_MAX_COUNT
+            grid['counts'][(y, x)] = counts.reshape(bins, bins)
+            grid['outliers'][(y, x)] = np.column_stack([values[x][valid][sparse], values[y][valid][sparse]])
+    return grid
@@ -0,0 +1,141 @@
+import argparse
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import qc
+from aqi import HOURLY_BINS, HOURLY_LABELS
+from correlation import build_stats, write_stats
+from cube import CUBE_PATH, build_cube, write_cube
+from store import (
+    COLUMNS, MANIFEST_PATH, NPY_SUFFIX, STORE_PATH,
+    new_generation, prune_generations, read_manifest, sort_by_station, to_store_frame, write_manifest, write_store,
+)
+
+
+RAW_DIR = 'PRSA_Data_20130301-20170228'
+RAW_PATTERN = 'PRSA_Data_*_20130301-20170228.csv'
+OUTPUT_PATH = STORE_PATH
+
+TIME_CATEGORY_LABELS = ['Pagi', 'Siang', 'Malam']
+
+
+def categorize_air(values: pd.Series) -> pd.Series:
+    # kategori per jam bawaan; indeks standar (ISPU, US EPA, HJ 633) dihitung terpisah oleh aqi.py
+    return pd.cut(values, bins=HOURLY_BINS, labels=HOURLY_LABELS)
+
+
+def categorize_time(hours: pd.Series) -> pd.Series:
+    # pagi 06-11, siang 12-17, malam 18-05
+    conditions = [
+        (hours >= 6) & (hours < 12),
+        (hours >= 12) & (hours < 18),
+    ]
+    labels = np.select(conditions, TIME_CATEGORY_LABELS[:2], default=TIME_CATEGORY_LABELS[2])
+    return pd.Series(pd.Categorical(labels, categories=TIME_CATEGORY_LABELS), index=hours.index)
+
+
+def fill_gaps(df: pd.DataFrame, profile=None):
+    # df terurut per (stasiun, waktu); pengukuran diperiksa dan diisi oleh qc.apply_qc untuk semua stasiun
+    # sekaligus, arah angin diisi nilai terdekat di stasiun yang sama
+    df, report, profile = qc.apply_qc(df, profile=profile)
+    wd = df['wd'].groupby(df['station'], observed=True).ffill()
+    df['wd'] = wd.groupby(df['station'], observed=True).bfill()
+    return df, report, profile
+
+
+def add_categories(df: pd.DataFrame) -> pd.DataFrame:
+    df['air_category_pm2_5'] = categorize_air(df['PM2.5'])
+    df['air_category_pm10'] = categorize_air(df['PM10'])
+    df['time_category'] = categorize_time(df['hour'])
+    return df
+
+
+def load_station(path: str) -> pd.DataFrame:
+    df = pd.read_csv(path).drop(columns='No')
+    df.index = pd.to_datetime(df[['year', 'month', 'day', 'hour']])
+    df.index.name = 'datetime'
+    return df.sort_index()
+
+
+def station_paths(raw_dir: str = RAW_DIR) -> list:
+    return sorted(glob.glob(os.path.join(raw_dir, RAW_PATTERN)))
+
+
+def build_dataset(raw_dir: str = RAW_DIR, workers: int | None = None):
+    paths = station_paths(raw_dir)
+    if not paths:
+        raise FileNotFoundError(f'tidak ada file {RAW_PATTERN} di {raw_dir}')
+
+    # setiap stasiun dibaca di proses terpisah, QC/imputasi berjalan sekali atas gabungannya karena
+    # pengisian spasial membutuhkan stasiun lain pada jam yang sama
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        frames = list(executor.map(load_station, paths))
+    df = pd.concat(frames)
+    df['station'] = df['station'].astype('category')
+    df, report, profile = fill_gaps(sort_by_station(df))
+    df = add_categories(df)
+    return df[COLUMNS], report, profile
+
+
+def write_dataset(df: pd.DataFrame, output: str = OUTPUT_PATH):
+    # .csv tetap didukung untuk kompatibilitas, selain itu Parquet/Feather
+    if output.endswith('.csv'):
+        df.to_csv(output)
+    else:
+        write_store(df, output)
+
+
+def build_manifest(df: pd.DataFrame, previous: dict) -> dict:
+    # versi selalu naik agar sesi dashboard yang terbuka memuat ulang data
+    last = df.reset_index().groupby('station', observed=True)['datetime'].max()
+    return {
+        'version': previous['version'] + 1,
+        'rows': len(df),
+        'last': {station: ts.isoformat() for station, ts in last.items()},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Membangun dataset dashboard dari data stasiun PRSA.')
+    parser.add_argument('--raw-dir', default=RAW_DIR, help='direktori berisi CSV stasiun PRSA')
+    parser.add_argument('--output', default=OUTPUT_PATH, help='lokasi hasil: direktori Parquet, direktori .npy (memory-map), file .feather, atau .csv; hanya Parquet yang dapat ditambah stream.py')
+    parser.add_argument('--cube', default=CUBE_PATH, help='direktori kubus agregat harian/bulanan')
+    parser.add_argument('--manifest', default=MANIFEST_PATH, help='lokasi manifest versi data')
+    parser.add_argument('--workers', type=int, default=None, help='jumlah proses (bawaan: jumlah core)')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    df, report, profile = build_dataset(args.raw_dir, args.workers)
+    stored = to_store_frame(df)
+    manifest = build_manifest(df, read_manifest(args.manifest))
+    version = manifest['version']
+    corr_path = os.path.join(args.cube, 'corr')
+    # store Parquet, kubus, dan statistik ditulis sebagai generasi baru yang utuh (lihat store.new_generation),
+    # pembaca versi sebelumnya tetap membaca generasinya sendiri sampai manifest dinaikkan
+    with (new_generation(args.cube, version, base=False) as cube_path,
+          new_generation(corr_path, version, base=False) as stats_path):
+        if os.path.splitext(args.output)[1] in ('.csv', '.feather', NPY_SUFFIX):
+            write_dataset(df, args.output)
+        else:
+            with new_generation(args.output, version, base=False) as store_path:
+                write_dataset(df, store_path)
+        write_cube(build_cube(stored), cube_path)
+        qc.write_profile(profile, df['station'].cat.categories, os.path.join(cube_path, qc.PROFILE_FILE))
+        write_stats(build_stats(stored), stats_path)
+    write_manifest(manifest, args.manifest)
+    for root in (args.output, args.cube, corr_path):
+        if os.path.isdir(root):
+            prune_generations(root)
+    elapsed = time.perf_counter() - start
+    print(f'{len(df):,} baris dari {df["station"].nunique()} stasiun ditulis ke {args.output} ({elapsed:.1f} detik)')
+    print('Hasil QC (jumlah nilai per kolom):')
+    print(report.to_string())
+
+
+if __name__ == '__main__':
+    main()
@@ -1,175 +1,158 @@
 import pandas as pd
-import matplotlib.pyplot as plt
 import seaborn as sns
-import numpy as np
 import streamlit as st
 
+import charts
+import profiling
+from data import (
+    AQI_STANDARDS, QC_LEVELS, category_counts, create_heatmap, create_metrics, create_monthly_trend,
+    create_scatter_plot, date_bounds, episode_durations, exceedance_time_counts, longest_episodes, quality_filter,
+    severe_counts, standard_label, station_names, time_series, time_series_overview, watch_updates,
+)
+from density import DEFAULT_BINS, RESOLUTIONS
+from render import show
+from rolling import EPISODE_THRESHOLD, EPISODE_WINDOWS
+from timeseries import LEVEL_LABELS
+
+profile = profiling.start('interactive_dashboard')
 sns.set(style='dark')
-df = pd.read_csv('dashboard/main.csv', index_col=0, parse_dates=True)
-df.index = pd.to_datetime(df.index)
+watch_updates()
+profile.section('Filter')
+stations = station_names()
 
 # Menambahkan filter interaktif
 st.sidebar.header("Filter Data")
-selected_date_range = st.sidebar.date_input("Pilih Rentang Tanggal", [df.index.min(), df.index.max()])
-selected_station = st.sidebar.multiselect("Pilih Stasiun", df['station'].unique(), df['station'].unique())
-
-# Filter dataset berdasarkan input pengguna
-filtered_df = df[(df.index >= pd.to_datetime(selected_date_range[0])) & (df.index <= pd.to_datetime(selected_date_range[1]))]
-filtered_df = filtered_df[filtered_df['station'].isin(selected_station)]
+selected_date_range = st.sidebar.date_input("Pilih Rentang Tanggal", list(date_bounds()))
+selected_station = st.sidebar.multiselect("Pilih Stasiun", stations, stations)
+# tingkat QC: nilai asli, hasil interpolasi/pengisian, atau spike (lihat qc.py)
+selected_quality = st.sidebar.multiselect("Kualitas Data", QC_LEVELS, QC_LEVELS)
+scatter_bins = st.sidebar.select_slider("Resolusi Scatter Plot (bin)", RESOLUTIONS, DEFAULT_BINS)
+show_outliers = st.sidebar.checkbox("Tampilkan Outlier", value=True)
+# ganti standar tanpa memuat ulang data; indeks dihitung sekali per standar dari dataset yang sama
+standard = st.sidebar.selectbox("Standar Kategori Kualitas Udara", AQI_STANDARDS, format_func=standard_label)
+episode_hours = st.sidebar.select_slider("Rata-Rata Bergerak Episode (jam)", EPISODE_WINDOWS, 1)
+episode_threshold = st.sidebar.number_input("Ambang Episode PM2.5 & PM10 (µg/m³)", 0, 500, EPISODE_THRESHOLD, 5)
+
+# Filter dataset berdasarkan input pengguna; semua agregat di-cache per kombinasi filter
+selection = dict(
+    start=pd.to_datetime(selected_date_range[0]),
+    end=pd.to_datetime(selected_date_range[-1]),
+    stations=tuple(selected_station),
+    quality=quality_filter(selected_quality),
+)
 
+profile.section('Metrik')
 st.header('Analisis Kualitas Udara: Konsentrasi PM2.5 dan PM10 dalam Kurun Waktu 5 Tahun')
 st.subheader('Mengeksplor Faktor Meteorologis, Kategori Kualitas Udara, dan Pola Waktu')
 col1, col2, col3 = st.columns(3)
+total_station, avg_pm10, avg_pm25 = create_metrics(**selection)
 
 with col1:
-    total_station = filtered_df['station'].nunique()
     st.metric('**Total Stasiun**', value=f'{total_station} stasiun')
 
 with col2:
-    avg_pm10 = filtered_df['PM10'].mean()
     st.metric('**Rata-Rata PM10**', value=f'{avg_pm10:.2f} µg/m³')
 
 with col3:
-    avg_pm25 = filtered_df['PM2.5'].mean()
     st.metric('**Rata-Rata PM2.5**', value=f'{avg_pm25:.2f} µg/m³')
 
 
 
+# Deret waktu: tampilan kasar dari kubus muncul lebih dulu, lalu diganti di tempat yang sama
+# oleh deret per jam/hari/minggu/bulan yang sudah diperkecil ke anggaran piksel
+profile.section('Deret waktu')
+st.subheader('Deret Waktu Konsentrasi')
+series_column = st.radio('Polutan', ['PM2.5', 'PM10'], horizontal=True)
+series_chart, series_caption = st.empty(), st.empty()
+overview = time_series_overview(series_column, **selection)
+with series_chart:
+    show(charts.time_series, overview, series_column)
+series_caption.caption(f'Memuat detail... (sementara: rata-rata {LEVEL_LABELS[overview["level"]]})')
+series = time_series(series_column, **selection)
+with series_chart:
+    show(charts.time_series, series, series_column)
+series_caption.caption(f'Rata-rata {LEVEL_LABELS[series["level"]]} dari {series["buckets"]:,} titik, '
+                       f'ditampilkan {len(series["times"]):,} titik dengan pita min–maks')
+
+
+
 # Membuat scatter plot
-sampled_df = filtered_df[['PM2.5', 'PM10', 'TEMP', 'PRES', 'DEWP', 'RAIN', 'WSPM']].sample(n=min(10000, len(filtered_df)), random_state=42)
-meteorology_vars = ['TEMP', 'PRES', 'DEWP', 'RAIN', 'WSPM']
-pollutants = ['PM2.5', 'PM10']
+profile.section('Scatter plot')
+density_grid, meteorology_vars, pollutants = create_scatter_plot(scatter_bins, **selection)
 
-fig, axes = plt.subplots(nrows=2, ncols=len(meteorology_vars), figsize=(15, 8), sharey='row')
-for i, pol in enumerate(pollutants):
-    for j, met in enumerate(meteorology_vars):
-        ax = axes[i, j]
-        sns.scatterplot(data=sampled_df, x=met, y=pol, alpha=0.3, ax=ax)
-        ax.set_xlabel("")
-        ax.set_ylabel(pol if j == 0 else "")
-        ax.set_title(met)
-plt.suptitle('Hubungan Linear Antara PM2.5 & PM10 vs Faktor Meteorologis', fontsize=14, y=1.05)
-plt.tight_layout()
-st.pyplot(fig)
+show(charts.density_grid, density_grid, meteorology_vars, pollutants, show_outliers)
 
 
 
 # Membuat tren bulanan
+profile.section('Tren bulanan')
 st.subheader('Rata-Rata Bulanan Konsentrasi PM2.5 dan PM10')
-def create_monthly_trend(data):
-    data['year'] = data.index.year
-    data['month'] = data.index.month
-    return data.groupby(['year', 'month'])[['PM2.5', 'PM10']].mean().reset_index()
-
-monthly_df = create_monthly_trend(filtered_df)
+monthly_df = create_monthly_trend(**selection)
 
 col1, col2 = st.columns(2)
 # PM2.5
 with col1:
-    colors = sns.color_palette("ch:start=.2,rot=-.3", as_cmap=True)
-    plt.figure(figsize=(10, 6))
-    sns.barplot(
-        data=monthly_df, 
-        x='month', y='PM2.5', hue='year', 
-        palette=colors, dodge=True  
-    )
-    plt.xticks(ticks=range(0, 12), labels=['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'])
-    plt.xlabel('')
-    plt.ylabel('')
-    plt.title('Rata-Rata Bulanan PM2.5')
-    plt.legend(loc='upper center', ncol=5, fontsize='small', columnspacing=1.0, handletextpad=0.5)
-    plt.grid(axis='y', linestyle='--', alpha=0.7)
-    st.pyplot(plt)
+    show(charts.monthly_bars, monthly_df, 'PM2.5', 'Rata-Rata Bulanan PM2.5')
 
 # PM10
 with col2:
-    colors = sns.color_palette("ch:start=.2,rot=-.3", as_cmap=True)
-    plt.figure(figsize=(10, 6))
-    sns.barplot(
-        data=monthly_df, 
-        x='month', y='PM10', hue='year', 
-        palette=colors, dodge=True  
-    )
-    plt.xticks(ticks=range(0, 12), labels=['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'])
-    plt.xlabel('')
-    plt.ylabel('')
-    plt.title('Rata-Rata Bulanan PM10')
-    plt.legend(loc='upper center', ncol=5, fontsize='small', columnspacing=1.0, handletextpad=0.5)
-    plt.grid(axis='y', linestyle='--', alpha=0.7)
-    st.pyplot(plt)
+    show(charts.monthly_bars, monthly_df, 'PM10', 'Rata-Rata Bulanan PM10')
 
 
 
 # Heatmap Konsentrasi PM2.5
+profile.section('Heatmap korelasi')
 st.subheader('Korelasi Antara Polutan dan Faktor Meteorologis')
-numeric_cols = filtered_df.select_dtypes(exclude='object').columns
-corr_matrix = filtered_df[numeric_cols[4:]].corr()
-mask = np.triu(np.ones_like(corr_matrix, dtype=bool))
-plt.figure(figsize=(12, 8))
-sns.heatmap(corr_matrix, annot=True, cmap='coolwarm', mask=mask) 
-st.pyplot(plt)
+corr_matrix, mask = create_heatmap(**selection)
+show(charts.heatmap, corr_matrix, mask)
 
 
 
 
 # Kategori kualitas udara
+profile.section('Kategori kualitas udara')
 st.subheader('Kategori Kualitas Udara Berdasarkan PM2.5 dan PM10')
+st.caption(f'Standar: {standard_label(standard)}')
 col1, col2 = st.columns(2)
 
 # Kategori udara berdasarkan PM2.5
 with col1:
-    air_category_counts = filtered_df['air_category_pm2_5'].value_counts()
-    colors = sns.color_palette('Reds', len(air_category_counts))
-    plt.figure(figsize=(5, 5))
-    plt.pie(
-        air_category_counts, labels=air_category_counts.index, autopct='%1.1f%%', textprops={'fontsize': 8} , 
-        startangle=90, colors=colors, wedgeprops={'edgecolor': 'white', 'linewidth': 1}
-    )
-    centre_circle = plt.Circle((0, 0), 0.40, fc='white')
-    plt.gca().add_artist(centre_circle)
-    plt.title('Kategori Kualitas Udara Berdasarkan PM2.5')
-    st.pyplot(plt)
+    air_category_counts = category_counts('air_category_pm2_5', **selection, standard=standard)
+    show(charts.donut, air_category_counts, 'Reds', 'Kategori Kualitas Udara Berdasarkan PM2.5')
 
 # Kategori udara berdasarkan PM10
 with col2:
-    air_category_counts = filtered_df['air_category_pm10'].value_counts()
-    colors = sns.color_palette('Blues', len(air_category_counts))
-    plt.figure(figsize=(5, 5))
-    plt.pie(
-        air_category_counts, labels=air_category_counts.index, autopct='%1.1f%%', textprops={'fontsize': 8} ,
-        startangle=90, colors=colors, wedgeprops={'edgecolor': 'white', 'linewidth': 1}
-    )
-    centre_circle = plt.Circle((0, 0), 0.40, fc='white')
-    plt.gca().add_artist(centre_circle)
-    plt.title('Kategori Kualitas Udara Berdasarkan PM10')
-    st.pyplot(plt)
+    air_category_counts = category_counts('air_category_pm10', **selection, standard=standard)
+    show(charts.donut, air_category_counts, 'Blues', 'Kategori Kualitas Udara Berdasarkan PM10')
 
 
 
 
+profile.section('Stasiun terburuk')
 # Frekuensi Kualitas Udara "Sangat Tidak Sehat" dan "Berbahaya" per Stasiun
 st.subheader("Frekuensi Kualitas Udara Sangat Tidak Sehat dan Berbahaya per Stasiun")
-severe_air_quality = filtered_df[filtered_df['air_category_pm2_5'].isin(["Sangat Tidak Sehat", "Berbahaya"])]
-station_counts = severe_air_quality['station'].value_counts()
-plt.figure(figsize=(10, 5))
-sns.barplot(x=station_counts.index, y=station_counts.values, color='skyblue')
-plt.xticks(rotation=90)
-plt.ylabel("Frekuensi")
-plt.xlabel("")
-plt.title("Frekuensi Kualitas Udara Sangat Tidak Sehat dan Berbahaya per Stasiun")
-st.pyplot(plt)
+station_counts = severe_counts(("air_category_pm2_5",), **selection, standard=standard)
+show(charts.station_bars, station_counts, "Frekuensi", "Frekuensi Kualitas Udara Sangat Tidak Sehat dan Berbahaya per Stasiun", 90)
 
 
 # Waktu kualitas udara memburuk
+profile.section('Waktu memburuk')
 st.subheader("Waktu Ketika Kualitas Udara Melebihi Tidak Sehat (PM2.5 & PM10 > 35)")
-filtered2_df = filtered_df[(filtered_df["PM2.5"] > 35) & (filtered_df["PM10"] > 35)]
-time_category_counts = filtered2_df["time_category"].value_counts()
-colors = sns.color_palette("Greens", len(time_category_counts))
-plt.figure(figsize=(7, 7))
-plt.pie(
-    time_category_counts, labels=time_category_counts.index, autopct='%1.1f%%',
-    startangle=90, colors=colors, wedgeprops={"edgecolor": "white", "linewidth": 1}
-)
-centre_circle = plt.Circle((0, 0), 0.45, fc="white")
-plt.gca().add_artist(centre_circle)
-st.pyplot(plt)
\ No newline at end of file
+time_category_counts = exceedance_time_counts(**selection)
+show(charts.donut, time_category_counts, "Greens", radius=0.45, figsize=(7, 7), fontsize=None)
+
+
+# Episode polusi: jam berurutan di atas ambang dihitung sebagai satu kejadian
+profile.section('Episode polusi')
+st.subheader(f"Episode Polusi (PM2.5 & PM10 > {episode_threshold}, rata-rata {episode_hours} jam)")
+episodes = longest_episodes(episode_threshold, episode_hours, **selection)
+col1, col2 = st.columns([1, 2])
+with col1:
+    st.metric('**Jumlah Episode**', value=f'{len(episodes):,}')
+    st.metric('**Episode Terpanjang**', value=f'{episodes["Durasi (jam)"].max() if len(episodes) else 0} jam')
+with col2:
+    show(charts.station_bars, episode_durations(episode_threshold, episode_hours, **selection),
+         "Jumlah episode", "Sebaran Durasi Episode (jam)", 0)
+st.dataframe(episodes, hide_index=True, use_container_width=True)
+
+profile.report()
@@ -0,0 +1,121 @@
+import json
+import logging
+import os
+import threading
+import time
+
+import pandas as pd
+import streamlit as st
+
+
+# mode profil aktif bila AIRQ_PROFILE=1 atau URL dashboard berisi ?profile=1
+ENV_VAR = 'AIRQ_PROFILE'
+QUERY_PARAM = 'profile'
+TRUTHY = ('1', 'true', 'yes', 'on')
+
+logger = logging.getLogger('airq.profile')
+if not logger.handlers:
+    # satu baris JSON per event agar mudah di-grep atau dikirim ke pengumpul log
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+_local = threading.local()
+
+
+def current_rss_mb() -> float:
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError):
+        return float('nan')
+
+
+def enabled() -> bool:
+    if os.environ.get(ENV_VAR, '').lower() in TRUTHY:
+        return True
+    return st.query_params.get(QUERY_PARAM, '').lower() in TRUTHY
+
+
+class Profiler:
+    def __init__(self, script: str):
+        self.script = script
+        self.records = []
+        self.current = None
+        self.started = time.perf_counter()
+
+    def section(self, name: str):
+        # bagian baru sekaligus menutup bagian sebelumnya
+        self._close()
+        self.current = {
+            'section': name, 'rows': 0, 'render_seconds': 0.0,
+            'start': time.perf_counter(), 'rss': current_rss_mb(),
+        }
+
+    def add(self, key: str, value):
+        if self.current is not None:
+            self.current[key] += value
+
+    def _close(self):
+        if self.current is None:
+            return
+        current, self.current = self.current, None
+        record = {
+            'script': self.script,
+            'section': current['section'],
+            'seconds': round(time.perf_counter() - current['start'], 4),
+            'render_seconds': round(current['render_seconds'], 4),
+            'rows': current['rows'],
+            'rss_delta_mb': round(current_rss_mb() - current['rss'], 1),
+        }
+        self.records.append(record)
+        logger.info(json.dumps({'event': 'section', **record}))
+
+    def report(self):
+        self._close()
+        _local.profiler = None
+        total = time.perf_counter() - self.started
+        logger.info(json.dumps({
+            'event': 'run', 'script': self.script, 'seconds': round(total, 4), 'rss_mb': round(current_rss_mb(), 1),
+        }))
+
+        table = pd.DataFrame(self.records).drop(columns='script').rename(columns={
+            'section': 'Bagian', 'seconds': 'Detik', 'render_seconds': 'Render (detik)',
+            'rows': 'Baris', 'rss_delta_mb': 'Δ RSS (MB)',
+        })
+        with st.sidebar.expander('Profil Waktu per Bagian'):
+            st.dataframe(table, hide_index=True, use_container_width=True)
+            st.caption(f'Total {total:.3f} detik, RSS {current_rss_mb():.0f} MB')
+
+
+class _Disabled:
+    # dipakai saat mode profil mati; setiap panggilan hanya satu pemanggilan metode kosong
+    def section(self, name: str):
+        pass
+
+    def add(self, key: str, value):
+        pass
+
+    def report(self):
+        pass
+
+
+DISABLED = _Disabled()
+
+
+def start(script: str):
+    if not enabled():
+        _local.profiler = None
+        return DISABLED
+    profiler = Profiler(script)
+    _local.profiler = profiler
+    return profiler
+
+
+def add(key: str, value):
+    # dipanggil dari lapisan data/render; tanpa profil aktif hanya satu getattr
+    profiler = getattr(_local, 'profiler', None)
+    if profiler is not None:
+        profiler.add(key, value)
@@ -0,0 +1,203 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+import rolling
+from store import MEASUREMENT_COLS, POLLUTANT_COLS, QC_DTYPE, QC_LEVELS, atomic_write, station_index
+
+
+# tahap QC/imputasi atas semua stasiun sekaligus (dataset terurut per stasiun lalu waktu):
+#   1. spike: lonjakan terisolasi (naik lalu turun lagi, atau sebaliknya) yang jauh melebihi perubahan jam-ke-jam
+#      biasa di stasiun itu; nilainya hanya dianggap hilang bila di luar rentang jam-jam di sekitarnya dan
+#      kedua jam tetangganya ada, selain itu hanya ditandai
+#   2. celah pendek (<= MAX_INTERP_HOURS jam) diinterpolasi linear terhadap waktu di stasiun yang sama
+#   3. celah panjang diisi secara spasial: profil musiman stasiun + rata-rata anomali stasiun lain di jam itu
+#   4. sisanya diisi profil musiman (stasiun x bulan x jam)
+# qc_flag setiap baris adalah tingkat terberat dari semua kolom pengukurannya (store.QC_LEVELS)
+ORIGINAL, INTERPOLATED, SPATIAL, SEASONAL, SPIKE = range(len(QC_LEVELS))
+
+SPIKE_COLS = POLLUTANT_COLS
+SPIKE_K = 8
+# perubahan diukur dalam log(1 + x) agar skalanya ikut tingkat konsentrasi; skala = rata-rata |perubahan log|
+# SCALE_HOURS jam terakhir di stasiun yang sama, dipotong di CHANGE_CAP agar spike tidak membesarkan skalanya sendiri
+SCALE_HOURS = 24 * 7
+CHANGE_CAP = 0.5
+MIN_LOG_SCALE = 0.1
+# lonjakan minimum dalam satuan kolom agar fluktuasi kecil di konsentrasi rendah (2 -> 8 -> 2) tidak dianggap spike
+MIN_JUMP = {'PM2.5': 20.0, 'PM10': 30.0, 'SO2': 10.0, 'NO2': 20.0, 'CO': 400.0, 'O3': 20.0}
+# spike yang masih di dalam rentang nilai +-SPIKE_WINDOW // 2 jam di sekitarnya tetap memakai nilai aslinya
+SPIKE_WINDOW = 7
+
+MAX_INTERP_HOURS = 6
+MIN_NEIGHBOURS = 3
+# kolom yang tidak mungkin negatif dipotong di 0 setelah diisi
+NON_NEGATIVE = POLLUTANT_COLS + ['RAIN', 'WSPM']
+
+# profil musiman hasil ingest disimpan di direktori kubus agar batch stream.py diisi dengan profil yang sama
+PROFILE_FILE = 'qc_profile.parquet'
+PROFILE_KEYS = ['station', 'month', 'hour']
+# riwayat per stasiun yang dibutuhkan agar QC batch stream.py sama dengan QC seluruh dataset
+CONTEXT_HOURS = max(SCALE_HOURS, SPIKE_WINDOW // 2, MAX_INTERP_HOURS + 1)
+
+
+def _padded(values: np.ndarray, offsets: np.ndarray, pad: int):
+    # NaN disisipkan di antara stasiun agar jendela bergerak tidak melewati batas stasiun
+    stations = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    positions = np.arange(len(values)) + pad * (stations + 1)
+    padded = np.full((len(values) + pad * len(offsets), values.shape[1]), np.nan)
+    padded[positions] = values
+    return padded, positions
+
+
+def spike_flags(values: np.ndarray, offsets: np.ndarray, columns, k: float = SPIKE_K, hours: int = SCALE_HOURS):
+    # jam yang hanya punya satu tetangga (ujung data atau tepi celah) dinilai dari satu sisi saja, sehingga
+    # jam terbaru di stream.py langsung diperiksa tanpa menunggu jam berikutnya (lihat outside_neighbours)
+    padded, positions = _padded(values, offsets, hours)
+    logs = np.log1p(np.maximum(padded, 0.0))
+    step = np.diff(logs, axis=0, prepend=np.nan)
+    rise, fall = step[positions], -step[positions + 1]
+    change = pd.DataFrame(np.minimum(np.abs(step), CHANGE_CAP))
+    scale = np.fmax(change.rolling(hours, min_periods=hours // 4).mean().to_numpy()[positions], MIN_LOG_SCALE)
+    jump = np.fmin(np.abs(values - padded[positions - 1]), np.abs(values - padded[positions + 1]))
+    same_side = (np.sign(rise) == np.sign(fall)) | np.isnan(rise) | np.isnan(fall)
+    with np.errstate(invalid='ignore'):
+        return (same_side & (np.fmin(np.abs(rise), np.abs(fall)) > k * scale)
+                & (jump > [MIN_JUMP[c] for c in columns]))
+
+
+def outside_neighbours(values: np.ndarray, offsets: np.ndarray, window: int = SPIKE_WINDOW) -> np.ndarray:
+    # nilai di luar rentang nilai lain dalam +-window // 2 jam di stasiun yang sama; jam tanpa tetangga langsung
+    # di kedua sisi tidak pernah dianggap di luar rentang karena awal episode nyata belum bisa dibedakan
+    half = window // 2
+    padded, positions = _padded(values, offsets, half)
+    others = np.stack([padded[positions + d] for d in range(-half, half + 1) if d])
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        low, high = np.nanmin(others, axis=0), np.nanmax(others, axis=0)
+    both = ~np.isnan(padded[positions - 1]) & ~np.isnan(padded[positions + 1])
+    with np.errstate(invalid='ignore'):
+        return both & ((values > high) | (values < low))
+
+
+def interpolate_short(values: np.ndarray, hours: np.ndarray, stations: np.ndarray,
+                      max_hours: int = MAX_INTERP_HOURS) -> np.ndarray:
+    # nilai valid terakhir sebelum dan pertama sesudah setiap baris, dicari dengan akumulasi max/min indeks
+    n = len(values)
+    index = np.arange(n)[:, None]
+    valid = ~np.isnan(values)
+    before = np.maximum.accumulate(np.where(valid, index, -1), axis=0)
+    after = np.minimum.accumulate(np.where(valid, index, n)[::-1], axis=0)[::-1]
+    missing = ~valid & (before >= 0) & (after < n)
+    b, a = np.where(missing, before, 0), np.where(missing, after, 0)
+    row_stations = np.broadcast_to(stations[:, None], values.shape)
+    missing &= (stations[b] == row_stations) & (stations[a] == row_stations)
+
+    row_hours = np.broadcast_to(hours[:, None], values.shape)
+    span = hours[a] - hours[b]
+    missing &= span - 1 <= max_hours
+
+    columns = np.broadcast_to(np.arange(values.shape[1]), values.shape)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        weight = (row_hours - hours[b]) / span
+        filled = values[b, columns] + (values[a, columns] - values[b, columns]) * weight
+    return np.where(missing, filled, np.nan)
+
+
+def seasonal_profile(values: np.ndarray, stations: np.ndarray, months: np.ndarray, hours_of_day: np.ndarray,
+                     n_stations: int) -> np.ndarray:
+    # rata-rata per stasiun x bulan x jam dengan bincount, hasil berbentuk (stasiun, 12, 24, kolom)
+    cell = (stations * 12 + months - 1) * 24 + hours_of_day
+    n_cells = n_stations * 12 * 24
+    valid = ~np.isnan(values)
+    profile = np.empty((n_cells, values.shape[1]))
+    for j in range(values.shape[1]):
+        sums = np.bincount(cell[valid[:, j]], values[valid[:, j], j], minlength=n_cells)
+        counts = np.bincount(cell[valid[:, j]], minlength=n_cells)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            profile[:, j] = sums / counts
+    return profile.reshape(n_stations, 12, 24, values.shape[1])
+
+
+def spatial_fill(values: np.ndarray, expected: np.ndarray, stations: np.ndarray, hours: np.ndarray,
+                 min_neighbours: int = MIN_NEIGHBOURS) -> np.ndarray:
+    # anomali terhadap profil musiman dirata-rata antar stasiun per jam yang sama
+    times, slot = np.unique(hours, return_inverse=True)
+    anomaly = values - expected
+    valid = ~np.isnan(anomaly)
+    neighbour = np.empty(values.shape)
+    for j in range(values.shape[1]):
+        sums = np.bincount(slot[valid[:, j]], anomaly[valid[:, j], j], minlength=len(times))
+        counts = np.bincount(slot[valid[:, j]], minlength=len(times))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            neighbour[:, j] = np.where(counts >= min_neighbours, sums / counts, np.nan)[slot]
+    # baris yang hilang tidak ikut dalam rata-rata, jadi yang dirata-rata hanya stasiun lain
+    return np.where(np.isnan(values), expected + neighbour, np.nan)
+
+
+def apply_qc(df: pd.DataFrame, columns=MEASUREMENT_COLS, profile=None):
+    # df harus terurut per (stasiun, waktu) seperti hasil store.sort_by_station
+    index = station_index(df)
+    codes = df['station'].cat.codes.to_numpy().astype('int64')
+    hours = rolling.hour_key(df) - (codes << rolling.STATION_SHIFT)
+    months, hours_of_day = df.index.month.to_numpy(), df.index.hour.to_numpy()
+    values = df[columns].to_numpy(dtype='float64')
+
+    levels = np.zeros(values.shape, dtype='int8')
+    missing = np.isnan(values)
+    spike_cols = [j for j, c in enumerate(columns) if c in SPIKE_COLS]
+    spikes = np.zeros(values.shape, dtype=bool)
+    spikes[:, spike_cols] = spike_flags(values[:, spike_cols], index['offsets'], [columns[j] for j in spike_cols])
+    # hanya spike di luar rentang jam-jam sekitarnya yang diganti, sisanya ditandai dengan nilai aslinya
+    replace = np.zeros(values.shape, dtype=bool)
+    replace[:, spike_cols] = spikes[:, spike_cols] & outside_neighbours(values[:, spike_cols], index['offsets'])
+    values[replace] = np.nan
+
+    interpolated = interpolate_short(values, hours, codes)
+    step = np.isnan(values) & ~np.isnan(interpolated)
+    values[step] = interpolated[step]
+    levels[step] = INTERPOLATED
+
+    if profile is None:
+        profile = seasonal_profile(values, codes, months, hours_of_day, len(index['stations']))
+    expected = profile[codes, months - 1, hours_of_day]
+    spatial = spatial_fill(values, expected, codes, hours)
+    step = np.isnan(values) & ~np.isnan(spatial)
+    values[step] = spatial[step]
+    levels[step] = SPATIAL
+
+    step = np.isnan(values) & ~np.isnan(expected)
+    values[step] = expected[step]
+    levels[step] = SEASONAL
+    levels[spikes] = SPIKE
+
+    non_negative = [j for j, c in enumerate(columns) if c in NON_NEGATIVE]
+    values[:, non_negative] = np.maximum(values[:, non_negative], 0.0)
+
+    result = df.copy()
+    result[columns] = values
+    result['qc_flag'] = pd.Categorical.from_codes(levels.max(axis=1), dtype=QC_DTYPE)
+    report = pd.DataFrame(
+        {level: (levels == code).sum(axis=0) for code, level in enumerate(QC_LEVELS) if code != ORIGINAL},
+        index=columns,
+    )
+    report['sisa NaN'] = np.isnan(values).sum(axis=0)
+    report['hilang'] = missing.sum(axis=0)
+    return result, report, profile
+
+
+def _profile_index(stations) -> pd.MultiIndex:
+    return pd.MultiIndex.from_product([list(stations), range(1, 13), range(24)], names=PROFILE_KEYS)
+
+
+def write_profile(profile: np.ndarray, stations, path: str, columns=MEASUREMENT_COLS):
+    frame = pd.DataFrame(profile.reshape(-1, len(columns)), index=_profile_index(stations), columns=columns)
+    with atomic_write(path) as tmp:
+        frame.reset_index().to_parquet(tmp, index=False)
+
+
+def load_profile(path: str, stations, columns=MEASUREMENT_COLS) -> np.ndarray:
+    # disejajarkan dengan kategori stasiun batch; stasiun baru tidak punya profil (NaN)
+    frame = pd.read_parquet(path).astype({'station': str}).set_index(PROFILE_KEYS)
+    values = frame[columns].reindex(_profile_index(stations)).to_numpy(dtype='float64')
+    return values.reshape(len(stations), 12, 24, len(columns))
@@ -0,0 +1,164 @@
+import hashlib
+import io
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import profiling
+
+
+# gambar hasil render disimpan sebagai bytes, dikunci oleh hash data masukan dan parameter plot
+MEMORY_ITEMS = 128
+# tier disk opsional, aktif bila variabel lingkungan ini berisi direktori
+DISK_DIR = os.environ.get('AIRQ_RENDER_CACHE_DIR')
+# kunci berupa hash isi, jadi gambar dari versi data lama tidak pernah terpakai lagi; tier disk dibatasi ukurannya
+# dan file yang paling lama tidak dipakai (mtime disentuh setiap kali dibaca) dihapus lebih dulu
+DISK_MAX_BYTES = int(float(os.environ.get('AIRQ_RENDER_CACHE_MB', 512)) * 2 ** 20)
+# setelah dipangkas ukurannya turun ke fraksi ini agar tidak dipangkas lagi di setiap penulisan
+PRUNE_TARGET = 0.8
+# ukuran direktori dipindai ulang setiap sekian penulisan karena proses lain ikut menulis
+DISK_CHECK_WRITES = 64
+# file sementara dari proses yang mati di tengah penulisan
+STALE_TMP_SECONDS = 3600
+RENDER_VERSION = 1
+
+_memory = OrderedDict()
+_lock = threading.Lock()
+_disk = {'bytes': None, 'writes': 0}
+
+
+def _feed(digest, value):
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        digest.update(type(value).__name__.encode())
+        if isinstance(value, pd.DataFrame):
+            digest.update(repr(list(value.columns)).encode())
+        digest.update(pd.util.hash_pandas_object(value, index=not isinstance(value, pd.Index)).to_numpy().tobytes())
+    elif isinstance(value, np.ndarray):
+        digest.update(f'{value.dtype}{value.shape}'.encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, (list, tuple)):
+        digest.update(f'{type(value).__name__}{len(value)}'.encode())
+        for item in value:
+            _feed(digest, item)
+    elif isinstance(value, dict):
+        for key in sorted(value):
+            _feed(digest, key)
+            _feed(digest, value[key])
+    else:
+        digest.update(repr(value).encode())
+
+
+def fingerprint(*parts) -> str:
+    digest = hashlib.sha1()
+    for part in parts:
+        _feed(digest, part)
+    return digest.hexdigest()
+
+
+def _remember(key: str, image: bytes):
+    with _lock:
+        _memory[key] = image
+        _memory.move_to_end(key)
+        while len(_memory) > MEMORY_ITEMS:
+            _memory.popitem(last=False)
+
+
+def _recall(key: str):
+    with _lock:
+        image = _memory.get(key)
+        if image is not None:
+            _memory.move_to_end(key)
+            return image
+    if DISK_DIR:
+        path = os.path.join(DISK_DIR, key)
+        try:
+            with open(path, 'rb') as f:
+                image = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            # belum pernah dirender atau baru saja dipangkas proses lain
+            return None
+        _remember(key, image)
+        return image
+    return None
+
+
+def prune_disk(directory: str = None, max_bytes: int = None) -> int:
+    directory = directory or DISK_DIR
+    max_bytes = DISK_MAX_BYTES if max_bytes is None else max_bytes
+    now = time.time()
+    entries = []
+    for entry in os.scandir(directory):
+        try:
+            stat = entry.stat()
+            if '.tmp-' in entry.name:
+                if now - stat.st_mtime > STALE_TMP_SECONDS:
+                    os.remove(entry.path)
+                continue
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    if total > max_bytes:
+        for _, size, path in sorted(entries):
+            if total <= max_bytes * PRUNE_TARGET:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+    with _lock:
+        _disk['bytes'] = total
+    return removed
+
+
+def _store(key: str, image: bytes):
+    os.makedirs(DISK_DIR, exist_ok=True)
+    tmp = os.path.join(DISK_DIR, f'{key}.tmp-{os.getpid()}-{threading.get_ident()}')
+    with open(tmp, 'wb') as f:
+        f.write(image)
+    os.replace(tmp, os.path.join(DISK_DIR, key))
+    with _lock:
+        _disk['writes'] += 1
+        known = _disk['bytes']
+        if known is not None:
+            _disk['bytes'] = known + len(image)
+        check = known is None or _disk['bytes'] > DISK_MAX_BYTES or _disk['writes'] % DISK_CHECK_WRITES == 0
+    if check:
+        prune_disk()
+
+
+def cache_key(draw, *args, fmt='png', dpi=100, **kwargs) -> str:
+    return fingerprint(RENDER_VERSION, draw.__module__, draw.__qualname__, args, kwargs, fmt, dpi) + f'.{fmt}'
+
+
+def render(draw, *args, fmt='png', dpi=100, **kwargs) -> bytes:
+    key = cache_key(draw, *args, fmt=fmt, dpi=dpi, **kwargs)
+    image = _recall(key)
+    if image is not None:
+        return image
+
+    started = time.perf_counter()
+    fig = draw(*args, **kwargs)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=fmt, dpi=dpi, bbox_inches='tight')
+    image = buffer.getvalue()
+    profiling.add('render_seconds', time.perf_counter() - started)
+
+    _remember(key, image)
+    if DISK_DIR:
+        _store(key, image)
+    return image
+
+
+def show(draw, *args, **kwargs):
+    st.image(render(draw, *args, **kwargs), use_container_width=True)
@@ -0,0 +1,225 @@
+import argparse
+import html
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import Manager
+
+import matplotlib
+
+matplotlib.use('Agg')
+
+import numpy as np
+import pandas as pd
+import seaborn as sns
+
+import charts
+import correlation
+import cube
+import density
+import render
+from store import METEOROLOGY_COLS, STORE_PATH, atomic_write, load_store, select_rows, station_index
+
+
+OUTPUT_DIR = 'reports'
+IMAGE_DIR = 'images'
+POLLUTANTS = ['PM2.5', 'PM10']
+DPI = 100
+
+
+# laporan statis per stasiun per bulan tanpa Streamlit; gambar disimpan dengan nama hash masukannya
+# (render.cache_key), sehingga run ulang hanya merender gambar yang datanya berubah
+
+
+def load_inputs(store_path: str, cube_path: str, corr_path: str):
+    df = load_store(store_path)
+    cube_data = cube.load_cube(cube_path) if os.path.isdir(cube_path) else cube.build_cube(df)
+    stats = correlation.load_stats(corr_path) if os.path.isdir(corr_path) else correlation.build_stats(df)
+    return df, station_index(df), cube_data, stats
+
+
+def report_pages(cube_data: dict, stations=None, start=None, end=None) -> list:
+    monthly = cube_data['monthly']
+    monthly = monthly[monthly['rows'] > 0]
+    if stations:
+        monthly = monthly[monthly['station'].isin(stations)]
+    if start:
+        monthly = monthly[monthly['period'] >= pd.Timestamp(start)]
+    if end:
+        monthly = monthly[monthly['period'] <= pd.Timestamp(end)]
+    # sel bulanan dipisah per tingkat QC, satu halaman per pasangan stasiun-bulan
+    pages = monthly[['station', 'period']].astype({'station': str}).drop_duplicates()
+    pages = pages.sort_values(['station', 'period'])
+    return list(pages.itertuples(index=False, name=None))
+
+
+def page_charts(station: str, month: pd.Timestamp, df, index, cube_data, stats) -> tuple:
+    # masukan grafik dihitung dengan fungsi yang sama seperti api.py, hanya tanpa layanan HTTP
+    month_end = month + pd.offsets.MonthEnd(0)
+    year_start, year_end = month.replace(month=1), month.replace(month=12, day=31)
+    selection = dict(start=month, end=month_end, stations=(station,))
+
+    cells = cube.select_cells(cube_data, **selection)
+    # satu stasiun sebulan hanya ~720 jam, grid lebih kasar agar kepadatannya tetap terbaca
+    grid = density.density_grid(select_rows(df, **selection, index=index), METEOROLOGY_COLS, POLLUTANTS,
+                                density.RESOLUTIONS[0])
+    corr_matrix = correlation.correlation_matrix(correlation.select_stats(stats, **selection))
+    mask = np.triu(np.ones_like(corr_matrix, dtype=bool))
+    yearly = cube.yearly_means(cube.select_cells(cube_data, stations=(station,)), ['PM10', 'PM2.5'])
+    monthly = cube.monthly_means(cube.select_cells(cube_data, year_start, year_end, (station,)), POLLUTANTS)
+    # frekuensi kategori buruk dibandingkan dengan semua stasiun pada bulan yang sama
+    severe = cube.severe_counts(cube.select_cells(cube_data, month, month_end),
+                                ('air_category_pm2_5', 'air_category_pm10'))
+
+    name = f'{station} {month:%Y-%m}'
+    jobs = [
+        ('Faktor Meteorologis vs PM2.5 & PM10', 'density_grid', (grid, METEOROLOGY_COLS, POLLUTANTS), {}),
+        ('Korelasi Antara Polutan dan Faktor Meteorologis', 'heatmap', (corr_matrix, mask), {}),
+        ('Rata-Rata Tahunan PM2.5 dan PM10', 'yearly_trend', (yearly,), {}),
+        (f'Rata-Rata Bulanan PM2.5 {month.year}', 'monthly_bars', (monthly, 'PM2.5', f'PM2.5 {station}'), {}),
+        (f'Rata-Rata Bulanan PM10 {month.year}', 'monthly_bars', (monthly, 'PM10', f'PM10 {station}'), {}),
+        ('Kategori Kualitas Udara Berdasarkan PM2.5', 'donut',
+         (cube.category_counts(cells, 'air_category_pm2_5'), 'Reds', name), {}),
+        ('Kategori Kualitas Udara Berdasarkan PM10', 'donut',
+         (cube.category_counts(cells, 'air_category_pm10'), 'Blues', name), {}),
+        ('Frekuensi Sangat Tidak Sehat & Berbahaya per Stasiun', 'station_bars',
+         (severe, 'Frekuensi', f'Semua stasiun {month:%Y-%m}'), {}),
+        ('Waktu Ketika PM2.5 & PM10 > 35', 'donut',
+         (cube.exceedance_counts(cells), 'Greens'), dict(radius=0.45, figsize=(7, 7), fontsize=None)),
+    ]
+    total_station, avg_pm10, avg_pm25 = cube.metrics(cells)
+    metrics = {'Jam tercatat': f'{int(cells["rows"].sum()):,}', 'Rata-Rata PM10': f'{avg_pm10:.2f} µg/m³',
+               'Rata-Rata PM2.5': f'{avg_pm25:.2f} µg/m³'}
+    return metrics, jobs
+
+
+# data yang dibaca halaman di proses render, diisi sekali per proses oleh _init_worker
+_worker = {}
+
+
+def _init_worker(inputs: tuple, claims):
+    sns.set(style='dark')
+    _worker['inputs'] = inputs
+    # hash gambar yang sudah diambil salah satu proses pada run ini (dict dari multiprocessing.Manager), agar
+    # grafik yang dipakai beberapa halaman (mis. tren tahunan stasiun) hanya dirender sekali
+    _worker['claims'] = claims
+    _worker['done'] = set()
+
+
+def render_image(draw_name: str, args: tuple, kwargs: dict, path: str, dpi: int) -> str:
+    image = render.render(getattr(charts, draw_name), *args, dpi=dpi, **kwargs)
+    with atomic_write(path) as tmp:
+        with open(tmp, 'wb') as f:
+            f.write(image)
+    return path
+
+
+def page_path(station: str, month: pd.Timestamp) -> str:
+    return os.path.join(station, f'{month:%Y-%m}.html')
+
+
+def write_page(output: str, station: str, month: pd.Timestamp, metrics: dict, images: list):
+    metric_rows = ''.join(f'<li><b>{html.escape(k)}</b>: {html.escape(v)}</li>' for k, v in metrics.items())
+    figures = ''.join(
+        f'<figure><figcaption>{html.escape(title)}</figcaption><img src="../{IMAGE_DIR}/{image}" loading="lazy">'
+        f'</figure>' for title, image in images
+    )
+    content = (
+        f'<!doctype html><html lang="id"><head><meta charset="utf-8">'
+        f'<title>Kualitas Udara {html.escape(station)} {month:%Y-%m}</title>'
+        f'<style>body{{font-family:sans-serif;max-width:1100px;margin:auto}}img{{max-width:100%}}</style></head>'
+        f'<body><p><a href="../index.html">&larr; Semua laporan</a></p>'
+        f'<h1>Kualitas Udara {html.escape(station)} &mdash; {month:%Y-%m}</h1><ul>{metric_rows}</ul>{figures}'
+        f'</body></html>'
+    )
+    path = os.path.join(output, page_path(station, month))
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            if f.read() == content:
+                return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with atomic_write(path) as tmp:
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(content)
+
+
+def write_index(output: str, pages: list):
+    by_station = {}
+    for station, month in pages:
+        by_station.setdefault(station, []).append(month)
+    sections = ''.join(
+        f'<h2>{html.escape(station)}</h2><p>'
+        + ' '.join(f'<a href="{html.escape(page_path(station, m))}">{m:%Y-%m}</a>' for m in months)
+        + '</p>'
+        for station, months in by_station.items()
+    )
+    with atomic_write(os.path.join(output, 'index.html')) as tmp:
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(f'<!doctype html><html lang="id"><head><meta charset="utf-8"><title>Laporan Kualitas Udara'
+                    f'</title></head><body><h1>Laporan Kualitas Udara per Stasiun per Bulan</h1>{sections}'
+                    f'</body></html>')
+
+
+def render_page(output: str, station: str, month: pd.Timestamp, dpi: int = DPI, force=False) -> tuple:
+    # satu halaman utuh (masukan grafik, render, HTML) dikerjakan di proses render; gambar dengan hash yang sama
+    # (antar halaman maupun dari run sebelumnya) tidak dirender ulang
+    metrics, jobs = page_charts(station, month, *_worker['inputs'])
+    images = []
+    rendered = 0
+    for title, draw_name, args, kwargs in jobs:
+        image = render.cache_key(getattr(charts, draw_name), *args, dpi=dpi, **kwargs)
+        path = os.path.join(output, IMAGE_DIR, image)
+        fresh = image not in _worker['done'] and (force or not os.path.exists(path))
+        if fresh and _worker['claims'].setdefault(image, os.getpid()) == os.getpid():
+            render_image(draw_name, args, kwargs, path, dpi)
+            rendered += 1
+        _worker['done'].add(image)
+        images.append((title, image))
+    write_page(output, station, month, metrics, images)
+    return rendered, len(images)
+
+
+def generate(output: str, pages: list, df, index, cube_data, stats, workers=None, dpi: int = DPI, force=False):
+    os.makedirs(os.path.join(output, IMAGE_DIR), exist_ok=True)
+
+    # data dikirim sekali ke setiap proses lewat initializer, lalu setiap halaman menjadi satu tugas sehingga
+    # proses induk tidak lagi menghitung masukan grafik secara serial. Halaman bisa ditulis sebelum gambar bersama
+    # yang sedang dirender proses lain selesai; semuanya sudah ada saat generate kembali
+    rendered = total = 0
+    inputs = (df, index, cube_data, stats)
+    with Manager() as manager:
+        claims = manager.dict()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(inputs, claims)) as executor:
+            futures = [executor.submit(render_page, output, station, month, dpi, force) for station, month in pages]
+            for future in as_completed(futures):
+                page_rendered, page_images = future.result()
+                rendered += page_rendered
+                total += page_images
+    write_index(output, pages)
+    return rendered, total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Membuat laporan HTML/PNG per stasiun per bulan tanpa Streamlit.')
+    parser.add_argument('--output', default=OUTPUT_DIR, help='direktori laporan')
+    parser.add_argument('--store', default=STORE_PATH, help='store dataset (Parquet, .npy, atau .feather)')
+    parser.add_argument('--cube', default=cube.CUBE_PATH, help='direktori kubus agregat')
+    parser.add_argument('--station', action='append', dest='stations', help='hanya stasiun ini (boleh diulang)')
+    parser.add_argument('--start', help='bulan pertama, mis. 2015-01')
+    parser.add_argument('--end', help='bulan terakhir, mis. 2015-12')
+    parser.add_argument('--workers', type=int, default=None, help='jumlah proses render (bawaan: jumlah core)')
+    parser.add_argument('--dpi', type=int, default=DPI)
+    parser.add_argument('--force', action='store_true', help='render ulang semua gambar')
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    df, index, cube_data, stats = load_inputs(args.store, args.cube, os.path.join(args.cube, 'corr'))
+    pages = report_pages(cube_data, args.stations, args.start, args.end)
+    rendered, total = generate(args.output, pages, df, index, cube_data, stats, args.workers, args.dpi, args.force)
+    elapsed = time.perf_counter() - started
+    print(f'{len(pages)} laporan, {rendered} dari {total} gambar dirender ({total - rendered} dipakai ulang), '
+          f'ditulis ke {args.output} ({elapsed:.1f} detik)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+import numpy as np
+import pandas as pd
+
+
+# jendela bergerak per stasiun dalam O(N): selisih cumsum antara baris i dan baris pertama yang masih
+# berada di jendela, dicari dengan searchsorted atas kunci (stasiun, jam) yang terurut
+STATION_SHIFT = 32
+# rata-rata jendela hanya dihitung bila minimal 75% jamnya valid
+MIN_FRACTION = 0.75
+
+# episode: jam berurutan di satu stasiun ketika rata-rata jendela semua polutan melebihi ambang
+EPISODE_POLLUTANTS = ['PM2.5', 'PM10']
+EPISODE_THRESHOLD = 35
+EPISODE_WINDOWS = [1, 8, 24]
+DURATION_EDGES = [1, 2, 3, 6, 12, 24, 48, 96, 168]
+DURATION_LABELS = ['1', '2', '3–5', '6–11', '12–23', '24–47', '48–95', '96–167', '≥168']
+
+
+def hour_key(df: pd.DataFrame) -> np.ndarray:
+    hours = df.index.to_numpy().astype('datetime64[h]').astype('int64')
+    codes = df['station'].cat.codes.to_numpy().astype('int64')
+    return (codes << STATION_SHIFT) + hours
+
+
+def min_hours(hours: int) -> int:
+    return max(1, int(np.ceil(hours * MIN_FRACTION)))
+
+
+def rolling_mean(values: np.ndarray, key: np.ndarray, hours: int, min_hours: int) -> np.ndarray:
+    # rata-rata `hours` jam terakhir (termasuk jam ini) bila minimal `min_hours` jam valid, selain itu NaN;
+    # jam yang hilang tetap dihitung sebagai bagian jendela karena batasnya diambil dari waktu, bukan posisi
+    values = np.asarray(values, dtype='float64')
+    order = None
+    if len(key) > 1 and (key[1:] < key[:-1]).any():
+        order = np.argsort(key, kind='stable')
+        key, values = key[order], values[order]
+
+    valid = ~np.isnan(values)
+    zero = np.zeros((1,) + values.shape[1:])
+    sums = np.concatenate([zero, np.cumsum(np.where(valid, values, 0.0), axis=0)])
+    counts = np.concatenate([zero, np.cumsum(valid, axis=0)])
+
+    start = np.searchsorted(key, key - (hours - 1), side='left')
+    end = np.arange(1, len(key) + 1)
+    total, count = sums[end] - sums[start], counts[end] - counts[start]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(count >= min_hours, total / count, np.nan)
+
+    if order is not None:
+        restored = np.empty_like(mean)
+        restored[order] = mean
+        mean = restored
+    return mean
+
+
+def window_means(df: pd.DataFrame, columns, hours: int, key=None) -> np.ndarray:
+    values = df[columns].to_numpy(dtype='float64')
+    if hours == 1:
+        return values
+    key = hour_key(df) if key is None else key
+    return rolling_mean(values, key, hours, min_hours(hours))
+
+
+def _empty_episodes(columns, categories) -> pd.DataFrame:
+    table = {
+        'station': pd.Categorical([], categories=categories),
+        'start': pd.DatetimeIndex([], name=None), 'end': pd.DatetimeIndex([], name=None),
+        'hours': np.array([], dtype='int64'),
+    }
+    for col in columns:
+        table[f'peak:{col}'] = np.array([], dtype='float64')
+        table[f'mean:{col}'] = np.array([], dtype='float64')
+    return pd.DataFrame(table)
+
+
+def find_episodes(key: np.ndarray, times, stations: pd.Series, flags: np.ndarray, values: np.ndarray,
+                  columns) -> pd.DataFrame:
+    # run-length encoding atas baris bertanda: run baru dimulai bila kuncinya bukan tepat satu jam
+    # setelah baris bertanda sebelumnya (jam terlewat atau stasiun lain)
+    categories = stations.cat.categories
+    rows = np.flatnonzero(flags)
+    if len(key) > 1 and (key[1:] < key[:-1]).any():
+        rows = rows[np.argsort(key[rows], kind='stable')]
+    if not len(rows):
+        return _empty_episodes(columns, categories)
+
+    first = np.ones(len(rows), dtype=bool)
+    first[1:] = np.diff(key[rows]) != 1
+    starts = np.flatnonzero(first)
+    ends = np.append(starts[1:], len(rows)) - 1
+    hours = ends - starts + 1
+
+    times = np.asarray(times)
+    codes = stations.cat.codes.to_numpy()
+    run_values = values[rows]
+    table = {
+        'station': pd.Categorical.from_codes(codes[rows[starts]], categories),
+        'start': times[rows[starts]], 'end': times[rows[ends]],
+        'hours': hours.astype('int64'),
+    }
+    for j, col in enumerate(columns):
+        table[f'peak:{col}'] = np.maximum.reduceat(run_values[:, j], starts)
+        table[f'mean:{col}'] = np.add.reduceat(run_values[:, j], starts) / hours
+    return pd.DataFrame(table)
+
+
+def episodes(df: pd.DataFrame, columns=EPISODE_POLLUTANTS, threshold=EPISODE_THRESHOLD, hours: int = 1):
+    key = hour_key(df)
+    means = window_means(df, columns, hours, key)
+    with np.errstate(invalid='ignore'):
+        flags = (means > threshold).all(axis=1)
+    return find_episodes(key, df.index, df['station'], flags, means, columns)
+
+
+def extend_episodes(table: pd.DataFrame, new: pd.DataFrame, context=None, columns=EPISODE_POLLUTANTS,
+                    threshold=EPISODE_THRESHOLD, hours: int = 1) -> pd.DataFrame:
+    # `new` berisi jam setelah data lama; `context` = baris lama `hours - 1` jam terakhir per stasiun
+    # agar rata-rata jendela di awal batch sama seperti bila dihitung dari seluruh riwayat
+    frame = new
+    if context is not None and len(context):
+        frame = pd.concat([context, new])
+    frame = frame.assign(station=frame['station'].astype(str).astype('category'))
+    key = hour_key(frame)
+    means = window_means(frame, columns, hours, key)
+    with np.errstate(invalid='ignore'):
+        flags = (means > threshold).all(axis=1)
+    flags[:len(frame) - len(new)] = False
+    fresh = find_episodes(key, frame.index, frame['station'], flags, means, columns)
+
+    if fresh.empty:
+        # tabel yang sama dikembalikan agar pemanggil tahu tidak ada yang perlu ditulis ulang
+        return table
+    # tabel lama tidak disalin ke string, kategori stasiunnya cukup diperluas
+    stations = pd.Index(table['station'].unique()).astype(str).union(pd.Index(fresh['station'].unique()).astype(str))
+    old = table.astype({'station': pd.CategoricalDtype(stations)}).reset_index(drop=True)
+    fresh = fresh.astype({'station': pd.CategoricalDtype(stations)})
+    if len(old):
+        # episode pertama batch baru yang dimulai tepat sejam setelah episode terakhir stasiunnya adalah lanjutannya
+        last = old.groupby('station', observed=True).tail(1).reset_index().set_index('station')
+        head = fresh.groupby('station', observed=True).head(1).reset_index().set_index('station')
+        joined = head.join(last, rsuffix='_old', how='inner')
+        joined = joined[joined['start'] - joined['end_old'] == pd.Timedelta(hours=1)]
+        if len(joined):
+            i, j = joined['index_old'].to_numpy(), joined['index'].to_numpy()
+            total = old.loc[i, 'hours'].to_numpy() + fresh.loc[j, 'hours'].to_numpy()
+            for col in columns:
+                old.loc[i, f'mean:{col}'] = (
+                    old.loc[i, f'mean:{col}'].to_numpy() * old.loc[i, 'hours'].to_numpy()
+                    + fresh.loc[j, f'mean:{col}'].to_numpy() * fresh.loc[j, 'hours'].to_numpy()
+                ) / total
+                old.loc[i, f'peak:{col}'] = np.maximum(old.loc[i, f'peak:{col}'].to_numpy(),
+                                                       fresh.loc[j, f'peak:{col}'].to_numpy())
+            old.loc[i, 'end'] = fresh.loc[j, 'end'].to_numpy()
+            old.loc[i, 'hours'] = total
+            fresh = fresh.drop(index=j)
+
+    combined = pd.concat([part for part in (old, fresh) if len(part)] or [old], ignore_index=True)
+    return combined.sort_values(['station', 'start'], kind='stable').reset_index(drop=True)
+
+
+def select_episodes(table: pd.DataFrame, start=None, end=None, stations=None) -> pd.DataFrame:
+    # episode yang beririsan dengan rentang tanggal (tanggal akhir inklusif satu hari penuh)
+    mask = np.ones(len(table), dtype=bool)
+    if start is not None:
+        mask &= (table['end'] >= pd.Timestamp(start)).to_numpy()
+    if end is not None:
+        mask &= (table['start'] < pd.Timestamp(end).normalize() + pd.Timedelta(days=1)).to_numpy()
+    if stations is not None:
+        mask &= table['station'].isin(stations).to_numpy()
+    return table[mask]
+
+
+def duration_histogram(table: pd.DataFrame) -> pd.Series:
+    bins = np.searchsorted(DURATION_EDGES, table['hours'].to_numpy(), side='right') - 1
+    counts = np.bincount(bins, minlength=len(DURATION_EDGES))
+    return pd.Series(counts, index=pd.Index(DURATION_LABELS, name='Durasi (jam)'), name='count')
@@ -0,0 +1,359 @@
+import fnmatch
+import glob
+import json
+import os
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+
+# store bisa diganti lewat AIRQ_STORE, mis. dashboard/main.npy untuk backend memory-map
+STORE_PATH = os.environ.get('AIRQ_STORE', 'dashboard/main.parquet')
+NPY_SUFFIX = '.npy'
+MANIFEST_PATH = 'dashboard/manifest.json'
+
+POLLUTANT_COLS = ['PM2.5', 'PM10', 'SO2', 'NO2', 'CO', 'O3']
+METEOROLOGY_COLS = ['TEMP', 'PRES', 'DEWP', 'RAIN', 'WSPM']
+MEASUREMENT_COLS = POLLUTANT_COLS + METEOROLOGY_COLS
+TIME_COLS = ['year', 'month', 'day', 'hour']
+CATEGORY_COLS = ['air_category_pm2_5', 'air_category_pm10', 'time_category']
+# hasil tahap QC (qc.py) per baris, dari yang paling dipercaya: nilai asli sampai spike
+QC_LEVELS = ['asli', 'interpolasi', 'spasial', 'musiman', 'spike']
+QC_DTYPE = pd.CategoricalDtype(QC_LEVELS, ordered=True)
+COLUMNS = TIME_COLS + MEASUREMENT_COLS[:-1] + ['wd', 'WSPM', 'station'] + CATEGORY_COLS + ['qc_flag']
+PARTITION_COLS = ['station', 'year']
+# partisi dengan lebih dari sekian file kecil hasil append_store digabung oleh compact_store
+COMPACT_FILES = 16
+# setiap publikasi (ingest.py, stream.py) menulis generasi baru di direktori store, kubus, dan statistik korelasi:
+# root/v00000042 untuk versi manifest 42. File yang tidak berubah ditautkan (hard link) dari generasi
+# sebelumnya, file yang berubah selalu ditulis sebagai file baru, dan generasi baru diberi nama akhirnya tepat
+# sebelum manifest dinaikkan. Pembaca satu versi tidak pernah melihat file yang berubah di bawahnya; generasi
+# lama dihapus GENERATION_GRACE detik setelah digantikan (file yang masih dipetakan ke memori tetap utuh)
+GENERATION_PATTERN = 'v' + '[0-9]' * 8
+GENERATION_GRACE = 60
+
+
+@contextmanager
+def atomic_write(path: str):
+    # tulis ke file sementara lalu ganti sekaligus, pembaca (termasuk mmap) tetap melihat file lama
+    tmp = f'{path}.tmp-{os.getpid()}'
+    try:
+        yield tmp
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def read_manifest(path: str = MANIFEST_PATH) -> dict:
+    if not os.path.exists(path):
+        return {'version': 0, 'rows': 0, 'last': {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_manifest(manifest: dict, path: str = MANIFEST_PATH):
+    with atomic_write(path) as tmp:
+        with open(tmp, 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+
+def data_version(path: str = MANIFEST_PATH) -> int:
+    return read_manifest(path)['version']
+
+
+def _generations(root: str) -> list:
+    paths = sorted(glob.glob(os.path.join(root, GENERATION_PATTERN)))
+    return [(int(os.path.basename(p)[1:]), p) for p in paths]
+
+
+def generation_path(root: str, version: int | None = None) -> str:
+    # generasi untuk versi manifest `version` (bawaan: terbaru); direktori tanpa generasi (data uji, store
+    # sintetis benchmark, .npy/.feather) dibaca langsung
+    generations = _generations(root)
+    if not generations:
+        return root
+    if version is not None:
+        older = [path for v, path in generations if v <= version]
+        if older:
+            return older[-1]
+    return generations[-1][1]
+
+
+def _link_tree(source: str, target: str):
+    for directory, subdirs, files in os.walk(source):
+        if directory == source:
+            # direktori tanpa generasi: generasi lain dan sisa penulis yang gagal tidak ikut ditautkan
+            subdirs[:] = [d for d in subdirs
+                          if not d.startswith('.') and not fnmatch.fnmatch(d, GENERATION_PATTERN)]
+        destination = os.path.join(target, os.path.relpath(directory, source))
+        os.makedirs(destination, exist_ok=True)
+        for name in files:
+            if not name.startswith('.') and '.tmp-' not in name:
+                os.link(os.path.join(directory, name), os.path.join(destination, name))
+
+
+@contextmanager
+def new_generation(root: str, version: int, base: bool = True):
+    # direktori sementara berisi tautan ke generasi terakhir (base=False: kosong, untuk bangun ulang penuh),
+    # diberi nama akhir bila blok selesai tanpa galat. File di dalamnya hanya boleh diganti lewat atomic_write
+    # atau file baru, tidak ditulis di tempat, karena inode-nya masih dipakai generasi sebelumnya
+    final = os.path.join(root, f'v{version:08d}')
+    tmp = os.path.join(root, f'.v{version:08d}.tmp-{os.getpid()}')
+    os.makedirs(root, exist_ok=True)
+    if os.path.isdir(tmp):
+        shutil.rmtree(tmp)
+    if base and os.path.isdir(generation_path(root)):
+        _link_tree(generation_path(root), tmp)
+    os.makedirs(tmp, exist_ok=True)
+    try:
+        yield tmp
+        # sisa publikasi yang gagal sebelum manifest dinaikkan belum pernah dibaca siapa pun
+        if os.path.isdir(final):
+            shutil.rmtree(final)
+        os.replace(tmp, final)
+    finally:
+        if os.path.isdir(tmp):
+            shutil.rmtree(tmp)
+
+
+def prune_generations(root: str, grace: float = GENERATION_GRACE):
+    # generasi yang digantikan lebih dari `grace` detik lalu sudah selesai dimuat pembacanya
+    now = time.time()
+    generations = _generations(root)
+    for (_, path), (_, newer) in zip(generations[:-1], generations[1:]):
+        if now - os.stat(newer).st_mtime > grace:
+            shutil.rmtree(path, ignore_errors=True)
+    for path in glob.glob(os.path.join(root, f'.{GENERATION_PATTERN}.tmp-*')):
+        if now - os.stat(path).st_mtime > grace:
+            shutil.rmtree(path, ignore_errors=True)
+    # isi layout lama langsung di root tidak dibaca lagi setelah generasi pertama; direktori yang punya
+    # generasinya sendiri (statistik korelasi di dalam direktori kubus) dibiarkan
+    generations = _generations(root)
+    if generations and now - os.stat(generations[0][1]).st_mtime > grace:
+        for name in os.listdir(root):
+            path = os.path.join(root, name)
+            if name.startswith('.') or fnmatch.fnmatch(name, GENERATION_PATTERN) or _generations(path):
+                continue
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                os.remove(path)
+
+
+def to_store_frame(df: pd.DataFrame) -> pd.DataFrame:
+    df = df[COLUMNS].copy()
+    df[TIME_COLS] = df[TIME_COLS].astype('int16')
+    df[MEASUREMENT_COLS] = df[MEASUREMENT_COLS].astype('float32')
+    for col in ['wd', 'station'] + CATEGORY_COLS:
+        df[col] = df[col].astype('category')
+    df['qc_flag'] = df['qc_flag'].astype(QC_DTYPE)
+    return df
+
+
+def write_store(df: pd.DataFrame, path: str = STORE_PATH):
+    df = to_store_frame(df)
+    df = df.rename_axis('datetime').reset_index()
+    df = df.sort_values(['station', 'datetime'], kind='stable')
+
+    if path.endswith('.feather'):
+        df.reset_index(drop=True).to_feather(path)
+        return
+    if path.endswith(NPY_SUFFIX):
+        _write_npy(df.reset_index(drop=True), path)
+        return
+
+    # tulis ulang seluruh partisi station=/year=
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    df.to_parquet(path, partition_cols=PARTITION_COLS, index=False)
+
+
+def check_appendable(path: str):
+    # store Feather dan .npy ditulis sekali oleh ingest, jadi hanya store Parquet yang bisa ditambah
+    if path.endswith(('.feather', NPY_SUFFIX)):
+        raise ValueError(f'penambahan data hanya didukung untuk store Parquet, bukan {path}; '
+                         'bangun ulang store dengan ingest.py --output <direktori Parquet>')
+
+
+def append_store(df: pd.DataFrame, path: str = STORE_PATH):
+    check_appendable(path)
+    # setiap batch menjadi file baru di partisi station=/year= yang sesuai
+    df = to_store_frame(df).rename_axis('datetime').reset_index()
+    df.to_parquet(path, partition_cols=PARTITION_COLS, index=False)
+
+
+def compact_store(path: str = STORE_PATH, stations=None, max_files: int = COMPACT_FILES) -> int:
+    # file-file kecil di satu partisi station=/year= digabung menjadi satu file terurut waktu. stream.py
+    # menjalankannya di generasi yang belum dipublikasikan (new_generation), jadi tidak ada pembaca yang
+    # melihat file lama dan file gabungan bersamaan; file lama hanya dilepas dari generasi ini
+    pattern = [f'station={s}' for s in stations] if stations is not None else ['station=*']
+    directories = sorted(d for p in pattern for d in glob.glob(os.path.join(path, p, 'year=*')))
+    compacted = 0
+    for directory in directories:
+        files = sorted(glob.glob(os.path.join(directory, '*.parquet')))
+        if len(files) <= max_files:
+            continue
+        table = pa.concat_tables([pq.read_table(f) for f in files], promote_options='permissive')
+        name = f'{uuid.uuid4().hex}-0.parquet'
+        hidden = os.path.join(directory, f'.{name}')
+        pq.write_table(table.sort_by('datetime'), hidden)
+        os.replace(hidden, os.path.join(directory, name))
+        for f in files:
+            os.remove(f)
+        compacted += 1
+    return compacted
+
+
+def _write_npy(df: pd.DataFrame, path: str):
+    # satu .npy per kolom; kategori disimpan sebagai kode integer kecil + daftar label di meta.json
+    tmp = f'{path}.tmp-{os.getpid()}'
+    os.makedirs(tmp)
+    meta = {'rows': len(df), 'columns': COLUMNS, 'categories': {}, 'ordered': []}
+    np.save(os.path.join(tmp, 'datetime.npy'), df['datetime'].to_numpy(dtype='datetime64[ns]'))
+    for col in COLUMNS:
+        values = df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            meta['categories'][col] = values.cat.categories.tolist()
+            if values.cat.ordered:
+                meta['ordered'].append(col)
+            values = values.cat.codes
+        np.save(os.path.join(tmp, f'{col}.npy'), values.to_numpy())
+    with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+
+    # pembaca yang masih memetakan file lama tetap aman, inode lama baru dilepas setelah ditutup
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    os.replace(tmp, path)
+
+
+def _load_npy(path: str, columns=None) -> pd.DataFrame:
+    # semua kolom dipetakan read-only ke memori: sesi dan proses berbagi halaman page cache yang sama,
+    # DataFrame hanya pembungkus tanpa salinan
+    with open(os.path.join(path, 'meta.json')) as f:
+        meta = json.load(f)
+    data = {}
+    for col in meta['columns']:
+        if columns is not None and col not in columns:
+            continue
+        values = np.load(os.path.join(path, f'{col}.npy'), mmap_mode='r')
+        if col in meta['categories']:
+            values = pd.Categorical.from_codes(values, meta['categories'][col], ordered=col in meta['ordered'])
+        data[col] = values
+    index = pd.DatetimeIndex(np.load(os.path.join(path, 'datetime.npy'), mmap_mode='r'), copy=False)
+    return pd.DataFrame(data, index=index, copy=False)
+
+
+def load_store(path: str = STORE_PATH, columns=None, filters=None) -> pd.DataFrame:
+    path = generation_path(path)
+    if path.endswith(NPY_SUFFIX):
+        if filters:
+            raise ValueError('filter baca hanya didukung untuk store Parquet/Feather')
+        return _load_npy(path, columns)
+
+    read_cols = None if columns is None else ['datetime'] + [c for c in columns if c != 'datetime']
+    if path.endswith('.feather'):
+        dataset = ds.dataset(path, format='feather')
+    else:
+        partitioning = ds.HivePartitioning.discover(infer_dictionary=True)
+        dataset = ds.dataset(path, format='parquet', partitioning=partitioning)
+    expression = pq.filters_to_expression(filters) if filters else None
+    df = dataset.to_table(columns=read_cols, filter=expression).to_pandas()
+
+    # kolom partisi terbaca sebagai dictionary string
+    if 'year' in df.columns:
+        df['year'] = df['year'].astype('int16')
+    if 'station' in df.columns:
+        df['station'] = df['station'].astype(str).astype('category')
+    # dictionary dari beberapa file tidak menyimpan urutan tingkat QC
+    if 'qc_flag' in df.columns:
+        df['qc_flag'] = df['qc_flag'].astype(str).astype(QC_DTYPE)
+
+    df = df.set_index('datetime')
+    df.index.name = None
+    ordered = [c for c in COLUMNS if c in df.columns]
+    df = df[ordered]
+    return sort_by_station(df) if 'station' in df.columns else df
+
+
+def is_station_sorted(df: pd.DataFrame) -> bool:
+    codes = df['station'].cat.codes.to_numpy()
+    times = df.index.to_numpy()
+    same_station = codes[1:] == codes[:-1]
+    return bool((codes[1:] >= codes[:-1]).all() and ((times[1:] >= times[:-1]) | ~same_station).all())
+
+
+def sort_by_station(df: pd.DataFrame) -> pd.DataFrame:
+    # file hasil append_store bisa terbaca tidak berurutan, urutkan hanya bila perlu
+    if is_station_sorted(df):
+        return df
+    order = np.lexsort((df.index.to_numpy(), df['station'].cat.codes.to_numpy()))
+    return df.iloc[order]
+
+
+def station_index(df: pd.DataFrame) -> dict:
+    # df terurut (station, waktu): baris stasiun ke-i ada di offsets[i]:offsets[i + 1]
+    stations = df['station'].cat.categories
+    codes = df['station'].cat.codes.to_numpy()
+    times = df.index.to_numpy()
+    # kunci gabungan stasiun * len(ticks) + peringkat waktu ikut terurut seperti baris, jadi batas semua
+    # stasiun dicari sekaligus; peringkat dipakai agar kunci tidak meluap seperti bila memakai nanodetik
+    ticks = np.unique(times)
+    return {
+        'stations': stations,
+        'positions': {station: i for i, station in enumerate(stations)},
+        'offsets': np.searchsorted(codes, np.arange(len(stations) + 1)),
+        'times': times,
+        'ticks': ticks,
+        'keys': codes.astype('int64') * len(ticks) + np.searchsorted(ticks, times),
+    }
+
+
+def row_ranges(index: dict, start=None, end=None, stations=None) -> np.ndarray:
+    positions = np.arange(len(index['stations']), dtype='int64')
+    if stations is not None:
+        found = {index['positions'][s] for s in stations if s in index['positions']}
+        positions = np.array(sorted(found), dtype='int64')
+
+    ticks = index['ticks']
+    first, last = 0, len(ticks)
+    if start is not None:
+        first = np.searchsorted(ticks, pd.Timestamp(start).to_datetime64())
+    if end is not None:
+        # tanggal akhir inklusif sampai jam terakhir hari itu
+        last = np.searchsorted(ticks, (pd.Timestamp(end).normalize() + pd.Timedelta(days=1)).to_datetime64())
+    base = positions * len(ticks)
+    lo, hi = np.searchsorted(index['keys'], np.stack([base + first, base + last]))
+    lo, hi = lo[hi > lo], hi[hi > lo]
+
+    # potongan yang bersambung (stasiun berurutan dengan rentang penuh) digabung
+    if not len(lo):
+        return np.empty((0, 2), dtype='int64')
+    breaks = np.flatnonzero(lo[1:] != hi[:-1]) + 1
+    return np.column_stack([lo[np.r_[0, breaks]], hi[np.r_[breaks - 1, len(hi) - 1]]])
+
+
+def select_rows(df: pd.DataFrame, start=None, end=None, stations=None, index=None, quality=None) -> pd.DataFrame:
+    # biaya sebanding dengan baris terpilih: satu potongan dikembalikan tanpa salinan,
+    # beberapa potongan digabung sekali dari irisan yang bersambung
+    if index is None:
+        index = station_index(df)
+    ranges = row_ranges(index, start, end, stations)
+    if not len(ranges):
+        selected = df.iloc[:0]
+    elif len(ranges) == 1:
+        selected = df.iloc[ranges[0, 0]:ranges[0, 1]]
+    else:
+        selected = pd.concat([df.iloc[a:b] for a, b in ranges])
+    # tingkat QC tidak terurut di store, jadi disaring sesudah potongan waktu/stasiun
+    if quality is not None:
+        selected = selected[selected['qc_flag'].isin(quality).to_numpy()]
+    return selected
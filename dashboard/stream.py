@@ -0,0 +1,273 @@
+import argparse
+import io
+import os
+import queue
+import shutil
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import qc
+from correlation import CORR_PATH, load_stats, stats_since, update_stats, write_stats
+from cube import CUBE_PATH, load_cube, update_cube, write_cube
+from ingest import add_categories, fill_gaps
+from store import (
+    MANIFEST_PATH, MEASUREMENT_COLS, POLLUTANT_COLS, STORE_PATH, TIME_COLS,
+    append_store, check_appendable, compact_store, generation_path, load_store, new_generation, prune_generations,
+    read_manifest, sort_by_station, to_store_frame, write_manifest,
+)
+
+
+REQUIRED_COLS = TIME_COLS + MEASUREMENT_COLS + ['wd', 'station']
+BATCH_SIZE = 5000
+# batch stdin dikirim paling lambat sekian detik setelah baris pertamanya walaupun belum penuh
+MAX_WAIT = 5.0
+
+
+def validate(raw: pd.DataFrame, last: dict):
+    missing = [c for c in REQUIRED_COLS if c not in raw.columns]
+    if missing:
+        raise ValueError(f'kolom wajib tidak ada: {", ".join(missing)}')
+
+    df = raw[REQUIRED_COLS].copy()
+    df[TIME_COLS + MEASUREMENT_COLS] = df[TIME_COLS + MEASUREMENT_COLS].apply(pd.to_numeric, errors='coerce')
+    df['station'] = df['station'].astype('string').str.strip()
+    df['wd'] = df['wd'].astype('string').str.strip().replace('', pd.NA)
+
+    # konsentrasi polutan tidak mungkin negatif
+    pollutants = df[POLLUTANT_COLS]
+    df[POLLUTANT_COLS] = pollutants.mask(pollutants < 0)
+
+    df.index = pd.to_datetime(df[TIME_COLS], errors='coerce')
+    valid = df.index.notna() & df['station'].notna().to_numpy() & (df['station'] != '').to_numpy()
+
+    # hanya jam yang lebih baru dari data terakhir setiap stasiun yang diterima
+    last_seen = pd.to_datetime(df['station'].map(last), errors='coerce').to_numpy()
+    valid &= np.isnat(last_seen) | (df.index.to_numpy() > last_seen)
+
+    df = df[valid]
+    df = df[~df.set_index('station', append=True).index.duplicated(keep='last')]
+    df = df.sort_index(kind='stable')
+    df.index.name = 'datetime'
+    df[TIME_COLS] = df[TIME_COLS].astype('int16')
+    return df, len(raw) - len(df)
+
+
+class Appender:
+    def __init__(self, store_path=STORE_PATH, cube_path=CUBE_PATH, manifest_path=MANIFEST_PATH):
+        check_appendable(store_path)
+        self.store_path = store_path
+        self.cube_path = cube_path
+        self.corr_path = os.path.join(cube_path, os.path.basename(CORR_PATH))
+        self.manifest_path = manifest_path
+        self.manifest = read_manifest(manifest_path)
+        # hanya sel kubus dan statistik korelasi sejak bulan data terbaru yang disimpan di memori, bulan
+        # sebelumnya tidak berubah lagi kecuali ada batch yang lebih lama (mis. stasiun baru), yang membuat
+        # ekornya dibaca ulang
+        last = max(self.manifest['last'].values(), default=None)
+        self.cube_since = pd.Timestamp(last).to_period('M').start_time if last else pd.Timestamp.min
+        self.cube = load_cube(cube_path, None if last is None else self.cube_since)
+        self.stats = load_stats(self.corr_path, None if last is None else self.cube_since)
+        # qc.CONTEXT_HOURS jam terakhir setiap stasiun, dibaca dari store sekali lalu diperbarui di memori
+        self.recent = None
+        self.profiles = {}
+
+    def _trim(self, df: pd.DataFrame) -> pd.DataFrame:
+        df = sort_by_station(df.assign(station=df['station'].astype(str).astype('category')))
+        last = df.index.to_series().groupby(df['station'].to_numpy()).transform('max').to_numpy()
+        return df[df.index.to_numpy() > last - np.timedelta64(qc.CONTEXT_HOURS, 'h')]
+
+    def context(self, stations) -> pd.DataFrame:
+        known = set() if self.recent is None else set(self.recent['station'].unique())
+        missing = [s for s in stations if s in self.manifest['last'] and s not in known]
+        if missing:
+            first = min(pd.Timestamp(self.manifest['last'][s]) for s in missing)
+            first -= pd.Timedelta(hours=qc.CONTEXT_HOURS)
+            stored = load_store(self.store_path, REQUIRED_COLS,
+                                [('station', 'in', missing), ('year', '>=', first.year)])
+            frames = [part for part in (self.recent, stored) if part is not None and len(part)]
+            self.recent = self._trim(pd.concat(frames)) if frames else None
+        if self.recent is None:
+            return pd.DataFrame(columns=REQUIRED_COLS)
+        return self.recent[self.recent['station'].isin(stations).to_numpy()]
+
+    def profile(self, stations):
+        # profil musiman tidak berubah selama stream berjalan, dibaca sekali per susunan stasiun
+        path = os.path.join(generation_path(self.cube_path), qc.PROFILE_FILE)
+        if not os.path.exists(path):
+            return None
+        key = tuple(stations)
+        if self.profiles.get('key') != key:
+            self.profiles = {'key': key, 'values': qc.load_profile(path, stations)}
+        return self.profiles['values']
+
+    def append(self, raw: pd.DataFrame):
+        df, rejected = validate(raw, self.manifest['last'])
+        if df.empty:
+            return 0, rejected
+
+        # QC dijalankan atas batch beserta riwayat terakhir stasiunnya agar spike dan celah di awal batch
+        # dinilai sama seperti saat ingest; hasil QC riwayat dibuang, hanya baris baru yang disimpan
+        context = self.context(df['station'].unique())
+        combined = pd.concat([part for part in (context[REQUIRED_COLS], df) if len(part)]).rename_axis('datetime')
+        combined = sort_by_station(combined.assign(station=combined['station'].astype(str).astype('category')))
+        last_seen = pd.to_datetime(combined['station'].astype(str).map(self.manifest['last'])).to_numpy()
+        new = np.isnat(last_seen) | (combined.index.to_numpy() > last_seen)
+
+        # QC memakai profil musiman dari ingest; tanpa profil (store lama) profil dihitung dari batch ini
+        combined, _, _ = fill_gaps(combined, self.profile(combined['station'].cat.categories))
+
+        # agregat dihitung dari nilai bertipe store (float32) agar sama dengan hasil ingest
+        df = to_store_frame(add_categories(combined)[new])
+
+        # agregat diperbarui dari batch ini saja dan hanya sel sejak jam paling awal batch yang ditulis ulang
+        since = df.index.min()
+        month = since.to_period('M').start_time
+        if month < self.cube_since:
+            self.cube, self.cube_since = load_cube(self.cube_path, month), month
+            self.stats = load_stats(self.corr_path, month)
+        cube = update_cube(self.cube, df)
+        stats = update_stats(self.stats, df)
+        # store, kubus, dan statistik ditulis ke generasi versi berikutnya (file lain ditautkan dari generasi
+        # sekarang), yang baru terlihat oleh pembaca setelah manifest dinaikkan versinya
+        version = self.manifest['version'] + 1
+        with (new_generation(self.store_path, version) as store_path,
+              new_generation(self.cube_path, version) as cube_path,
+              new_generation(self.corr_path, version) as corr_path):
+            append_store(df, store_path)
+            compact_store(store_path, df['station'].unique())
+            # episodes.parquet hanya ditulis ulang bila ada episode yang bertambah atau diperpanjang
+            unchanged = cube.get('episodes') is self.cube.get('episodes')
+            write_cube({k: v for k, v in cube.items() if not (k == 'episodes' and unchanged)}, cube_path, since=month)
+            write_stats(stats, corr_path, since=since)
+        self.recent = self._trim(pd.concat([part for part in (self.recent, df[REQUIRED_COLS]) if part is not None]))
+        self.cube = {level: cells[cells['period'] >= month].reset_index(drop=True) if level != 'episodes' else cells
+                     for level, cells in cube.items()}
+        self.stats = stats_since(stats, month)
+        self.cube_since = month
+
+        last = df.reset_index().groupby('station', observed=True)['datetime'].max()
+        self.manifest['last'].update({station: ts.isoformat() for station, ts in last.items()})
+        self.manifest['rows'] += len(df)
+        self.manifest['version'] = version
+        write_manifest(self.manifest, self.manifest_path)
+        for root in (self.store_path, self.cube_path, self.corr_path):
+            prune_generations(root)
+        return len(df), rejected
+
+
+def read_batches(source, batch_size: int = BATCH_SIZE):
+    return pd.read_csv(source, chunksize=batch_size, na_values=['NA'], keep_default_na=True)
+
+
+def parse_rows(header: str, lines: list) -> pd.DataFrame:
+    return pd.read_csv(io.StringIO(header + ''.join(lines)), na_values=['NA'], keep_default_na=True)
+
+
+def _read_lines(source, lines: queue.Queue):
+    for line in source:
+        lines.put(line)
+    lines.put(None)
+
+
+def stream_batches(source, batch_size: int = BATCH_SIZE, max_wait: float = MAX_WAIT):
+    # pd.read_csv(chunksize) baru menghasilkan batch setelah buffer bacanya penuh atau EOF, jadi feed yang tetap
+    # terbuka dibaca per baris di thread terpisah; batch dikirim setelah batch_size baris atau max_wait detik
+    # sejak baris pertamanya, mana yang lebih dulu
+    header = source.readline()
+    if not header:
+        return
+    lines = queue.Queue()
+    threading.Thread(target=_read_lines, args=(source, lines), name='airq-stdin', daemon=True).start()
+    batch, deadline, done = [], None, False
+    while not done:
+        try:
+            line = lines.get(timeout=None if deadline is None else max(0.0, deadline - time.monotonic()))
+        except queue.Empty:
+            line = ''
+        if line is None:
+            done = True
+        elif line.strip():
+            batch.append(line)
+            if deadline is None:
+                deadline = time.monotonic() + max_wait
+        if batch and (done or len(batch) >= batch_size or time.monotonic() >= deadline):
+            yield parse_rows(header, batch)
+            batch, deadline = [], None
+
+
+def report(accepted: int, rejected: int, elapsed: float, source: str):
+    rate = accepted / elapsed if elapsed > 0 else np.inf
+    print(f'{source}: {accepted:,} baris ditambahkan, {rejected:,} ditolak ({rate:,.0f} baris/detik)', flush=True)
+
+
+def run_stdin(appender: Appender, batch_size: int, max_wait: float):
+    for raw in stream_batches(sys.stdin, batch_size, max_wait):
+        start = time.perf_counter()
+        accepted, rejected = appender.append(raw)
+        report(accepted, rejected, time.perf_counter() - start, 'stdin')
+
+
+def ready_files(directory: str, seen: dict) -> list:
+    # file yang masih ditulis tidak boleh diambil: nama tersembunyi dan *.tmp dilewati (tulis ke sana lalu rename),
+    # dan file lain baru diproses bila ukuran serta mtime-nya sama dengan pemeriksaan sebelumnya
+    current, ready = {}, []
+    for entry in os.scandir(directory):
+        name = entry.name
+        if name.startswith('.') or name.endswith('.tmp') or not name.endswith('.csv') or not entry.is_file():
+            continue
+        stat = entry.stat()
+        current[entry.path] = (stat.st_size, stat.st_mtime_ns)
+        if seen.get(entry.path) == current[entry.path]:
+            ready.append(entry.path)
+    seen.clear()
+    seen.update(current)
+    return sorted(ready)
+
+
+def run_watch(appender: Appender, directory: str, batch_size: int, interval: float):
+    # file CSV yang sudah selesai ditulis diproses lalu dipindah ke subdirektori processed/
+    processed = os.path.join(directory, 'processed')
+    os.makedirs(processed, exist_ok=True)
+    seen = {}
+    while True:
+        for path in ready_files(directory, seen):
+            start = time.perf_counter()
+            accepted = rejected = 0
+            for raw in read_batches(path, batch_size):
+                added, dropped = appender.append(raw)
+                accepted += added
+                rejected += dropped
+            shutil.move(path, os.path.join(processed, os.path.basename(path)))
+            seen.pop(path, None)
+            report(accepted, rejected, time.perf_counter() - start, os.path.basename(path))
+        time.sleep(interval)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Menambahkan data per jam baru (skema CSV PRSA) ke store dan agregat dashboard.')
+    parser.add_argument('--watch', metavar='DIR', help='pantau direktori untuk file CSV baru (bawaan: baca stdin)')
+    parser.add_argument('--interval', type=float, default=5.0, help='jeda pemeriksaan direktori dalam detik')
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='jumlah baris per batch')
+    parser.add_argument('--max-wait', type=float, default=MAX_WAIT,
+                        help='batch stdin dikirim paling lambat sekian detik setelah baris pertamanya')
+    parser.add_argument('--store', default=STORE_PATH, help='direktori store Parquet')
+    parser.add_argument('--cube', default=CUBE_PATH, help='direktori kubus agregat')
+    parser.add_argument('--manifest', default=MANIFEST_PATH, help='lokasi manifest versi data')
+    args = parser.parse_args(argv)
+
+    try:
+        appender = Appender(args.store, args.cube, args.manifest)
+    except ValueError as error:
+        parser.error(str(error))
+    if args.watch:
+        run_watch(appender, args.watch, args.batch_size, args.interval)
+    else:
+        run_stdin(appender, args.batch_size, args.max_wait)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+
+
+# deret waktu untuk rentang sembarang: tingkat agregasi (jam/hari/minggu/bulan) dipilih dari panjang rentang,
+# lalu garis rata-rata diperkecil dengan LTTB dan pita min/maks dengan amplop per kolom piksel, sehingga
+# jumlah titik yang digambar tidak pernah melebihi anggaran berapa pun panjang rentangnya
+LEVELS = ['hour', 'day', 'week', 'month']
+LEVEL_LABELS = {'hour': 'per jam', 'day': 'harian', 'week': 'mingguan', 'month': 'bulanan'}
+LEVEL_HOURS = {'hour': 1, 'day': 24, 'week': 24 * 7, 'month': 24 * 30}
+# lebar area plot charts.time_series sekitar 1200 piksel pada dpi 100: paling banyak satu titik per piksel
+PIXEL_BUDGET = 1200
+MIN_BUDGET, MAX_BUDGET = 3, 10000
+# tingkat terhalus yang jumlah bucket-nya paling banyak OVERSAMPLE x anggaran, agar LTTB punya titik untuk dipilih
+OVERSAMPLE = 4
+# tampilan kasar pertama dihitung dari sel kubus harian dengan anggaran kecil
+COARSE_BUDGET = 150
+
+
+def choose_level(start, end, budget: int = PIXEL_BUDGET, finest: str = 'hour', oversample: int = OVERSAMPLE) -> str:
+    hours = (pd.Timestamp(end) - pd.Timestamp(start)) / pd.Timedelta(hours=1) + 1
+    for level in LEVELS[LEVELS.index(finest):]:
+        if hours / LEVEL_HOURS[level] <= budget * oversample:
+            return level
+    return LEVELS[-1]
+
+
+def bucket_starts(times, level: str) -> np.ndarray:
+    # awal bucket setiap waktu; minggu dimulai Senin (1970-01-01 adalah Kamis)
+    times = np.asarray(times, dtype='datetime64[ns]')
+    if level == 'hour':
+        return times.astype('datetime64[h]').astype('datetime64[ns]')
+    if level == 'day':
+        return times.astype('datetime64[D]').astype('datetime64[ns]')
+    if level == 'week':
+        days = times.astype('datetime64[D]').astype('int64')
+        return (days - (days + 3) % 7).astype('datetime64[D]').astype('datetime64[ns]')
+    return times.astype('datetime64[M]').astype('datetime64[ns]')
+
+
+def aggregate(times, values: np.ndarray, level: str) -> dict:
+    # rata-rata, minimum, dan maksimum semua nilai valid (semua stasiun terpilih) per bucket
+    starts = bucket_starts(times, level)
+    valid = ~np.isnan(values)
+    starts, values = starts[valid], values[valid]
+    order = np.argsort(starts, kind='stable')
+    starts, values = starts[order], values[order]
+    if not len(starts):
+        empty = np.array([], dtype='float64')
+        return {'times': starts, 'mean': empty, 'low': empty, 'high': empty}
+    first = np.flatnonzero(np.r_[True, starts[1:] != starts[:-1]])
+    counts = np.diff(np.r_[first, len(values)])
+    return {
+        'times': starts[first],
+        'mean': np.add.reduceat(values, first) / counts,
+        'low': np.minimum.reduceat(values, first),
+        'high': np.maximum.reduceat(values, first),
+    }
+
+
+def lttb(x: np.ndarray, y: np.ndarray, budget: int) -> np.ndarray:
+    # Largest-Triangle-Three-Buckets: indeks titik terpilih, titik pertama dan terakhir selalu dipertahankan;
+    # di setiap bucket dipilih titik yang membentuk segitiga terbesar dengan titik terpilih sebelumnya dan
+    # rata-rata bucket berikutnya
+    n = len(x)
+    if n <= budget or budget < MIN_BUDGET:
+        return np.arange(n)
+    x = x.astype('float64')
+    edges = np.linspace(1, n - 1, budget - 1).astype('int64')
+    # rata-rata setiap bucket sekaligus, ditambah titik terakhir sebagai "bucket berikutnya" bucket terakhir
+    sizes = np.diff(edges)
+    next_x = np.r_[np.add.reduceat(x[:n - 1], edges[:-1])[1:] / sizes[1:], x[-1]]
+    next_y = np.r_[np.add.reduceat(y[:n - 1], edges[:-1])[1:] / sizes[1:], y[-1]]
+
+    selected = np.empty(budget, dtype='int64')
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(budget - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs((x[a] - next_x[i]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y[i] - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def envelope(x: np.ndarray, low: np.ndarray, high: np.ndarray, budget: int):
+    # min/maks per kolom piksel: pita tetap memuat setiap puncak walaupun titik garisnya dibuang LTTB
+    n = len(x)
+    if n <= budget:
+        return x, low, high
+    starts = np.linspace(0, n, budget, endpoint=False).astype('int64')
+    return x[starts], np.minimum.reduceat(low, starts), np.maximum.reduceat(high, starts)
+
+
+def downsample(times, values: np.ndarray, start, end, budget: int = PIXEL_BUDGET, level=None) -> dict:
+    level = level or choose_level(start, end, budget)
+    buckets = aggregate(times, values, level)
+    keep = lttb(buckets['times'].astype('int64'), buckets['mean'], budget)
+    band_times, low, high = envelope(buckets['times'], buckets['low'], buckets['high'], budget)
+    return {
+        'level': level, 'buckets': len(buckets['times']),
+        'times': buckets['times'][keep], 'mean': buckets['mean'][keep],
+        'band_times': band_times, 'low': low, 'high': high,
+    }
+
+
+def from_cells(cells: pd.DataFrame, column: str, start, end, budget: int = COARSE_BUDGET) -> dict:
+    # tampilan kasar: rata-rata tertimbang dari jumlah/cacah sel harian, tanpa pita min/maks
+    level = choose_level(start, end, budget, finest='day', oversample=1)
+    periods = bucket_starts(cells['period'].to_numpy(), level)
+    totals = cells[[f'sum:{column}', f'count:{column}']].groupby(periods).sum()
+    totals = totals[totals[f'count:{column}'] > 0]
+    empty = np.array([], dtype='float64')
+    return {
+        'level': level, 'buckets': len(totals),
+        'times': totals.index.to_numpy(dtype='datetime64[ns]'),
+        'mean': (totals[f'sum:{column}'] / totals[f'count:{column}']).to_numpy(dtype='float64'),
+        'band_times': np.array([], dtype='datetime64[ns]'), 'low': empty, 'high': empty,
+    }
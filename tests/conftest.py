@@ -0,0 +1,66 @@
+import os
+import shutil
+import sys
+
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'dashboard'))
+
+import ingest  # noqa: E402
+from ingest import RAW_DIR, RAW_PATTERN, add_categories, fill_gaps, load_station, station_paths  # noqa: E402
+from store import sort_by_station, to_store_frame  # noqa: E402
+
+
+# potongan kecil data PRSA asli: tiga stasiun, tiga bulan pertama (lengkap dengan lubang dan episode untuk QC)
+STATIONS = ['Aotizhongxin', 'Dongsi', 'Guanyuan']
+LAST_DAY = '2013-05-31 23:00'
+
+
+def load_raw(stations=STATIONS, end: str = LAST_DAY) -> pd.DataFrame:
+    paths = [p for p in station_paths(os.path.join(ROOT, RAW_DIR)) if os.path.basename(p).split('_')[2] in stations]
+    df = pd.concat([load_station(path).loc[:end] for path in paths])
+    df['station'] = df['station'].astype('category')
+    return sort_by_station(df)
+
+
+def prepare(raw: pd.DataFrame, profile=None) -> pd.DataFrame:
+    df, _, _ = fill_gaps(raw.copy(), profile)
+    return to_store_frame(add_categories(df))
+
+
+@pytest.fixture(scope='session')
+def raw() -> pd.DataFrame:
+    return load_raw()
+
+
+@pytest.fixture(scope='session')
+def dataset(raw) -> pd.DataFrame:
+    return prepare(raw)
+
+
+def ingest_raw(raw: pd.DataFrame, root: str) -> dict:
+    # menulis CSV berskema PRSA lalu menjalankan ingest.py seperti di produksi
+    raw_dir = os.path.join(root, 'raw')
+    if os.path.isdir(raw_dir):
+        shutil.rmtree(raw_dir)
+    os.makedirs(raw_dir)
+    for station, frame in raw.groupby('station', observed=True):
+        frame = frame.astype({'station': str}).reset_index(drop=True)
+        frame.insert(0, 'No', range(1, len(frame) + 1))
+        frame.to_csv(os.path.join(raw_dir, RAW_PATTERN.replace('*', station)), index=False)
+    paths = {
+        'store': os.path.join(root, 'main.parquet'),
+        'cube': os.path.join(root, 'cube'),
+        'manifest': os.path.join(root, 'manifest.json'),
+    }
+    ingest.main(['--raw-dir', raw_dir, '--output', paths['store'], '--cube', paths['cube'],
+                 '--manifest', paths['manifest'], '--workers', '1'])
+    return paths
+
+
+@pytest.fixture(scope='session')
+def built(raw, tmp_path_factory) -> dict:
+    # dataset hasil ingest.py di direktori sementara, dipakai bersama oleh uji yang hanya membaca
+    return ingest_raw(raw, str(tmp_path_factory.mktemp('built')))
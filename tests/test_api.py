@@ -0,0 +1,120 @@
+import numpy as np
+import pytest
+
+import api
+from store import read_manifest, write_manifest
+
+
+@pytest.fixture(scope='module')
+def client(built):
+    service = api.Service(built['store'], built['cube'], f"{built['cube']}/corr", built['manifest'], workers=1)
+    return api.Client(service=service)
+
+
+def fetch(client: api.Client, endpoint: str, query: dict, fmt: str = 'json'):
+    return client.transport.fetch(endpoint, query, fmt)
+
+
+@pytest.mark.parametrize('endpoint, query, fmt, status', [
+    ('tidakada', {}, 'json', 404),
+    ('metrics', {}, 'xml', 400),
+    ('metrics', {}, 'arrow', 400),
+    ('metrics', {'foo': '1'}, 'json', 400),
+    ('metrics', {'start': 'bukan-tanggal'}, 'json', 400),
+    ('metrics', {'quality': 'asli,palsu'}, 'json', 400),
+    ('metrics', {'bins': '20'}, 'json', 400),
+    ('categories', {'column': 'PM2.5'}, 'json', 400),
+    ('categories', {'standard': 'WHO'}, 'json', 400),
+    ('severe', {'columns': 'air_category_pm2_5,salah'}, 'json', 400),
+    ('episodes', {'hours': 'dua'}, 'json', 400),
+    ('density', {'bins': '7'}, 'json', 400),
+    ('timeseries', {'column': 'PM1'}, 'json', 400),
+    ('timeseries', {'budget': '1'}, 'json', 400),
+    ('timeseries', {'level': 'year'}, 'json', 400),
+])
+def test_parameter_errors(client, endpoint, query, fmt, status):
+    with pytest.raises(api.ApiError) as error:
+        fetch(client, endpoint, query, fmt)
+    assert error.value.status == status
+
+
+@pytest.mark.parametrize('endpoint', [name for name in api.ENDPOINTS if name not in ('version', 'stations', 'bounds')])
+def test_empty_station_selection(client, endpoint):
+    # stations=() dikirim sebagai string kosong: tidak ada stasiun terpilih, bukan tanpa filter
+    result, rows = client.get(endpoint, stations=())
+    assert rows == 0
+    if endpoint == 'metrics':
+        assert result['total_station'] == 0
+    if endpoint == 'correlation':
+        assert np.isnan(result.to_numpy()).all()
+    if endpoint in ('episodes', 'yearly', 'monthly'):
+        assert len(result) == 0
+    if endpoint in ('overview', 'timeseries'):
+        assert result['buckets'] == 0
+
+
+def test_station_filter_matches_rows(client, dataset):
+    (metrics, rows), (everything, total) = client.get('metrics', stations=('Dongsi',)), client.get('metrics')
+    assert rows == (dataset['station'] == 'Dongsi').sum() and total == len(dataset)
+    assert metrics['total_station'] == 1 and everything['total_station'] == 3
+    np.testing.assert_allclose(metrics['avg_pm25'], dataset.loc[dataset['station'] == 'Dongsi', 'PM2.5'].mean(),
+                               rtol=1e-6)
+
+
+def test_equivalent_queries_share_cache(client):
+    # bentuk lain dari filter yang sama dilayani dari cache (rows=0) dengan isi yang sama
+    first = fetch(client, 'yearly', {'stations': 'Dongsi,Guanyuan', 'start': '2013-03-02', 'end': '2013-04-30'})
+    same = [
+        {'stations': 'Guanyuan,Dongsi', 'start': '2013-03-02T00:00:00', 'end': '2013-04-30'},
+        {'stations': 'Guanyuan,Dongsi,Guanyuan', 'start': '2013-03-02 00:00', 'end': '2013-04-30 23:00'},
+    ]
+    assert first.rows > 0
+    for query in same:
+        reply = fetch(client, 'yearly', query)
+        assert reply.rows == 0 and reply.body == first.body
+    other = fetch(client, 'yearly', {'stations': 'Guanyuan,Dongsi', 'start': '2013-03-03', 'end': '2013-04-30'})
+    assert other.rows > 0
+
+
+def test_quality_order_shares_cache(client):
+    first = fetch(client, 'metrics', {'quality': 'interpolasi,asli'}).rows
+    reply = fetch(client, 'metrics', {'quality': 'asli,interpolasi'})
+    assert first > 0 and reply.rows == 0
+
+
+@pytest.mark.parametrize('endpoint', ['metrics', 'density'])
+def test_start_is_a_date(client, dataset, endpoint):
+    # jam pada tanggal awal diabaikan seperti pada tanggal akhir, untuk endpoint sel maupun baris
+    day = fetch(client, endpoint, {'start': '2013-04-10', 'end': '2013-04-12'})
+    hour = fetch(client, endpoint, {'start': '2013-04-10 06:00', 'end': '2013-04-12'})
+    assert day.rows == ((dataset.index >= '2013-04-10') & (dataset.index < '2013-04-13')).sum()
+    assert hour.rows == 0 and hour.body == day.body
+
+
+def test_manifest_read_only_when_changed(tmp_path, monkeypatch):
+    path = str(tmp_path / 'manifest.json')
+    write_manifest({'version': 3, 'rows': 0, 'last': {}}, path)
+    reads = []
+    monkeypatch.setattr(api, 'data_version', lambda p: reads.append(p) or read_manifest(p)['version'])
+    service = api.Service(manifest_path=path, workers=1, manifest_check=0)
+    assert [service.version() for _ in range(3)] == [3, 3, 3] and len(reads) == 1
+    write_manifest({'version': 4, 'rows': 0, 'last': {}}, path)
+    assert service.version() == 4 and len(reads) == 2
+
+    # di antara dua pemeriksaan, versi diambil dari memori tanpa menyentuh manifest
+    service.manifest_check = 60
+    write_manifest({'version': 5, 'rows': 0, 'last': {}}, path)
+    assert service.version() == 4 and len(reads) == 2
+    service._checked = float('-inf')
+    assert service.version() == 5
+    service.executor.shutdown()
+
+
+def test_episode_tables_are_bounded(built):
+    data = api.Snapshot(1, built['store'], built['cube'], f"{built['cube']}/corr", max_entries=2)
+    first = data.episodes(100.0, 1)
+    data.episodes(150.0, 1)
+    assert data.episodes(100.0, 1) is first
+    # tabel yang paling lama tidak dipakai dibuang saat batas terlampaui
+    data.episodes(200.0, 2)
+    assert list(data._episodes) == [(100.0, 1, None), (200.0, 2, None)]
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import aqi
+from store import POLLUTANT_COLS
+
+
+@pytest.mark.parametrize('standard', list(aqi.STANDARDS))
+def test_breakpoint_edges(standard):
+    for pollutant, specs in aqi.STANDARDS[standard]['pollutants'].items():
+        for spec in specs:
+            segments = spec['segments']
+            c_lo, c_hi, i_lo, i_hi = segments.T
+            # kedua ujung setiap segmen memberi indeks ujungnya sendiri
+            np.testing.assert_allclose(aqi.sub_index(c_lo, segments), i_lo, err_msg=pollutant)
+            np.testing.assert_allclose(aqi.sub_index(c_hi, segments), i_hi, err_msg=pollutant)
+            middle = (c_lo + c_hi) / 2
+            np.testing.assert_allclose(aqi.sub_index(middle, segments), (i_lo + i_hi) / 2, err_msg=pollutant)
+            # di atas breakpoint tertinggi dibatasi, di bawah breakpoint terendah dan NaN tidak terdefinisi
+            above = aqi.sub_index(np.array([c_hi[-1] * 2]), segments)
+            below = aqi.sub_index(np.array([c_lo[0] - 1, np.nan]), segments)
+            assert above[0] == i_hi[-1]
+            assert np.isnan(below).all()
+
+
+@pytest.mark.parametrize('standard', list(aqi.STANDARDS))
+def test_category_edges(standard):
+    spec = aqi.STANDARDS[standard]
+    levels = np.array(spec['levels'], dtype='float64')
+    # batas atas kategori masih termasuk kategori itu
+    assert list(aqi.categorize(levels, standard).codes) == list(range(len(levels)))
+    assert list(aqi.categorize(levels + 1, standard).codes) == list(range(1, len(levels) + 1))
+    assert aqi.categorize(np.array([np.nan]), standard).codes[0] == -1
+
+
+def test_epa_gap_between_segments():
+    # US EPA: 9,0 -> 50 dan 9,1 -> 51, nilai di antaranya dipotong ke satu desimal lebih dulu
+    segments = aqi.STANDARDS['US EPA']['pollutants']['PM2.5'][0]['segments']
+    assert np.isnan(aqi.sub_index(np.array([9.05]), segments)[0])
+    frame = constant_day({'PM2.5': 9.04})
+    assert aqi.compute(frame, 'US EPA')['aqi:PM2.5'].iloc[-1] == 50
+    frame = constant_day({'PM2.5': 9.1})
+    assert aqi.compute(frame, 'US EPA')['aqi:PM2.5'].iloc[-1] == 51
+
+
+def constant_day(values: dict) -> pd.DataFrame:
+    index = pd.date_range('2015-01-01', periods=24, freq='h')
+    frame = pd.DataFrame({c: np.full(24, values.get(c, np.nan)) for c in POLLUTANT_COLS}, index=index)
+    frame['station'] = pd.Categorical(['S0'] * 24)
+    return frame
+
+
+@pytest.mark.parametrize('standard', list(aqi.STANDARDS))
+def test_overall_is_max_sub_index(standard):
+    frame = constant_day({'PM2.5': 80.0, 'PM10': 120.0, 'NO2': 60.0})
+    result = aqi.compute(frame, standard).iloc[-1]
+    subs = [result[f'aqi:{p}'] for p in POLLUTANT_COLS]
+    assert result['aqi'] == np.nanmax(subs)
+    assert result['dominant'] == POLLUTANT_COLS[int(np.nanargmax(subs))]
+    # 24 jam belum lengkap (kurang dari 75% jam valid) untuk baris pertama
+    assert np.isnan(aqi.compute(frame, standard)['aqi:PM2.5'].iloc[0])
@@ -0,0 +1,115 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import correlation
+from store import MEASUREMENT_COLS, select_rows, station_index
+from test_cube import BOUNDS, split_batches
+from test_store import expected_rows
+
+
+SELECTIONS = [
+    dict(),
+    dict(start='2013-03-05', end='2013-05-10'),
+    dict(start='2013-03-05', end='2013-03-20', stations=('Dongsi',)),
+    dict(start='2013-04-02', end='2013-05-31', quality=('asli',)),
+    dict(start='2013-05-02', end='2013-05-02', stations=('Guanyuan', 'Aotizhongxin')),
+]
+
+
+def assert_same_matrix(actual: pd.DataFrame, expected: pd.DataFrame):
+    # kolom konstan atau tanpa pasangan valid harus NaN di keduanya
+    np.testing.assert_array_equal(np.isnan(actual.to_numpy()), np.isnan(expected.to_numpy()))
+    np.testing.assert_allclose(actual.to_numpy(), expected.to_numpy(), atol=1e-9, equal_nan=True)
+
+
+def with_gaps(df: pd.DataFrame) -> pd.DataFrame:
+    # nilai hilang yang tersisa setelah QC: beberapa jam satu kolom, dan satu hari penuh satu kolom
+    df = df.copy()
+    times = df.index.to_numpy()
+    df.loc[(df['station'] == 'Dongsi').to_numpy() & (df['hour'] % 5 == 0).to_numpy()
+           & (times < np.datetime64('2013-04-20')), 'NO2'] = np.nan
+    df.loc[(df['station'] == 'Guanyuan').to_numpy() & (df.index.normalize() == '2013-05-02'), 'TEMP'] = np.nan
+    return df
+
+
+@pytest.mark.parametrize('selection', SELECTIONS)
+def test_matrix_matches_dataframe_corr(dataset, selection):
+    stats = correlation.build_stats(dataset)
+    matrix = correlation.correlation_matrix(correlation.select_stats(stats, **selection))
+    expected = expected_rows(dataset, **selection)[MEASUREMENT_COLS].astype('float64').corr()
+    assert_same_matrix(matrix, expected)
+
+
+@pytest.mark.parametrize('selection', SELECTIONS)
+def test_pairwise_gaps_match_dataframe_corr(dataset, selection):
+    # hanya sel dengan nilai hilang yang menyimpan koreksi pasangan, hasilnya tetap pairwise-complete
+    df = with_gaps(dataset)
+    stats = correlation.build_stats(df)
+    assert 0 < len(stats['daily']['gap_rows']) < len(stats['daily']['keys'])
+    matrix = correlation.correlation_matrix(correlation.select_stats(stats, **selection))
+    expected = expected_rows(df, **selection)[MEASUREMENT_COLS].astype('float64').corr()
+    assert_same_matrix(matrix, expected)
+
+
+def test_packed_stats_are_compact(dataset):
+    stats = correlation.build_stats(dataset)
+    k = len(correlation.CORR_COLS)
+    assert stats['monthly']['n'].dtype == np.float32
+    assert stats['monthly']['n'].shape[1:] == stats['monthly']['sxy'].shape[1:] == (k * (k + 1) // 2,)
+    assert stats['daily']['sx'].shape[1:] == (k,) and not len(stats['daily']['gap_rows'])
+    total = correlation.select_stats(stats)
+    np.testing.assert_array_equal(total['n'], total['n'].T)
+    np.testing.assert_array_equal(np.diag(total['n']), dataset[correlation.CORR_COLS].count().to_numpy())
+
+
+def test_update_stats_matches_rebuild(dataset):
+    df = with_gaps(dataset)
+    batches = split_batches(df, BOUNDS)
+    stats = correlation.build_stats(batches[0])
+    for batch in batches[1:]:
+        stats = correlation.update_stats(stats, batch)
+    expected = correlation.build_stats(df)
+    for level in correlation.LEVELS:
+        n = len(stats[level]['keys'])
+        np.testing.assert_array_equal(stats[level]['n'][:n], expected[level]['n'])
+        np.testing.assert_array_equal(stats[level]['gap_rows'], expected[level]['gap_rows'])
+    for selection in SELECTIONS:
+        assert_same_matrix(
+            correlation.correlation_matrix(correlation.select_stats(stats, **selection)),
+            correlation.correlation_matrix(correlation.select_stats(expected, **selection)),
+        )
+
+
+def test_write_stats_rewrites_only_tail_months(dataset, tmp_path):
+    # seperti stream.py: hanya sel sejak bulan batch di memori, hanya file bulan itu yang ditulis ulang
+    batches = split_batches(dataset, BOUNDS)
+    path = str(tmp_path / 'corr')
+    correlation.write_stats(correlation.build_stats(batches[0]), path)
+    march = os.path.join(path, 'daily', '2013-03.npz')
+    before = os.stat(march).st_mtime_ns
+    for batch in batches[1:]:
+        stats = correlation.update_stats(correlation.load_stats(path, since=batch.index.min()), batch)
+        correlation.write_stats(stats, path, since=batch.index.min())
+    assert os.stat(march).st_mtime_ns == before
+    loaded, expected = correlation.load_stats(path), correlation.build_stats(dataset)
+    for level in correlation.LEVELS:
+        pd.testing.assert_frame_equal(loaded[level]['keys'].astype({'station': str}),
+                                      expected[level]['keys'].astype({'station': str}))
+    rows = select_rows(dataset, '2013-04-10', '2013-05-25', index=station_index(dataset))
+    assert_same_matrix(correlation.correlation_matrix(correlation.select_stats(loaded, '2013-04-10', '2013-05-25')),
+                       rows[MEASUREMENT_COLS].astype('float64').corr())
+
+
+def test_stats_shards_round_trip_gaps(dataset, tmp_path):
+    stats = correlation.build_stats(with_gaps(dataset))
+    correlation.write_stats(stats, str(tmp_path))
+    loaded = correlation.load_stats(str(tmp_path))
+    for level in correlation.LEVELS:
+        for name in correlation.STAT_NAMES + correlation.GAP_NAMES + ['gap_rows']:
+            np.testing.assert_array_equal(loaded[level][name], stats[level][name])
+    since = correlation.load_stats(str(tmp_path), since='2013-05-02')
+    np.testing.assert_array_equal(since['daily']['gap_rows'],
+                                  correlation.stats_since(stats, '2013-05-02')['daily']['gap_rows'])
@@ -0,0 +1,101 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import cube
+from store import MEASUREMENT_COLS
+
+
+def split_batches(df: pd.DataFrame, bounds) -> list:
+    # potongan berurutan waktu; batas di tengah hari/episode menguji sel yang dijumlah ulang
+    edges = [df.index.min()] + [pd.Timestamp(b) for b in bounds] + [df.index.max() + pd.Timedelta(hours=1)]
+    return [df[(df.index >= lo) & (df.index < hi)] for lo, hi in zip(edges[:-1], edges[1:])]
+
+
+BOUNDS = ['2013-04-15 13:00', '2013-04-15 14:00', '2013-04-30 23:00', '2013-05-20 07:00']
+
+
+def test_daily_cells_match_groupby(dataset):
+    daily = cube.build_cube(dataset)['daily']
+    keys = [dataset['station'], dataset.index.normalize().rename('period'), dataset['qc_flag']]
+    grouped = dataset.astype({'PM2.5': 'float64'}).groupby(keys, observed=True)
+    expected = pd.DataFrame({
+        'rows': grouped.size(),
+        'sum:PM2.5': grouped['PM2.5'].sum(),
+        'count:NO2': grouped['NO2'].count(),
+        'air_category_pm10:Baik': grouped['air_category_pm10'].apply(lambda c: (c == 'Baik').sum()),
+    }).reset_index()
+    actual = daily.set_index(cube.CELL_KEYS).sort_index()
+    expected = expected.set_index(cube.CELL_KEYS).sort_index()
+    assert len(actual) == len(expected)
+    np.testing.assert_array_equal(actual['rows'], expected['rows'])
+    np.testing.assert_array_equal(actual['count:NO2'], expected['count:NO2'])
+    np.testing.assert_array_equal(actual['air_category_pm10:Baik'], expected['air_category_pm10:Baik'])
+    np.testing.assert_allclose(actual['sum:PM2.5'], expected['sum:PM2.5'], rtol=1e-9)
+
+
+def test_monthly_cells_sum_daily(dataset):
+    cells = cube.build_cube(dataset)
+    daily = cells['daily']
+    month = daily['period'].dt.to_period('M').dt.start_time
+    expected = daily.drop(columns=cube.CELL_KEYS).groupby([month, daily['station'], daily['qc_flag']],
+                                                          observed=True).sum()
+    actual = cells['monthly'].set_index(cube.CELL_KEYS)
+    np.testing.assert_allclose(actual.to_numpy(dtype='float64'), expected.to_numpy(dtype='float64'))
+
+
+@pytest.mark.parametrize('selection', [
+    dict(start='2013-03-10', end='2013-05-03'),
+    dict(start='2013-04-01', end='2013-04-30', stations=('Dongsi',)),
+    dict(start='2013-04-20', end='2013-04-22', quality=('asli',)),
+])
+def test_select_cells_matches_rows(dataset, selection):
+    cells = cube.select_cells(cube.build_cube(dataset), **selection)
+    rows = dataset[(dataset.index >= selection['start'])
+                   & (dataset.index < pd.Timestamp(selection['end']) + pd.Timedelta(days=1))]
+    if 'stations' in selection:
+        rows = rows[rows['station'].isin(selection['stations'])]
+    if 'quality' in selection:
+        rows = rows[rows['qc_flag'].isin(selection['quality'])]
+    assert cells['rows'].sum() == len(rows)
+    for col in MEASUREMENT_COLS:
+        assert cells[f'count:{col}'].sum() == rows[col].count()
+        np.testing.assert_allclose(cells[f'sum:{col}'].sum(), rows[col].astype('float64').sum(), rtol=1e-9)
+
+
+def test_update_cube_matches_rebuild(dataset):
+    batches = split_batches(dataset, BOUNDS)
+    cells = cube.build_cube(batches[0])
+    for batch in batches[1:]:
+        cells = cube.update_cube(cells, batch)
+    expected = cube.build_cube(dataset)
+    for level in cube.CELL_LEVELS + ['episodes']:
+        pd.testing.assert_frame_equal(cells[level].astype({'station': str}),
+                                      expected[level].astype({'station': str}), check_dtype=False)
+
+
+def test_cube_shards_round_trip(dataset, tmp_path):
+    cells = cube.build_cube(dataset)
+    cube.write_cube(cells, str(tmp_path))
+    assert sorted(p.name for p in (tmp_path / 'daily').iterdir()) == ['2013-03.parquet', '2013-04.parquet',
+                                                                       '2013-05.parquet']
+    loaded = cube.load_cube(str(tmp_path))
+    tail = cube.load_cube(str(tmp_path), since='2013-05-10')
+    for level in cube.CELL_LEVELS:
+        pd.testing.assert_frame_equal(loaded[level].astype({'station': str}),
+                                      cells[level].astype({'station': str}), check_dtype=False)
+        assert tail[level]['period'].min() == pd.Timestamp('2013-05-01')
+
+
+def test_empty_selection_means_are_nan(dataset):
+    built = cube.build_cube(dataset)
+    cells = cube.select_cells(built, start='2013-04-01', end='2013-04-30', stations=('Nonexistent',))
+    # pembagian nol pada seleksi kosong tidak boleh memunculkan RuntimeWarning di dashboard
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        total_station, avg_pm10, avg_pm25 = cube.metrics(cells)
+        yearly = cube.yearly_means(cells, ['PM10', 'PM2.5'])
+    assert total_station == 0 and np.isnan(avg_pm10) and np.isnan(avg_pm25)
+    assert yearly.empty
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+import ingest
+from aqi import HOURLY_LABELS
+from conftest import STATIONS, ingest_raw
+from store import COLUMNS, load_store, read_manifest
+
+
+def test_categorize_time_matches_rowwise():
+    hours = pd.Series(np.arange(24), dtype='int16')
+    expected = ['Pagi' if 6 <= h < 12 else 'Siang' if 12 <= h < 18 else 'Malam' for h in range(24)]
+    result = ingest.categorize_time(hours)
+    assert list(result.cat.categories) == ingest.TIME_CATEGORY_LABELS
+    assert list(result.astype(str)) == expected
+
+
+def test_categorize_air_edges():
+    # batas atas kategori masih termasuk kategori itu, NaN tidak berkategori
+    values = pd.Series([0.0, 12.0, 12.1, 35.4, 35.5, 250.4, 250.5, np.nan])
+    result = ingest.categorize_air(values)
+    assert list(result.cat.codes) == [0, 0, 1, 1, 2, 4, 5, -1]
+    assert list(result.cat.categories) == HOURLY_LABELS
+
+
+def test_ingest_writes_store_and_manifest(raw, tmp_path):
+    paths = ingest_raw(raw, str(tmp_path))
+    df = load_store(paths['store'])
+    assert list(df.columns) == COLUMNS
+    assert len(df) == len(raw)
+    assert sorted(df['station'].astype(str).unique()) == STATIONS
+    # indeks waktu dibangun dari kolom year/month/day/hour
+    rebuilt = pd.to_datetime(df[['year', 'month', 'day', 'hour']].astype('int64'))
+    assert (rebuilt.to_numpy() == df.index.to_numpy()).all()
+    assert not df['wd'].isna().any()
+
+    manifest = read_manifest(paths['manifest'])
+    assert manifest['version'] == 1 and manifest['rows'] == len(raw)
+    assert set(manifest['last']) == set(STATIONS)
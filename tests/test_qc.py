@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+
+import qc
+from store import MEASUREMENT_COLS, sort_by_station
+
+
+def synthetic(stations: int = 4, hours: int = 24 * 14, seed: int = 0) -> pd.DataFrame:
+    # deret halus per stasiun: pola harian + derau kecil, tanpa lubang
+    index = pd.date_range('2015-01-01', periods=hours, freq='h')
+    rng = np.random.default_rng(seed)
+    frames = []
+    for i in range(stations):
+        level = 80 + 40 * np.sin(2 * np.pi * np.arange(hours) / 24 + i)
+        frame = pd.DataFrame({c: level + rng.normal(0, 2, hours) for c in MEASUREMENT_COLS}, index=index)
+        frame['CO'] = 1000 + 10 * level
+        frame['station'] = f'S{i}'
+        frames.append(frame)
+    df = pd.concat(frames)
+    df['station'] = df['station'].astype('category')
+    return sort_by_station(df)
+
+
+def flag_at(result: pd.DataFrame, station: str, time) -> str:
+    return result.loc[(result['station'] == station).to_numpy() & (result.index == time), 'qc_flag'].iloc[0]
+
+
+def value_at(df: pd.DataFrame, station: str, time, column: str) -> float:
+    return df.loc[(df['station'] == station).to_numpy() & (df.index == time), column].iloc[0]
+
+
+def test_clean_series_untouched():
+    df = synthetic()
+    result, report, _ = qc.apply_qc(df)
+    assert (result['qc_flag'] == 'asli').all()
+    assert report.drop(columns='hilang').to_numpy().sum() == 0
+    np.testing.assert_allclose(result[MEASUREMENT_COLS].to_numpy(), df[MEASUREMENT_COLS].to_numpy())
+
+
+def test_isolated_spike_replaced():
+    df = synthetic()
+    time = df.index[100]
+    df.loc[(df['station'] == 'S1').to_numpy() & (df.index == time), 'PM2.5'] = 900.0
+    result, report, _ = qc.apply_qc(df)
+    assert flag_at(result, 'S1', time) == 'spike'
+    assert value_at(result, 'S1', time, 'PM2.5') < 200
+    assert report.loc['PM2.5', 'spike'] == 1
+
+
+def test_plausible_spike_keeps_value():
+    # dua lonjakan berdekatan: masing-masing terisolasi, tapi nilainya masih dalam rentang jam sekitarnya
+    df = synthetic()
+    station = (df['station'] == 'S2').to_numpy()
+    times = df.index[100], df.index[102]
+    df.loc[station & (df.index == times[0]), 'PM10'] = 600.0
+    df.loc[station & (df.index == times[1]), 'PM10'] = 650.0
+    result, _, _ = qc.apply_qc(df)
+    assert flag_at(result, 'S2', times[0]) == 'spike'
+    assert value_at(result, 'S2', times[0], 'PM10') == 600.0
+
+
+def test_short_and_long_gaps():
+    df = synthetic()
+    station = (df['station'] == 'S0').to_numpy()
+    short = df.index[50:53]
+    long = df.index[200:230]
+    df.loc[station & df.index.isin(short), 'NO2'] = np.nan
+    df.loc[station & df.index.isin(long), 'NO2'] = np.nan
+    result, report, _ = qc.apply_qc(df)
+    assert all(flag_at(result, 'S0', t) == 'interpolasi' for t in short)
+    # tiga stasiun lain tersedia di jam yang sama
+    assert all(flag_at(result, 'S0', t) == 'spasial' for t in long)
+    assert report.loc['NO2', 'sisa NaN'] == 0
+    before, after = value_at(df, 'S0', df.index[49], 'NO2'), value_at(df, 'S0', df.index[53], 'NO2')
+    np.testing.assert_allclose(value_at(result, 'S0', short[0], 'NO2'), before + (after - before) / 4)
+
+
+def test_seasonal_fill_without_neighbours():
+    df = synthetic(stations=2)
+    station = (df['station'] == 'S0').to_numpy()
+    gap = df.index[200:230]
+    df.loc[station & df.index.isin(gap), 'O3'] = np.nan
+    result, _, _ = qc.apply_qc(df)
+    assert all(flag_at(result, 'S0', t) == 'musiman' for t in gap)
+
+
+def test_episode_crests_kept(raw):
+    # puncak episode nyata yang halus (naik dan turun bertahap) tidak boleh dipangkas
+    result, _, _ = qc.apply_qc(raw)
+    for time, column, value in [('2013-03-07 23:00', 'PM2.5', 520.0), ('2013-03-03 20:00', 'PM10', 274.0)]:
+        assert value_at(raw, 'Dongsi', time, column) == value
+        assert value_at(result, 'Dongsi', time, column) == value
+        assert flag_at(result, 'Dongsi', pd.Timestamp(time)) == 'asli'
+    # nilai asli hanya diubah untuk spike; sebagian besar nilai yang ditandai pun tetap
+    for column in qc.SPIKE_COLS:
+        changed = raw[column].notna().to_numpy() & (result[column].to_numpy() != raw[column].to_numpy())
+        assert changed.sum() <= (result['qc_flag'] == 'spike').sum()
+
+
+def test_flag_is_heaviest_level_of_row():
+    # satu jam dengan NO2 diinterpolasi dan O3 diisi spasial bertanda spasial, jam lain tetap asli
+    df = synthetic()
+    station = (df['station'] == 'S3').to_numpy()
+    time = df.index[150]
+    df.loc[station & (df.index == time), 'NO2'] = np.nan
+    df.loc[station & df.index.isin(df.index[140:160]), 'O3'] = np.nan
+    result, report, _ = qc.apply_qc(df)
+    assert result['qc_flag'].dtype == pd.CategoricalDtype(qc.QC_LEVELS, ordered=True)
+    assert flag_at(result, 'S3', time) == 'spasial'
+    assert report.loc['NO2', 'interpolasi'] == 1 and report.loc['O3', 'spasial'] == 20
+    assert (result.loc[~station, 'qc_flag'] == 'asli').all()
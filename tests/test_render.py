@@ -0,0 +1,46 @@
+import os
+
+import matplotlib
+
+matplotlib.use('Agg')
+
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+
+import render  # noqa: E402
+
+
+def line(values):
+    fig, ax = plt.subplots(figsize=(2, 2))
+    ax.plot(values)
+    plt.close(fig)
+    return fig
+
+
+def test_disk_cache_bounded(tmp_path, monkeypatch):
+    monkeypatch.setattr(render, 'DISK_DIR', str(tmp_path))
+    monkeypatch.setattr(render, '_disk', {'bytes': None, 'writes': 0})
+    first = render.render(line, np.arange(3))
+    size = len(first)
+    monkeypatch.setattr(render, 'DISK_MAX_BYTES', size * 6)
+
+    keep = render.cache_key(line, np.arange(3))
+    for i in range(20):
+        render.render(line, np.arange(3) * (i + 2))
+        # gambar yang terus dipakai disentuh mtime-nya, jadi tidak ikut dipangkas
+        render._memory.clear()
+        assert render.render(line, np.arange(3)) == first
+    files = os.listdir(tmp_path)
+    assert keep in files
+    assert sum(os.path.getsize(tmp_path / f) for f in files) <= render.DISK_MAX_BYTES * 1.5
+    assert len(files) < 20
+
+
+def test_prune_removes_oldest_and_stale_tmp(tmp_path):
+    for i, name in enumerate(['a.png', 'b.png', 'c.png']):
+        (tmp_path / name).write_bytes(b'x' * 100)
+        os.utime(tmp_path / name, (1000 + i, 1000 + i))
+    (tmp_path / 'd.png.tmp-1-1').write_bytes(b'x')
+    os.utime(tmp_path / 'd.png.tmp-1-1', (0, 0))
+    assert render.prune_disk(str(tmp_path), max_bytes=200) == 2
+    assert sorted(os.listdir(tmp_path)) == ['c.png']
@@ -0,0 +1,38 @@
+import os
+
+import correlation
+import cube
+import report
+from store import station_index
+
+
+def test_one_page_per_station_month(dataset):
+    cube_data = cube.build_cube(dataset)
+    pages = report.report_pages(cube_data)
+    unique = dataset.groupby(['station', dataset.index.to_period('M')], observed=True).size()
+    assert len(pages) == len(unique)
+    assert len(set(pages)) == len(pages)
+    # sel bulanan memang dipisah per tingkat QC, jadi tanpa deduplikasi halamannya berulang
+    assert len(cube_data['monthly']) > len(pages)
+
+
+def test_pages_filtered_by_station_and_month(dataset):
+    cube_data = cube.build_cube(dataset)
+    station = dataset['station'].cat.categories[0]
+    pages = report.report_pages(cube_data, [station], '2013-04-01', '2013-05-01')
+    assert [(s, m.strftime('%Y-%m')) for s, m in pages] == [(station, '2013-04'), (station, '2013-05')]
+
+
+def test_generate_renders_pages_in_workers(dataset, tmp_path):
+    index = station_index(dataset)
+    cube_data = cube.build_cube(dataset)
+    stats = correlation.build_stats(dataset)
+    pages = report.report_pages(cube_data, ['Dongsi'], '2013-04-01', '2013-05-01')
+    output = str(tmp_path)
+    rendered, total = report.generate(output, pages, dataset, index, cube_data, stats, workers=2)
+    assert total == 9 * len(pages) and 0 < rendered <= total
+    for station, month in pages:
+        assert os.path.exists(os.path.join(output, report.page_path(station, month)))
+    assert len(os.listdir(os.path.join(output, report.IMAGE_DIR))) == rendered
+    # run ulang memakai gambar yang sudah ada
+    assert report.generate(output, pages, dataset, index, cube_data, stats, workers=2) == (0, total)
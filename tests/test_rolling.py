@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import rolling
+from test_cube import split_batches
+
+
+# batas batch di tengah episode Dongsi 7 Maret 2013 dan di antara dua jam berurutan
+BOUNDS = ['2013-03-07 20:00', '2013-03-07 21:00', '2013-04-15 13:00', '2013-05-20 07:00']
+
+
+def naive_mean(df: pd.DataFrame, column: str, hours: int) -> pd.Series:
+    # rolling berbasis waktu per stasiun sebagai pembanding
+    series = df[column].astype('float64')
+    counts = series.groupby(df['station'], observed=True).rolling(f'{hours}h').count()
+    means = series.groupby(df['station'], observed=True).rolling(f'{hours}h').mean()
+    return means.where(counts >= rolling.min_hours(hours)).reset_index(level=0, drop=True)
+
+
+@pytest.mark.parametrize('hours', [8, 24])
+def test_rolling_mean_matches_pandas(dataset, hours):
+    means = rolling.window_means(dataset, ['PM2.5'], hours)[:, 0]
+    np.testing.assert_allclose(means, naive_mean(dataset, 'PM2.5', hours).to_numpy(), rtol=1e-9, equal_nan=True)
+
+
+def test_episodes_are_runs_above_threshold(dataset):
+    table = rolling.episodes(dataset)
+    above = ((dataset['PM2.5'] > rolling.EPISODE_THRESHOLD) & (dataset['PM10'] > rolling.EPISODE_THRESHOLD))
+    assert table['hours'].sum() == above.sum()
+    assert (table['end'] - table['start'] == pd.to_timedelta(table['hours'] - 1, unit='h')).all()
+    assert (table['peak:PM2.5'] > rolling.EPISODE_THRESHOLD).all()
+
+
+@pytest.mark.parametrize('hours', [1, 8])
+def test_extend_episodes_matches_recompute(dataset, hours):
+    batches = split_batches(dataset, BOUNDS)
+    table = rolling.episodes(batches[0], hours=hours)
+    seen = batches[0]
+    for batch in batches[1:]:
+        # konteks: jam-jam terakhir setiap stasiun yang masih masuk jendela rata-rata
+        context = seen[seen.index > seen.index.max() - pd.Timedelta(hours=hours - 1)]
+        table = rolling.extend_episodes(table, batch, context, hours=hours)
+        seen = pd.concat([seen, batch])
+    expected = rolling.episodes(dataset, hours=hours)
+    pd.testing.assert_frame_equal(table.astype({'station': str}), expected.astype({'station': str}),
+                                  check_dtype=False)
+
+
+def test_extend_without_new_episode_keeps_table(dataset):
+    table = rolling.episodes(dataset)
+    quiet = dataset.iloc[:5].assign(**{'PM2.5': 1.0}).set_axis(dataset.index[-5:] + pd.Timedelta(hours=1))
+    assert rolling.extend_episodes(table, quiet) is table
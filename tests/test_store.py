@@ -0,0 +1,87 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import store
+from conftest import STATIONS
+from store import row_ranges, select_rows, station_index
+
+
+SELECTIONS = [
+    dict(),
+    dict(start='2013-03-15', end='2013-04-02'),
+    dict(start='2013-04-10 06:00', stations=('Dongsi',)),
+    dict(end='2013-03-01', stations=('Guanyuan', 'Aotizhongxin')),
+    dict(stations=('Dongsi', 'Tidak Ada')),
+    dict(stations=()),
+    dict(start='2013-05-02', end='2013-04-01'),
+    dict(start='2013-04-01', end='2013-04-30', quality=('interpolasi', 'spasial')),
+    dict(quality=()),
+    dict(start='2013-04-10 06:30', end='2013-04-11 23:59'),
+]
+
+
+def expected_rows(df: pd.DataFrame, start=None, end=None, stations=None, quality=None) -> pd.DataFrame:
+    mask = np.ones(len(df), dtype=bool)
+    if start is not None:
+        mask &= df.index >= pd.Timestamp(start)
+    if end is not None:
+        # tanggal akhir inklusif sampai jam terakhir hari itu
+        mask &= df.index < pd.Timestamp(end).normalize() + pd.Timedelta(days=1)
+    if stations is not None:
+        mask &= df['station'].isin(stations).to_numpy()
+    if quality is not None:
+        mask &= df['qc_flag'].isin(quality).to_numpy()
+    return df[mask]
+
+
+@pytest.mark.parametrize('selection', SELECTIONS)
+def test_select_rows_matches_mask(dataset, selection):
+    index = station_index(dataset)
+    pd.testing.assert_frame_equal(select_rows(dataset, **selection, index=index), expected_rows(dataset, **selection))
+
+
+def test_select_rows_builds_index(dataset):
+    selection = dict(start='2013-03-15', end='2013-03-16', stations=('Dongsi',))
+    pd.testing.assert_frame_equal(select_rows(dataset, **selection), expected_rows(dataset, **selection))
+
+
+def test_row_ranges_merge_adjacent_stations(dataset):
+    index = station_index(dataset)
+    # stasiun berurutan dengan rentang penuh menjadi satu irisan, stasiun yang berjarak tetap terpisah
+    assert row_ranges(index).tolist() == [[0, len(dataset)]]
+    assert len(row_ranges(index, stations=STATIONS[:2])) == 1
+    assert len(row_ranges(index, stations=(STATIONS[0], STATIONS[-1]))) == 2
+    assert len(row_ranges(index, start='2013-04-01', end='2013-04-02')) == len(STATIONS)
+    assert row_ranges(index, stations=()).shape == (0, 2)
+
+
+def test_generations_publish_and_prune(tmp_path):
+    root = str(tmp_path / 'cube')
+    with store.new_generation(root, 1, base=False) as path:
+        with open(os.path.join(path, 'a.txt'), 'w') as f:
+            f.write('1')
+    os.makedirs(os.path.join(root, 'corr', 'v00000001'))
+    with store.new_generation(root, 2) as path:
+        # file generasi sebelumnya ditautkan, penggantian lewat atomic_write tidak mengubah generasi lama
+        with store.atomic_write(os.path.join(path, 'a.txt')) as tmp:
+            with open(tmp, 'w') as f:
+                f.write('2')
+        assert store.generation_path(root) == os.path.join(root, 'v00000001')
+    assert store.generation_path(root) == os.path.join(root, 'v00000002')
+    assert store.generation_path(root, 1) == os.path.join(root, 'v00000001')
+    with open(os.path.join(store.generation_path(root, 1), 'a.txt')) as f:
+        assert f.read() == '1'
+
+    # generasi yang gagal tidak dipublikasikan
+    with pytest.raises(RuntimeError):
+        with store.new_generation(root, 3):
+            raise RuntimeError
+    assert store.generation_path(root) == os.path.join(root, 'v00000002')
+
+    store.prune_generations(root)
+    assert os.path.isdir(os.path.join(root, 'v00000001'))
+    store.prune_generations(root, grace=-1)
+    assert sorted(os.listdir(root)) == ['corr', 'v00000002']
@@ -0,0 +1,174 @@
+import glob
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import stream
+from conftest import STATIONS, ingest_raw
+from correlation import load_stats
+from cube import CELL_LEVELS, build_cube, load_cube
+from store import append_store, compact_store, generation_path, load_store, read_manifest
+
+
+SPLIT = pd.Timestamp('2013-05-21')
+
+
+def to_csv_rows(raw: pd.DataFrame) -> pd.DataFrame:
+    # baris seperti yang dibaca stream.read_batches dari CSV PRSA
+    return raw.astype({'station': str}).reset_index(drop=True)
+
+
+def set_value(raw: pd.DataFrame, station: str, hour: int, column: str, value):
+    raw.loc[(raw['station'] == station).to_numpy() & (raw.index == SPLIT + pd.Timedelta(hours=hour)), column] = value
+
+
+def stored(df: pd.DataFrame, station: str, hour: int):
+    return df[(df['station'] == station).to_numpy() & (df.index == SPLIT + pd.Timedelta(hours=hour))].iloc[0]
+
+
+def test_stream_qc_uses_store_history(raw, tmp_path, capsys):
+    paths = ingest_raw(raw[raw.index < SPLIT], str(tmp_path))
+    tail = raw[(raw.index >= SPLIT) & (raw.index < SPLIT + pd.Timedelta(days=1))].copy()
+    for hour, value in enumerate([9, 9, 11, 13, 900, 12]):
+        set_value(tail, 'Dongsi', hour, 'PM2.5', value)
+    # glitch di tengah batch besar, dan celah satu jam di awal batch yang ujung kirinya ada di store
+    set_value(tail, 'Aotizhongxin', 10, 'PM10', 2.0)
+    set_value(tail, 'Guanyuan', 6, 'NO2', np.nan)
+
+    appender = stream.Appender(paths['store'], paths['cube'], paths['manifest'])
+    for hour in range(6):
+        batch = tail[tail.index == SPLIT + pd.Timedelta(hours=hour)]
+        assert appender.append(to_csv_rows(batch)) == (3, 0)
+    assert appender.append(to_csv_rows(tail[tail.index >= SPLIT + pd.Timedelta(hours=6)])) == (54, 0)
+
+    df = load_store(paths['store'])
+    # jam terbaru hanya bisa dinilai dari jam sebelumnya (dari store): ditandai, nilainya dipertahankan
+    spike = stored(df, 'Dongsi', 4)
+    assert spike['qc_flag'] == 'spike' and spike['PM2.5'] == 900
+    assert stored(df, 'Dongsi', 3)['qc_flag'] != 'spike'
+    # penurunan sesaat dengan kedua tetangga di batch yang sama diganti
+    glitch = stored(df, 'Aotizhongxin', 10)
+    assert glitch['qc_flag'] == 'spike' and glitch['PM10'] > 2.0
+    # ujung kiri celah ada di batch sebelumnya, jadi tetap diinterpolasi (qc_flag baris ini ikut kolom CO
+    # yang hilang seharian)
+    gap = stored(df, 'Guanyuan', 6)
+    before, after = stored(df, 'Guanyuan', 5)['NO2'], stored(df, 'Guanyuan', 7)['NO2']
+    np.testing.assert_allclose(gap['NO2'], (before + after) / 2, rtol=1e-6)
+    assert len(df) == len(raw[raw.index < SPLIT + pd.Timedelta(days=1)])
+
+
+def test_append_rewrites_only_touched_tail(raw, tmp_path):
+    # hari-hari terakhir Mei dialirkan per jam: shard bulan lama tidak disentuh dan kubus sama dengan hasil ingest
+    split = pd.Timestamp('2013-05-31 18:00')
+    paths = ingest_raw(raw[raw.index < split], str(tmp_path))
+    march = os.path.join('daily', '2013-03.parquet')
+    before = os.stat(os.path.join(generation_path(paths['cube']), march))
+
+    appender = stream.Appender(paths['store'], paths['cube'], paths['manifest'])
+    tail = raw[raw.index >= split]
+    for time in tail.index.unique():
+        appender.append(to_csv_rows(tail[tail.index == time]))
+
+    # bulan lama di generasi terbaru adalah file yang sama (hard link), tidak ditulis ulang
+    after = os.stat(os.path.join(generation_path(paths['cube']), march))
+    assert (after.st_ino, after.st_mtime_ns) == (before.st_ino, before.st_mtime_ns)
+    df = load_store(paths['store'])
+    assert len(df) == len(raw)
+    expected, actual = build_cube(df), load_cube(paths['cube'])
+    for level in CELL_LEVELS:
+        pd.testing.assert_frame_equal(actual[level].astype({'station': str}),
+                                      expected[level].astype({'station': str}), check_dtype=False)
+    pd.testing.assert_frame_equal(actual['episodes'].astype({'station': str}),
+                                  expected['episodes'].astype({'station': str}), check_dtype=False)
+    stats = load_stats(os.path.join(paths['cube'], 'corr'))
+    assert len(stats['daily']['keys']) == len(expected['daily'])
+
+
+def test_readers_keep_their_version(raw, tmp_path):
+    # pembaca versi 1 tetap melihat data versi 1 walaupun stream menambah dan memadatkan store setelahnya
+    split = pd.Timestamp('2013-05-30')
+    paths = ingest_raw(raw[raw.index < split], str(tmp_path))
+    first = {root: generation_path(paths[root], 1) for root in ('store', 'cube')}
+    corr = generation_path(os.path.join(paths['cube'], 'corr'), 1)
+    rows, cells, stats = load_store(first['store']), load_cube(first['cube']), load_stats(corr)
+
+    appender = stream.Appender(paths['store'], paths['cube'], paths['manifest'])
+    tail = raw[raw.index >= split]
+    for time in tail.index.unique()[:20]:
+        appender.append(to_csv_rows(tail[tail.index == time]))
+    assert read_manifest(paths['manifest'])['version'] == 21
+    # 20 batch menambah lebih dari COMPACT_FILES file per partisi, jadi partisi versi terbaru sudah dipadatkan
+    assert len(glob.glob(os.path.join(generation_path(paths['store']), 'station=Dongsi', 'year=*', '*.parquet'))) == 5
+
+    pd.testing.assert_frame_equal(load_store(first['store']), rows)
+    pd.testing.assert_frame_equal(load_cube(first['cube'])['daily'], cells['daily'])
+    for name in ['n', 'sxy']:
+        np.testing.assert_array_equal(load_stats(corr)['daily'][name], stats['daily'][name])
+    latest = load_store(paths['store'])
+    assert len(latest) == len(rows) + 20 * len(STATIONS)
+    assert not latest.set_index('station', append=True).index.duplicated().any()
+
+
+def test_compact_store_merges_small_files(dataset, tmp_path):
+    path = str(tmp_path / 'main.parquet')
+    days = dataset.index.normalize().unique()[:5]
+    for day in days:
+        append_store(dataset[dataset.index.normalize() == day], path)
+    assert compact_store(path, max_files=2) == len(STATIONS)
+    for directory in glob.glob(os.path.join(path, 'station=*', 'year=*')):
+        assert len(glob.glob(os.path.join(directory, '*.parquet'))) == 1
+    df = load_store(path)
+    expected = dataset[dataset.index.normalize().isin(days)].rename_axis(None)
+    pd.testing.assert_frame_equal(df.astype({'station': str}), expected.astype({'station': str}), check_dtype=False)
+
+
+def test_stdin_batches_flush_before_eof(raw):
+    # feed yang tetap terbuka harus tetap menghasilkan batch setelah max_wait, tanpa menunggu EOF
+    rows = to_csv_rows(raw).head(3).to_csv(index=False, na_rep='NA').splitlines(keepends=True)
+    read_fd, write_fd = os.pipe()
+    source, sink = os.fdopen(read_fd, 'r'), os.fdopen(write_fd, 'w')
+    batches = stream.stream_batches(source, batch_size=100, max_wait=0.2)
+    sink.writelines(rows[:3])
+    sink.flush()
+    received = []
+    reader = threading.Thread(target=lambda: received.append(next(batches)), daemon=True)
+    reader.start()
+    reader.join(timeout=5)
+    assert len(received) == 1 and len(received[0]) == 2
+    assert list(received[0].columns) == rows[0].strip().split(',')
+
+    sink.writelines(rows[3:])
+    sink.close()
+    assert [len(b) for b in batches] == [1]
+    source.close()
+
+
+def test_watch_waits_for_finished_files(tmp_path):
+    directory = str(tmp_path)
+    for name in ['a.csv', '.b.csv', 'c.csv.tmp', 'notes.txt']:
+        (tmp_path / name).write_text('year\n')
+    seen = {}
+    # file baru belum diambil sampai ukuran dan mtime-nya tidak berubah di pemeriksaan berikutnya
+    assert stream.ready_files(directory, seen) == []
+    assert stream.ready_files(directory, seen) == [str(tmp_path / 'a.csv')]
+
+    with open(tmp_path / 'a.csv', 'a') as f:
+        f.write('2013\n')
+    assert stream.ready_files(directory, seen) == []
+    os.replace(tmp_path / 'c.csv.tmp', tmp_path / 'c.csv')
+    assert stream.ready_files(directory, seen) == [str(tmp_path / 'a.csv')]
+    assert stream.ready_files(directory, seen) == [str(tmp_path / 'a.csv'), str(tmp_path / 'c.csv')]
+
+
+@pytest.mark.parametrize('store_name', ['main.npy', 'main.feather'])
+def test_stream_rejects_read_only_store(tmp_path, capsys, store_name):
+    # store yang tidak bisa ditambah ditolak sebelum batch pertama dibaca
+    store_path = str(tmp_path / store_name)
+    with pytest.raises(ValueError, match='store Parquet'):
+        stream.Appender(store_path, str(tmp_path / 'cube'), str(tmp_path / 'manifest.json'))
+    with pytest.raises(SystemExit):
+        stream.main(['--store', store_path, '--cube', str(tmp_path / 'cube'), '--manifest', str(tmp_path / 'manifest.json')])
+    assert 'store Parquet' in capsys.readouterr().err
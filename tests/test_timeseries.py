@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import timeseries
+
+
+def noisy(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    x = np.arange(n, dtype='int64') * 3600
+    y = np.cumsum(rng.normal(0, 1, n))
+    return x, y
+
+
+@pytest.mark.parametrize('n, budget', [(10, 20), (1000, 100), (5000, 3), (5000, 1200)])
+def test_lttb_point_limit(n, budget):
+    x, y = noisy(n)
+    keep = timeseries.lttb(x, y, budget)
+    assert len(keep) == min(n, budget)
+    assert keep[0] == 0 and keep[-1] == n - 1
+    assert (np.diff(keep) > 0).all()
+
+
+@pytest.mark.parametrize('n, budget', [(10, 20), (1000, 100), (5001, 1200)])
+def test_envelope_point_limit(n, budget):
+    x, y = noisy(n)
+    band_x, low, high = timeseries.envelope(x, y - 1, y + 1, budget)
+    assert len(band_x) == len(low) == len(high) == min(n, budget)
+    # setiap puncak tetap ada di pita
+    assert low.min() == (y - 1).min() and high.max() == (y + 1).max()
+
+
+def test_downsample_within_budget(dataset):
+    times = dataset.index.to_numpy()
+    values = dataset['PM2.5'].to_numpy(dtype='float64')
+    result = timeseries.downsample(times, values, times.min(), times.max(), budget=600)
+    assert result['level'] == 'hour'
+    assert len(result['times']) == len(result['band_times']) == 600
+    assert result['buckets'] == len(np.unique(times[~np.isnan(values)]))
+    assert result['high'].max() == np.nanmax(values) and result['low'].min() == np.nanmin(values)
+
+
+def test_choose_level_from_span():
+    assert timeseries.choose_level('2013-03-01', '2013-03-31') == 'hour'
+    assert timeseries.choose_level('2013-03-01', '2017-02-28') == 'day'
+    assert timeseries.choose_level('2013-03-01', '2017-02-28', budget=100) == 'week'
+    assert timeseries.choose_level('2000-01-01', '2017-02-28', budget=10) == 'month'
+
+
+def test_weeks_start_on_monday():
+    starts = timeseries.bucket_starts(pd.date_range('2015-01-01', periods=14, freq='D'), 'week')
+    assert (pd.DatetimeIndex(starts).dayofweek == 0).all()